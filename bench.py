@@ -0,0 +1,598 @@
+"""Benchmarks for Glass hot paths.
+
+Runs the real controller entry points (`_run_find`, `_order_matches_by_anchor`,
+`_match_template`, macro step dispatch, `_load_macros` / `_save_macros`) against
+synthetic data, without building any windows or posting mouse events.
+
+Usage:
+  python bench.py                          # full run, JSON to stdout
+  python bench.py --quick                  # smaller sizes / fewer repeats
+  python bench.py --out bench.json         # write results to a file
+  python bench.py --baseline bench.json    # compare against a previous run
+  python bench.py --filter find            # only benchmarks whose name contains "find"
+
+With --baseline, the exit code is 1 when any benchmark's median regressed by more
+than --threshold (default 0.15 = 15%).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import AppKit
+import numpy as np
+import objc
+
+import main as glass
+
+
+SCREEN_SIZE_PT = (1512.0, 982.0)
+FRAME_SIZES = {
+    "1x": (1512, 982),
+    "2x": (3024, 1964),
+    "5k": (5120, 2880),
+}
+# Score band around MATCH_THRESHOLD where the direct and FFT paths may
+# disagree: cv2.matchTemplate's float32 scores are off by ~1e-2 at 1x on cv2 5.x.
+FFT_MATCH_TOLERANCE = 0.05
+VOCABULARY = [
+    "Chart", "Summary", "Charges", "Documentation", "Diagnosis", "Problems",
+    "Labs", "Results", "Orders", "Send", "Sign", "Pend", "Visit", "Notes",
+    "Medications", "Allergies", "History", "Vitals", "Plan", "Follow-up",
+    "99213", "99214", "Refill", "Message", "Pod", "Blue", "Encounter", "Close",
+]
+
+
+class BenchController(glass.AppController):
+    """AppController without windows, event taps or real mouse events."""
+
+    def initHeadless(self):
+        # Skip AppController.init (windows, hotkey) and only set up state.
+        self = objc.super(glass.AppController, self).init()
+        if self is None:
+            return None
+        self._follow_command_bar = False
+        self._active_screen_index = 0
+        self._active_display_id = 0
+        self._display_bounds_px = None
+        self.capture_origin_pt = (0.0, 0.0)
+        width, height = SCREEN_SIZE_PT
+        self.screen_frame = AppKit.NSMakeRect(0, 0, width, height)
+        self.screen_height = height
+        self.screen_center = (width / 2.0, height / 2.0)
+        self.command_bar = glass.NullCommandBar()
+        self.overlay = glass.NullOverlay()
+        self._init_state()
+        # Keep benchmark runs out of the user's ~/.glass cache.
+        self._cache_dir = tempfile.TemporaryDirectory()
+        self.disk_cache = glass.DiskCache(self._cache_dir.name, 64 << 20)
+        self.profiles.path = os.path.join(self._cache_dir.name, "profiles.jsonl")
+        self.clicks_posted = 0
+        return self
+
+    def _click_at(self, x, y, button="left", click_count=1):
+        self.clicks_posted += click_count
+
+    def _sync_active_screen_to_command_bar(self, announce=False):
+        pass
+
+
+def measure(func, repeat, warmup=1):
+    """Time `func` and return summary statistics in milliseconds."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    samples.sort()
+    p95_index = min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))
+    return {
+        "repeat": repeat,
+        "min_ms": round(samples[0], 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p95_ms": round(samples[p95_index], 4),
+    }
+
+
+def synthetic_ocr_items(count, seed=0):
+    """Lay out `count` OCR-like text items on a grid covering the screen."""
+    rng = random.Random(seed)
+    width, height = SCREEN_SIZE_PT
+    columns = max(1, int((count * width / height) ** 0.5))
+    rows = max(1, (count + columns - 1) // columns)
+    cell_w = width / columns
+    cell_h = height / rows
+    texts = []
+    boxes = []
+    for index in range(count):
+        row, col = divmod(index, columns)
+        words = rng.randint(1, 4)
+        text = " ".join(rng.choice(VOCABULARY) for _ in range(words))
+        w = min(cell_w * 0.9, 7.0 * len(text))
+        h = min(cell_h * 0.8, 14.0)
+        texts.append(text)
+        boxes.append((col * cell_w, row * cell_h, w, h))
+    return glass.OCRResult(texts, boxes)
+
+
+def synthetic_frame(size, seed=0, copies=5):
+    """Build a BGR frame that looks roughly like an EHR screen.
+
+    Returns (frame, template, positions) where `template` is an icon-like
+    patch drawn `copies` times, at each of `positions` (in pixels).
+    """
+    width, height = size
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 3), 236, dtype=np.uint8)
+    # Panels and toolbar bands.
+    for _ in range(12):
+        x = int(rng.integers(0, width - 200))
+        y = int(rng.integers(0, height - 100))
+        w = int(rng.integers(120, max(121, width // 3)))
+        h = int(rng.integers(40, max(41, height // 4)))
+        shade = int(rng.integers(200, 255))
+        frame[y:y + h, x:x + w] = shade
+    # Text-like noise rows.
+    for _ in range(max(20, height // 12)):
+        x = int(rng.integers(0, width - 300))
+        y = int(rng.integers(0, height - 12))
+        w = int(rng.integers(40, 300))
+        frame[y:y + 10, x:x + w] = rng.integers(0, 90, size=(10, w, 1), dtype=np.uint8)
+    scale = width / SCREEN_SIZE_PT[0]
+    tw = max(8, int(48 * scale))
+    th = max(8, int(24 * scale))
+    template = rng.integers(0, 255, size=(th, tw, 3), dtype=np.uint8)
+    positions = []
+    for _ in range(copies):
+        x = int(rng.integers(0, width - tw))
+        y = int(rng.integers(0, height - th))
+        frame[y:y + th, x:x + tw] = template
+        positions.append((x, y))
+    return frame, template, positions
+
+
+def feature_frame(size, seed=0):
+    """A synthetic frame with one hard-edged icon planted for keypoint lookup.
+
+    Returns (frame, template, position). The icon is a two-tone block
+    pattern, 96x48 pt: a small noise patch like `synthetic_frame`'s gets
+    crowded out of the frame's keypoint budget by the text rows at 5k.
+    """
+    width, height = size
+    frame, _, _ = synthetic_frame(size, seed=seed, copies=0)
+    rng = np.random.default_rng(seed)
+    scale = width / SCREEN_SIZE_PT[0]
+    tw = int(96 * scale)
+    th = int(48 * scale)
+    cells = rng.integers(0, 2, size=(th // 2 + 1, tw // 2 + 1), dtype=np.uint8) * 255
+    pattern = np.repeat(np.repeat(cells, 2, axis=0), 2, axis=1)[:th, :tw]
+    template = np.repeat(pattern[:, :, None], 3, axis=2)
+    x = int(rng.integers(0, width - tw))
+    y = int(rng.integers(0, height - th))
+    frame[y:y + th, x:x + tw] = template
+    return frame, template, (x, y)
+
+
+def synthetic_macros(count, seed=0):
+    rng = random.Random(seed)
+    macros = {}
+    for index in range(count):
+        steps = []
+        for _ in range(rng.randint(4, 16)):
+            kind = rng.random()
+            if kind < 0.4:
+                word = rng.choice(VOCABULARY)
+                steps.append(
+                    f'smart-click "{word}" {rng.random():.4f} {rng.random():.4f}'
+                )
+            elif kind < 0.6:
+                steps.append(f"wait {rng.choice([0.5, 1.0, 2.5])}")
+            elif kind < 0.8:
+                steps.append(f"find {rng.choice(VOCABULARY)}")
+                steps.append("click 1")
+            else:
+                steps.append(f"click-at {rng.random():.4f} {rng.random():.4f}")
+        if index % 2:
+            macros[f"macro-{index}"] = steps
+        else:
+            macros[f"macro-{index}"] = {
+                "v": 2,
+                "resolution": [1512, 982],
+                "steps": steps,
+            }
+    return macros
+
+
+def bench_run_find(controller, quick):
+    sizes = [100, 1000, 5000] if quick else [100, 1000, 5000, 20000]
+    results = []
+    for count in sizes:
+        controller.ocr_items = synthetic_ocr_items(count)
+        for query in ("Chart", "99213", "zzz-no-match"):
+            def run():
+                controller._macro_wait_reason = None
+                controller._run_find(query)
+
+            stats = measure(run, repeat=3 if quick else 10)
+            results.append(
+                {
+                    "name": f"run_find/{count}/{query}",
+                    "params": {"items": count, "query": query, "matches": len(controller.matches)},
+                    **stats,
+                }
+            )
+    controller.matches = []
+    return results
+
+
+def bench_order_matches(controller, quick):
+    sizes = [10, 1000, 10000] if quick else [10, 100, 1000, 10000, 20000]
+    results = []
+    for count in sizes:
+        ocr = synthetic_ocr_items(count, seed=1)
+        matches = [
+            {"text": ocr.text(i), "bbox": ocr.bbox(i), "query": "bench"}
+            for i in range(len(ocr))
+        ]
+        controller.last_click_point = (400.0, 300.0)
+        stats = measure(
+            lambda: controller._order_matches_by_anchor(matches),
+            repeat=5 if quick else 20,
+        )
+        results.append({"name": f"order_matches/{count}", "params": {"matches": count}, **stats})
+    controller.last_click_point = None
+    return results
+
+
+def bench_spatial_index(controller, quick):
+    sizes = [100, 1000, 5000] if quick else [100, 1000, 5000, 20000]
+    width = controller.screen_frame.size.width
+    height = controller.screen_frame.size.height
+    rng = np.random.default_rng(2)
+    points = rng.uniform((0, 0), (width, height), size=(100, 2)).tolist()
+    results = []
+    for count in sizes:
+        ocr = synthetic_ocr_items(count, seed=2)
+        stats = measure(lambda: glass.BoxIndex(ocr.boxes), repeat=3 if quick else 10)
+        results.append({"name": f"spatial_index/build/{count}", "params": {"items": count}, **stats})
+        index = ocr.index
+
+        def containing():
+            for x, y in points:
+                index.containing(x, y, 10)
+
+        def nearest():
+            for x, y in points:
+                index.nearest(x, y, 3)
+
+        for label, func in (("containing", containing), ("nearest", nearest)):
+            stats = measure(func, repeat=3 if quick else 10)
+            results.append(
+                {
+                    "name": f"spatial_index/{label}/{count}",
+                    "params": {"items": count, "queries": len(points)},
+                    **stats,
+                }
+            )
+    return results
+
+
+def bench_ngram_index(controller, quick):
+    sizes = [100, 1000, 5000] if quick else [100, 1000, 5000, 20000]
+    results = []
+    for count in sizes:
+        ocr = synthetic_ocr_items(count, seed=3)
+        texts = ocr.blob.split(ocr.SEPARATOR)
+        stats = measure(lambda: glass.NgramIndex(texts), repeat=3 if quick else 10)
+        results.append({"name": f"ngram_index/build/{count}", "params": {"items": count}, **stats})
+        index = ocr.ngrams
+        # Keystroke-by-keystroke lookups, as search-as-you-type issues them.
+        prefixes = ["Ch", "Cha", "Char", "Charg", "Charges", "99", "992", "9921", "99213"]
+
+        def lookups():
+            for prefix in prefixes:
+                index.candidates(prefix)
+
+        stats = measure(lookups, repeat=5 if quick else 20)
+        results.append(
+            {
+                "name": f"ngram_index/candidates/{count}",
+                "params": {"items": count, "queries": len(prefixes)},
+                **stats,
+            }
+        )
+    return results
+
+
+def bench_match_template(controller, quick):
+    labels = ["1x", "2x"] if quick else ["1x", "2x", "5k"]
+    results = []
+    for label in labels:
+        frame, template, positions = synthetic_frame(FRAME_SIZES[label])
+        template_gray = glass.cv2.cvtColor(template, glass.cv2.COLOR_BGR2GRAY)
+        for mode, gray in (("bgr", None), ("fast", template_gray)):
+            info = {}
+            found = controller._match_template("bench", frame, template, template_gray=gray, info=info)
+            stats = measure(
+                lambda: controller._match_template("bench", frame, template, template_gray=gray),
+                repeat=2 if quick else 5,
+            )
+            results.append(
+                {
+                    "name": f"match_template/{mode}/{label}",
+                    "params": {
+                        "frame": list(FRAME_SIZES[label]),
+                        "template": [int(template.shape[1]), int(template.shape[0])],
+                        "planted": len(positions),
+                        "found": len(found),
+                        **info,
+                    },
+                    **stats,
+                }
+            )
+    return results
+
+
+def bench_match_fft(controller, quick):
+    """Direct vs frequency-domain TM_CCOEFF_NORMED for a panel-sized template.
+
+    Also checks that both paths find the same windows at MATCH_THRESHOLD,
+    ignoring scores within FFT_MATCH_TOLERANCE of it (cv2.matchTemplate
+    works in float32, and its error grows with the frame). A mismatch is
+    reported in the results, not raised.
+    """
+    cv2 = glass.cv2
+    labels = ["1x", "2x"] if quick else ["1x", "2x", "5k"]
+    results = []
+    for label in labels:
+        frame, _, _ = synthetic_frame(FRAME_SIZES[label], seed=5)
+        scale = frame.shape[1] / SCREEN_SIZE_PT[0]
+        th, tw = int(160 * scale), int(240 * scale)
+        y, x = frame.shape[0] // 3, frame.shape[1] // 3
+        template = frame[y:y + th, x:x + tw].copy()
+        direct = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+        spectrum = glass.FrameSpectrum(frame)
+        fft = spectrum.ccoeff_normed(frame, template)
+        max_diff = float(np.abs(direct - fft).max())
+        clear = np.abs(direct - glass.MATCH_THRESHOLD) > FFT_MATCH_TOLERANCE
+        agree = bool(
+            np.array_equal(
+                (direct >= glass.MATCH_THRESHOLD)[clear], (fft >= glass.MATCH_THRESHOLD)[clear]
+            )
+        )
+        if not agree:
+            print(f"match_fft/{label}: FFT and direct matches differ", file=sys.stderr)
+        params = {
+            "frame": list(FRAME_SIZES[label]),
+            "template": [tw, th],
+            "max_abs_diff": max_diff,
+            "agree": agree,
+        }
+        repeat = 2 if quick else 5
+        cases = [
+            ("spatial", lambda: cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)),
+            ("fft", lambda: glass.FrameSpectrum(frame).ccoeff_normed(frame, template)),
+            ("fft-cached", lambda: spectrum.ccoeff_normed(frame, template)),
+        ]
+        for mode, func in cases:
+            stats = measure(func, repeat=repeat)
+            results.append({"name": f"match_fft/{mode}/{label}", "params": params, **stats})
+    return results
+
+
+def bench_match_features(controller, quick):
+    """Keypoint lookup: frame description, then descriptor match + homography.
+
+    The template is planted once (see `feature_frame`): repeated copies
+    fail the ratio test, so this measures a lookup that finds it.
+    """
+    cv2 = glass.cv2
+    labels = ["1x", "2x"] if quick else ["1x", "2x", "5k"]
+    results = []
+    for label in labels:
+        frame, template, _ = feature_frame(FRAME_SIZES[label], seed=7)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        features = glass.TemplateFeatures.compute(cv2.cvtColor(template, cv2.COLOR_BGR2GRAY))
+        detector = glass.TemplateFeatures.detector(glass.FEATURE_FRAME_KEYPOINTS)
+
+        def describe():
+            keypoints, descriptors = detector.detectAndCompute(gray, None)
+            return np.float32([kp.pt for kp in keypoints]).reshape(-1, 2), descriptors
+
+        points, descriptors = describe()
+        found = features.locate(points, descriptors)
+        params = {
+            "frame": list(FRAME_SIZES[label]),
+            "template_keypoints": features.keypoints,
+            "frame_keypoints": len(points),
+            "inliers": 0 if found is None else found[0],
+        }
+        repeat = 2 if quick else 5
+        stats = measure(describe, repeat=repeat)
+        results.append({"name": f"match_features/describe/{label}", "params": params, **stats})
+        stats = measure(lambda: features.locate(points, descriptors), repeat=repeat)
+        results.append({"name": f"match_features/locate/{label}", "params": params, **stats})
+    return results
+
+
+def bench_macro_dispatch(controller, quick):
+    # Short macros, repeated, so per-run setup is part of what gets measured.
+    steps_per_run = 100
+    runs = 5 if quick else 20
+    controller.matches = [{"text": "x", "bbox": (10.0, 10.0, 20.0, 10.0), "query": "x"}]
+    controller.macros = {
+        "bench-inner": ["click-at 0.5 0.5", "rclick-at 0.25 0.75"],
+        "bench-outer": (
+            ["click-at 0.1 0.1", "dclick-at 0.2 0.2", "run bench-inner"]
+            * (steps_per_run // 4)
+        ),
+    }
+    controller._macro_delay = 0
+
+    def run():
+        for _ in range(runs):
+            controller._macro_stack = []
+            controller._run_macro("bench-outer")
+
+    stats = measure(run, repeat=3 if quick else 10)
+    outer = controller._get_macro_steps("bench-outer")
+    inner = controller._get_macro_steps("bench-inner")
+    # Outer steps + inner steps per `run` + the __macro_end__ markers.
+    nested_runs = outer.count("run bench-inner")
+    expanded_steps = len(outer) + nested_runs * (len(inner) + 1) + 1
+    per_run_ms = stats["median_ms"] / runs
+    return [
+        {
+            "name": "macro_dispatch",
+            "params": {
+                "runs": runs,
+                "steps_per_run": expanded_steps,
+                "steps_per_second": round(expanded_steps / (per_run_ms / 1000.0), 1)
+                if per_run_ms
+                else None,
+            },
+            **stats,
+        }
+    ]
+
+
+def bench_macro_io(controller, quick):
+    sizes = [100, 1000] if quick else [100, 1000, 5000]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        controller.macros_path = os.path.join(tmp, "macros.json")
+        for count in sizes:
+            macros = synthetic_macros(count)
+            controller.macros = glass.MacroStore(controller.macros_path)
+            compact_stats = measure(
+                lambda: controller.macros.replace_all(macros), repeat=3 if quick else 10
+            )
+            size_bytes = os.path.getsize(controller.macros_path)
+            name = next(iter(macros))
+
+            def save_one():
+                # One edit, as after `stop` or `delete`: a journal append.
+                controller.macros[name] = macros[name]
+                controller._save_macros()
+
+            save_stats = measure(save_one, repeat=3 if quick else 10)
+            load_stats = measure(controller._load_macros, repeat=3 if quick else 10)
+            params = {"macros": count, "bytes": size_bytes}
+            results.append({"name": f"compact_macros/{count}", "params": params, **compact_stats})
+            results.append({"name": f"save_macros/{count}", "params": params, **save_stats})
+            results.append({"name": f"load_macros/{count}", "params": params, **load_stats})
+    return results
+
+
+BENCHMARKS = [
+    ("run_find", bench_run_find),
+    ("order_matches", bench_order_matches),
+    ("spatial_index", bench_spatial_index),
+    ("ngram_index", bench_ngram_index),
+    ("match_template", bench_match_template),
+    ("match_fft", bench_match_fft),
+    ("match_features", bench_match_features),
+    ("macro_dispatch", bench_macro_dispatch),
+    ("macro_io", bench_macro_io),
+]
+
+
+def compare(results, baseline, threshold):
+    """Compare medians against a baseline run; returns (rows, regressed)."""
+    previous = {entry["name"]: entry for entry in baseline.get("results", [])}
+    rows = []
+    regressed = False
+    for entry in results:
+        old = previous.get(entry["name"])
+        if old is None or not old.get("median_ms"):
+            rows.append({"name": entry["name"], "status": "new"})
+            continue
+        ratio = entry["median_ms"] / old["median_ms"]
+        status = "ok"
+        if ratio > 1.0 + threshold:
+            status = "regressed"
+            regressed = True
+        elif ratio < 1.0 - threshold:
+            status = "improved"
+        rows.append(
+            {
+                "name": entry["name"],
+                "status": status,
+                "baseline_ms": old["median_ms"],
+                "median_ms": entry["median_ms"],
+                "ratio": round(ratio, 3),
+            }
+        )
+    return rows, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Glass hot paths")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, fewer repeats")
+    parser.add_argument("--filter", default="", help="only run benchmarks containing this text")
+    parser.add_argument("--out", help="write JSON results to this file")
+    parser.add_argument("--baseline", help="compare medians against a previous results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="relative median slowdown counted as a regression (default 0.15)",
+    )
+    args = parser.parse_args()
+
+    controller = BenchController.alloc().initHeadless()
+
+    results = []
+    for name, func in BENCHMARKS:
+        if args.filter and args.filter not in name:
+            continue
+        print(f"running {name}...", file=sys.stderr)
+        results.extend(func(controller, args.quick))
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        rows, regressed = compare(results, baseline, args.threshold)
+        report["comparison"] = {"threshold": args.threshold, "rows": rows}
+        for row in rows:
+            if row["status"] in ("regressed", "improved"):
+                print(
+                    f"{row['status']:>9}  {row['name']}: "
+                    f"{row['baseline_ms']:.3f} -> {row['median_ms']:.3f} ms (x{row['ratio']})",
+                    file=sys.stderr,
+                )
+        if regressed:
+            exit_code = 1
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,305 @@
+import collections
+import collections.abc
+import concurrent.futures
+import contextlib
+import csv
+import difflib
+import hashlib
+import importlib
+import itertools
 import json
+import mmap
 import os
+import re
+import shlex
+import shutil
+import socket
+import struct
+import subprocess
 import threading
 import time
 import warnings
 
+_IMPORT_START = time.perf_counter()
+
 import AppKit
 import CoreFoundation
 import Foundation
 import Quartz
-import Vision
 import objc
 import signal
-import cv2
 import numpy as np
 
 
+class LazyModule:
+    """Stand-in for a heavy module that is imported on first attribute access.
+
+    OpenCV is only needed for image templates and Vision only once OCR runs,
+    so neither should delay startup. The import time lands in `STARTUP`.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    with STARTUP.phase(f"import {self._name}"):
+                        self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+class StartupReport:
+    """Timeline of startup phases and deferred warm-up, shown by `startup`."""
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.phases = []
+        self._lock = threading.Lock()
+
+    def record(self, name, start, end):
+        with self._lock:
+            self.phases.append((name, start, end, threading.current_thread().name))
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def lines(self):
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1])
+        rows = []
+        for name, start, end, thread in phases:
+            where = "" if thread == "MainThread" else "  (background)"
+            rows.append(
+                f"{name:<22} at {(start - self.origin) * 1000:7.1f}ms  "
+                f"took {(end - start) * 1000:7.1f}ms{where}"
+            )
+        return rows
+
+
+STARTUP = StartupReport(_IMPORT_START)
+STARTUP.record("import core modules", _IMPORT_START, time.perf_counter())
+cv2 = LazyModule("cv2")
+Vision = LazyModule("Vision")
+
+
+GLASS_DIR = os.path.expanduser("~/.glass")
+# Upper bound for full-resolution frames held at once (captures awaiting OCR,
+# template-matching buffers). Override with GLASS_CAPTURE_MEM_MB.
+CAPTURE_MEM_MB = int(os.environ.get("GLASS_CAPTURE_MEM_MB", "384"))
+# Size cap for the on-disk cache under ~/.glass/cache. Override with GLASS_CACHE_MB.
+CACHE_MB = int(os.environ.get("GLASS_CACHE_MB", "512"))
+# Search-as-you-type: snapshot age (s) that triggers a background refresh, and
+# the per-update time slice (s) so typing stays responsive.
+LIVE_SNAPSHOT_TTL = 3.0
+LIVE_FRAME_BUDGET = 0.008
+# First words that make the input a command rather than a search.
+COMMAND_NAMES = frozenset(
+    {
+        "capture", "find", "click", "rclick", "rightclick", "clear", "record", "stop",
+        "run", "run-batch", "macros", "show", "delete", "capture-image", "find-image",
+        "images", "delete-image", "screens", "screen", "perf", "stats", "startup", "help",
+        "watch", "watch-image", "unwatch", "target", "simulate", "session", "profile",
+        "optimize",
+    }
+)
+# Watch mode: poll interval bounds (s) and the per-cell thumbnail difference
+# (0-255 gray) that counts as a screen change.
+WATCH_MIN_INTERVAL = 0.5
+WATCH_MAX_INTERVAL = 4.0
+WATCH_CHANGE_THRESHOLD = 6
+# Template matching threshold (TM_CCOEFF_NORMED).
+MATCH_THRESHOLD = 0.8
+# `find-image --fast`: skip flat windows only when at least this fraction of
+# the frame is flat; otherwise one full cv2.matchTemplate is cheaper.
+FAST_MATCH_MIN_PRUNED = 0.9
+# Cost of one butterfly in `FrameSpectrum.ccoeff_normed` relative to one in
+# cv2.matchTemplate's own block-wise DFTs (it also does the per-window sums),
+# measured against cv2.matchTemplate on 3-channel frames from 600x400 to
+# 2560x1600. With it, a cached spectrum is used for templates over about
+# 40x40 px on a 2560x1600 frame; below that OpenCV is as fast or faster.
+MATCH_FFT_COST = 1.6
+# `find-image --features`: ORB keypoints kept per template and per frame, Lowe
+# ratio for descriptor matches, RANSAC reprojection tolerance (px) and the
+# homography inliers needed to accept a location.
+FEATURE_TEMPLATE_KEYPOINTS = 500
+FEATURE_FRAME_KEYPOINTS = 5000
+FEATURE_RATIO = 0.75
+FEATURE_RANSAC_PX = 4.0
+FEATURE_MIN_INLIERS = 8
+# `simulate`: per-stage costs (s) for the virtual clock until this process has
+# measured its own (p50 of the latency histograms).
+SIMULATE_DEFAULT_COSTS = {"capture": 0.08, "ocr": 0.4, "find": 0.002, "match": 0.2}
+# `profile`: runs kept per macro, and the share of a run's time that marks a
+# step as dominant.
+PROFILE_KEEP_RUNS = 200
+PROFILE_DOMINANT_SHARE = 0.2
+# smart-click fast path: points of context kept around a learned target, the
+# per-pixel gray difference that counts as a change, the share of changed
+# pixels still accepted as the same target, and how many targets stay in memory.
+SMART_CLICK_PATCH_MARGIN = 6
+SMART_CLICK_PATCH_TOLERANCE = 24
+SMART_CLICK_PATCH_MAX_CHANGED = 0.02
+SMART_CLICK_TARGETS_MAX = 512
+# Neighborhood (points) captured around each click while recording.
+RECORD_ROI_SIZE = (480.0, 160.0)
+
+
 def run_on_main(func):
     AppKit.NSOperationQueue.mainQueue().addOperationWithBlock_(func)
 
 
+def make_private_dir(path):
+    """`os.makedirs` for directories holding screen content: owner-only (0o700)."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    os.chmod(path, 0o700)
+
+
+def open_private(path, mode="wb", **kwargs):
+    """`open` for writing files that hold screen content, as owner-only (0o600)."""
+    flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if "a" in mode else os.O_TRUNC)
+    fd = os.open(path, flags, 0o600)
+    # Also tightens a file created before this was in place.
+    os.fchmod(fd, 0o600)
+    return open(fd, mode, **kwargs)
+
+
+class Span:
+    """One timed stage. Times are `time.perf_counter()` seconds (monotonic)."""
+
+    __slots__ = ("span_id", "parent_id", "name", "start", "end", "thread", "args")
+
+    def __init__(self, span_id, parent_id, name, start, args):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.start = start
+        self.end = None
+        self.thread = threading.get_ident()
+        self.args = args
+
+    @property
+    def duration(self):
+        if self.end is None:
+            return None
+        return self.end - self.start
+
+
+class Tracer:
+    """Span tracer with a fixed-size ring buffer of finished spans.
+
+    Spans link to their parent by id, so a macro run is a tree of
+    macro -> step -> (capture, ocr, find, match, click, delay, wait, queue-wait).
+    Parents are passed explicitly because work hops between the main queue
+    and capture threads.
+    """
+
+    def __init__(self, capacity=8192):
+        self._spans = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        # Called with each finished span (e.g. Metrics.observe_span).
+        self.listeners = []
+
+    def start(self, name, parent=None, **args):
+        parent_id = parent.span_id if parent is not None else None
+        return Span(next(self._ids), parent_id, name, time.perf_counter(), args)
+
+    def end(self, span, **args):
+        if span is None or span.end is not None:
+            return
+        span.end = time.perf_counter()
+        if args:
+            span.args.update(args)
+        with self._lock:
+            self._spans.append(span)
+        for listener in self.listeners:
+            listener(span)
+
+    def record(self, name, start, end, parent=None, **args):
+        """Add an already-measured span (e.g. time spent queued on the main thread)."""
+        span = self.start(name, parent, **args)
+        span.start = start
+        span.end = end
+        with self._lock:
+            self._spans.append(span)
+        for listener in self.listeners:
+            listener(span)
+        return span
+
+    @contextlib.contextmanager
+    def span(self, name, parent=None, **args):
+        span = self.start(name, parent, **args)
+        try:
+            yield span
+        finally:
+            self.end(span)
+
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def last_root(self):
+        """Most recent finished root span (a macro run or a command)."""
+        for span in reversed(self.spans()):
+            if span.parent_id is None:
+                return span
+        return None
+
+    def children(self, span, spans=None):
+        if spans is None:
+            spans = self.spans()
+        return [s for s in spans if s.parent_id == span.span_id]
+
+    def export_chrome(self, path):
+        """Write the ring buffer as Chrome trace JSON (chrome://tracing, Perfetto)."""
+        spans = self.spans()
+        if not spans:
+            return 0
+        origin = min(s.start for s in spans)
+        threads = {}
+        events = []
+        for s in spans:
+            tid = threads.setdefault(s.thread, len(threads) + 1)
+            args = dict(s.args)
+            args["span_id"] = s.span_id
+            if s.parent_id is not None:
+                args["parent_id"] = s.parent_id
+            events.append(
+                {
+                    "name": s.name,
+                    "cat": "glass",
+                    "ph": "X",
+                    "ts": round((s.start - origin) * 1e6, 1),
+                    "dur": round((s.end - s.start) * 1e6, 1),
+                    "pid": os.getpid(),
+                    "tid": tid,
+                    "args": {k: v if isinstance(v, (int, float, str, bool)) else str(v) for k, v in args.items()},
+                }
+            )
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, handle)
+        return len(events)
+
+
 objc_super = objc.super
 warnings.filterwarnings("ignore", category=objc.ObjCSuperWarning)
 
@@ -90,6 +371,10 @@ class CommandInputTextView(AppKit.NSTextView):
             container.setContainerSize_(AppKit.NSMakeSize(frame.size.width, frame.size.height))
             container.setWidthTracksTextView_(True)
 
+    def didChangeText(self):
+        objc_super(CommandInputTextView, self).didChangeText()
+        self.controller._on_input_changed(str(self.string()))
+
     def keyDown_(self, event):
         key_code = event.keyCode()
         if key_code in (36, 76):  # Enter/Return
@@ -352,6 +637,7 @@ class CommandBarWindow(AppKit.NSObject):
 
     def set_status(self, text):
         self.status_field.setStringValue_(text)
+        self.controller._emit_event("status", text=text)
         visible = bool(text) or self.help_visible
         if visible != self.status_visible:
             self.status_visible = visible
@@ -388,61 +674,126 @@ class CommandBarWindow(AppKit.NSObject):
 
 
 class OverlayView(AppKit.NSView):
+    """Match highlights drawn with one reusable pair of layers per match slot.
+
+    Colors, the label font and rendered label images are created once and
+    shared. `setDrawItems_` diffs the new items against the slots by index:
+    unchanged slots are left alone, changed ones get new geometry, and spare
+    slots are hidden (not destroyed) for the next update.
+    """
+
+    LABEL_PAD_X = 6
+    LABEL_PAD_Y = 2
+
     def initWithFrame_(self, frame):
         self = objc_super(OverlayView, self).initWithFrame_(frame)
         if self is None:
             return None
         self.draw_items = []
         self.setWantsLayer_(True)
+        self._slots = []
+        self._label_images = {}
+        self._label_scale = None
+        self._fill_color = Quartz.CGColorCreateGenericRGB(1.0, 0.8, 0.0, 0.25)
+        self._stroke_color = Quartz.CGColorCreateGenericRGB(1.0, 0.8, 0.0, 0.9)
+        self._label_fill = AppKit.NSColor.colorWithCalibratedWhite_alpha_(0.0, 0.6)
+        self._label_attrs = {
+            AppKit.NSFontAttributeName: AppKit.NSFont.boldSystemFontOfSize_(14),
+            AppKit.NSForegroundColorAttributeName: AppKit.NSColor.whiteColor(),
+        }
         return self
 
+    def _backing_scale(self):
+        window = self.window()
+        return window.backingScaleFactor() if window is not None else 2.0
+
+    def _label_image(self, label, scale):
+        """Rendered label badge as (CGImage, width_pt, height_pt), cached per text."""
+        if scale != self._label_scale:
+            self._label_images.clear()
+            self._label_scale = scale
+        cached = self._label_images.get(label)
+        if cached is not None:
+            return cached
+        ns_label = AppKit.NSString.stringWithString_(label)
+        size = ns_label.sizeWithAttributes_(self._label_attrs)
+        width = size.width + self.LABEL_PAD_X * 2
+        height = size.height + self.LABEL_PAD_Y * 2
+        context = Quartz.CGBitmapContextCreate(
+            None,
+            int(np.ceil(width * scale)),
+            int(np.ceil(height * scale)),
+            8,
+            0,
+            Quartz.CGColorSpaceCreateDeviceRGB(),
+            Quartz.kCGImageAlphaPremultipliedLast,
+        )
+        Quartz.CGContextScaleCTM(context, scale, scale)
+        AppKit.NSGraphicsContext.saveGraphicsState()
+        AppKit.NSGraphicsContext.setCurrentContext_(
+            AppKit.NSGraphicsContext.graphicsContextWithCGContext_flipped_(context, False)
+        )
+        self._label_fill.setFill()
+        AppKit.NSBezierPath.bezierPathWithRoundedRect_xRadius_yRadius_(
+            AppKit.NSMakeRect(0, 0, width, height), 4, 4
+        ).fill()
+        ns_label.drawAtPoint_withAttributes_(
+            AppKit.NSMakePoint(self.LABEL_PAD_X, self.LABEL_PAD_Y), self._label_attrs
+        )
+        AppKit.NSGraphicsContext.restoreGraphicsState()
+        cached = (Quartz.CGBitmapContextCreateImage(context), width, height)
+        self._label_images[label] = cached
+        return cached
+
+    def _new_slot(self):
+        box = Quartz.CALayer.layer()
+        box.setBackgroundColor_(self._fill_color)
+        box.setBorderColor_(self._stroke_color)
+        box.setBorderWidth_(2.0)
+        box.setCornerRadius_(6.0)
+        badge = Quartz.CALayer.layer()
+        self.layer().addSublayer_(box)
+        self.layer().addSublayer_(badge)
+        return {"box": box, "badge": badge, "key": None}
+
     def setDrawItems_(self, items):
         self.draw_items = items
-        self.setNeedsDisplay_(True)
-
-    def drawRect_(self, rect):
-        for item in self.draw_items:
-            highlight_rect = item["rect"]
-            fill_color = AppKit.NSColor.colorWithCalibratedRed_green_blue_alpha_(
-                1.0, 0.8, 0.0, 0.25
-            )
-            stroke_color = AppKit.NSColor.colorWithCalibratedRed_green_blue_alpha_(
-                1.0, 0.8, 0.0, 0.9
-            )
-            path = AppKit.NSBezierPath.bezierPathWithRoundedRect_xRadius_yRadius_(
-                highlight_rect, 6, 6
-            )
-            fill_color.setFill()
-            path.fill()
-            stroke_color.setStroke()
-            path.setLineWidth_(2.0)
-            path.stroke()
-
-            label = item["label"]
-            font = AppKit.NSFont.boldSystemFontOfSize_(14)
-            attrs = {
-                AppKit.NSFontAttributeName: font,
-                AppKit.NSForegroundColorAttributeName: AppKit.NSColor.whiteColor(),
-            }
-            ns_label = AppKit.NSString.stringWithString_(label)
-            label_size = ns_label.sizeWithAttributes_(attrs)
-            pad_x = 6
-            pad_y = 2
-            label_rect = AppKit.NSMakeRect(
-                highlight_rect.origin.x + 4,
-                highlight_rect.origin.y + highlight_rect.size.height - label_size.height - 6,
-                label_size.width + (pad_x * 2),
-                label_size.height + (pad_y * 2),
+        scale = self._backing_scale()
+        Quartz.CATransaction.begin()
+        # Highlights should snap into place, not animate.
+        Quartz.CATransaction.setDisableActions_(True)
+        for index, item in enumerate(items):
+            if index == len(self._slots):
+                self._slots.append(self._new_slot())
+            slot = self._slots[index]
+            rect = item["rect"]
+            key = (
+                rect.origin.x, rect.origin.y, rect.size.width, rect.size.height,
+                item["label"], scale,
             )
-            AppKit.NSColor.colorWithCalibratedWhite_alpha_(0.0, 0.6).setFill()
-            AppKit.NSBezierPath.bezierPathWithRoundedRect_xRadius_yRadius_(
-                label_rect, 4, 4
-            ).fill()
-            text_point = AppKit.NSMakePoint(
-                label_rect.origin.x + pad_x,
-                label_rect.origin.y + pad_y,
+            if slot["key"] == key:
+                continue
+            slot["key"] = key
+            image, width, height = self._label_image(item["label"], scale)
+            slot["box"].setFrame_(rect)
+            slot["badge"].setContents_(image)
+            slot["badge"].setContentsScale_(scale)
+            slot["badge"].setFrame_(
+                AppKit.NSMakeRect(
+                    rect.origin.x + 4,
+                    rect.origin.y + rect.size.height - height + self.LABEL_PAD_Y * 2 - 6,
+                    width,
+                    height,
+                )
             )
-            ns_label.drawAtPoint_withAttributes_(text_point, attrs)
+            slot["box"].setHidden_(False)
+            slot["badge"].setHidden_(False)
+        for slot in self._slots[len(items):]:
+            if slot["key"] is not None:
+                slot["key"] = None
+                slot["box"].setHidden_(True)
+                slot["badge"].setHidden_(True)
+        Quartz.CATransaction.commit()
 
 
 class OverlayWindow(AppKit.NSObject):
@@ -480,6 +831,12 @@ class OverlayWindow(AppKit.NSObject):
         window.setContentView_(view)
         return window
 
+    def set_screen_frame(self, screen_frame):
+        """Move the existing overlay to another screen instead of rebuilding it."""
+        self.screen_frame = screen_frame
+        self.clear()
+        self.window.setFrame_display_(screen_frame, False)
+
     def show_matches(self, matches, screen_height):
         items = []
         for index, match in enumerate(matches, start=1):
@@ -607,6 +964,806 @@ class RegionSelectWindow:
         self.window.makeFirstResponder_(self.view)
 
 
+class NullCommandBar:
+    """Stand-in for CommandBarWindow that swallows status updates (dry runs, bench)."""
+
+    visible = False
+    window = None
+
+    def set_status(self, text):
+        pass
+
+    def show_help(self, text):
+        pass
+
+    def hide_help(self):
+        pass
+
+    def clear_input(self):
+        pass
+
+    def input_text(self):
+        return ""
+
+    def show(self):
+        pass
+
+    def hide(self):
+        pass
+
+
+class NullOverlay:
+    """Stand-in for OverlayWindow that ignores drawing."""
+
+    def show_matches(self, matches, screen_height):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MacroSimulation:
+    """State of a `simulate` dry run: the screen it replays against, a virtual
+    clock, and what each step did.
+
+    Steps are marked "unresolved" (aborted, or a click step that had nothing
+    to click), "ambiguous" (clicked one of several matches) or "fallback"
+    (smart-click fell back to its recorded coordinates).
+    """
+
+    CLICK_STEPS = frozenset(
+        {
+            "click", "rclick", "rightclick", "smart-click", "smart-rclick", "smart-dclick",
+            "click-at", "rclick-at", "dclick-at",
+        }
+    )
+    MATCH_STEPS = frozenset({"click", "rclick", "rightclick", "smart-click", "smart-rclick", "smart-dclick"})
+
+    def __init__(self, sources, frame, costs):
+        # [(screen_index, OCRResult, (dx, dy))] as `_find_sources` returns them.
+        self.sources = sources
+        # (bgr, (dx, dy), scale) for find-image steps, or None to capture one.
+        self.frame = frame
+        self.costs = costs
+        self.clock = 0.0
+        self.steps = []
+        self._current = None
+
+    def begin_step(self, index, step):
+        self._close_step()
+        self._current = {
+            "index": index,
+            "step": step,
+            "start": self.clock,
+            "clicks": 0,
+            "status": "ok",
+            "detail": "",
+        }
+        self.steps.append(self._current)
+
+    def advance(self, seconds):
+        self.clock += max(0.0, seconds)
+
+    def click(self, candidates):
+        step = self._current
+        if step is None:
+            return
+        step["clicks"] += 1
+        if step["step"].split(" ", 1)[0].lower() in self.MATCH_STEPS:
+            if candidates > 1:
+                self.flag("ambiguous", f"{candidates} matches")
+            elif candidates == 0:
+                self.flag("fallback", "not found, clicked recorded coordinates")
+
+    def flag(self, status, detail):
+        if self._current is None:
+            self.begin_step(0, "(start)")
+        step = self._current
+        # Keep the first finding, except that "unresolved" outranks the rest.
+        if step["status"] == "ok" or (status == "unresolved" and step["status"] != "unresolved"):
+            step["status"] = status
+            step["detail"] = detail
+
+    def _close_step(self):
+        step = self._current
+        if step is None:
+            return
+        step["seconds"] = self.clock - step["start"]
+        command = step["step"].split(" ", 1)[0].lower()
+        if command in self.CLICK_STEPS and not step["clicks"] and step["status"] == "ok":
+            step["status"] = "unresolved"
+            step["detail"] = "nothing to click"
+        self._current = None
+
+    def finish(self):
+        self._close_step()
+
+    def report(self):
+        steps = [
+            {key: step[key] for key in ("index", "step", "status", "detail")}
+            | {"seconds": round(step.get("seconds", 0.0), 3)}
+            for step in self.steps
+        ]
+        return {
+            "steps": steps,
+            "predicted_seconds": round(self.clock, 3),
+            "unresolved": sum(1 for step in steps if step["status"] == "unresolved"),
+            "ambiguous": sum(1 for step in steps if step["status"] == "ambiguous"),
+            "fallback": sum(1 for step in steps if step["status"] == "fallback"),
+            "costs": self.costs,
+        }
+
+
+class MacroOptimizer:
+    """Rewrites macro steps into an equivalent form that spends less time idle.
+
+    Rules, in order:
+    - a `capture` or `find` whose result the next step (waits aside) replaces
+      with its own capture is dropped;
+    - `find X` + `click 1` (or `rclick 1`) becomes `smart-click "X" --optional`
+      (or `smart-rclick`), which clicks the same closest-first match, skips
+      the click when there is none, and finishes without the inter-step delay;
+    - a `wait` right after a step that is followed by the inter-step delay
+      is shortened by that delay, and adjacent waits are merged.
+
+    A `run` whose target starts by repeating the steps just before it is
+    only reported as a note: clicking something twice is not always a no-op.
+    """
+
+    RECAPTURE_STEPS = frozenset({"capture", "find", "smart-click", "smart-rclick", "smart-dclick"})
+    DELAYED_STEPS = frozenset({"click", "rclick", "rightclick", "run"})
+    CLICK_MERGES = {"click": "smart-click", "rclick": "smart-rclick", "rightclick": "smart-rclick"}
+    # `_execute_wait` clamps to this.
+    MAX_WAIT = 30.0
+
+    def __init__(self, delay, costs):
+        # Seconds `_run_next_macro_step` pauses after a step that does not finish
+        # on its own, and per-stage costs as used by `simulate`.
+        self.delay = delay or 0.0
+        self.costs = costs
+
+    @staticmethod
+    def _split(step):
+        command, _, arg = step.strip().partition(" ")
+        return command.lower(), arg.strip()
+
+    @classmethod
+    def _wait_seconds(cls, step):
+        command, arg = cls._split(step)
+        if command != "wait":
+            return None
+        try:
+            return max(0.0, min(cls.MAX_WAIT, float(arg)))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _format_wait(seconds):
+        return "wait " + f"{seconds:.2f}".rstrip("0").rstrip(".")
+
+    def optimize(self, steps, resolve=None):
+        """Return (new_steps, changes, notes).
+
+        `changes` are (description, estimated seconds saved). `resolve` maps a
+        `run` target to its steps, for the repeated-prefix notes.
+        """
+        changes = []
+        kept = []
+        for i, step in enumerate(steps):
+            command, _ = self._split(step)
+            if command in ("capture", "find"):
+                following = next(
+                    (self._split(s)[0] for s in steps[i + 1:] if self._split(s)[0] != "wait"), None
+                )
+                if following in self.RECAPTURE_STEPS:
+                    saved = self.costs["capture"] + self.costs["ocr"]
+                    if command == "find":
+                        saved += self.costs["find"]
+                    changes.append((f"drop `{step}`: the next `{following}` captures again", saved))
+                    continue
+            kept.append(step)
+
+        merged = []
+        i = 0
+        while i < len(kept):
+            smart = self._merge_find_click(kept[i], kept[i + 1]) if i + 1 < len(kept) else None
+            if smart is not None:
+                changes.append((f"`{kept[i]}` + `{kept[i + 1]}` -> `{smart}`", self.delay))
+                merged.append(smart)
+                i += 2
+                continue
+            merged.append(kept[i])
+            i += 1
+
+        result = []
+        for step in merged:
+            seconds = self._wait_seconds(step)
+            if seconds is None:
+                result.append(step)
+                continue
+            if seconds <= 0:
+                # `wait 0` does not wait, so the step delay follows it instead.
+                changes.append((f"drop `{step}`", self.delay))
+                continue
+            previous = result[-1] if result else None
+            previous_wait = self._wait_seconds(previous) if previous is not None else None
+            if previous_wait is not None and previous_wait + seconds <= self.MAX_WAIT:
+                result[-1] = self._format_wait(previous_wait + seconds)
+                changes.append((f"merge `{previous}` + `{step}`", 0.0))
+                continue
+            if previous is not None and self._split(previous)[0] in self.DELAYED_STEPS:
+                trimmed = max(0.0, seconds - self.delay)
+            else:
+                trimmed = seconds
+            if trimmed <= 0:
+                changes.append((f"drop `{step}`: the {self.delay:g}s step delay precedes it", seconds))
+                continue
+            if trimmed < seconds:
+                changes.append(
+                    (f"`{step}` -> `{self._format_wait(trimmed)}`: the {self.delay:g}s step delay precedes it", seconds - trimmed)
+                )
+                step = self._format_wait(trimmed)
+            result.append(step)
+        return result, changes, self._repeated_prefix_notes(steps, resolve)
+
+    def _merge_find_click(self, find_step, click_step):
+        command, query = self._split(find_step)
+        click, index = self._split(click_step)
+        if command != "find" or click not in self.CLICK_MERGES or index != "1":
+            return None
+        all_screens = "--all-screens" in query
+        query = " ".join(query.replace("--all-screens", " ").split())
+        # The smart-click parser cannot round-trip quotes or backslashes, and a
+        # {placeholder} value could bring them in at runtime.
+        if not query or '"' in query or "\\" in query or re.search(r"\{\w+\}", query):
+            return None
+        return f'{self.CLICK_MERGES[click]} "{query}"' + (" --all-screens" if all_screens else "") + " --optional"
+
+    def _repeated_prefix_notes(self, steps, resolve):
+        notes = []
+        if resolve is None:
+            return notes
+        for i, step in enumerate(steps):
+            command, target = self._split(step)
+            if command != "run" or not target or "{" in target:
+                continue
+            callee = list(resolve(target) or [])
+            for k in range(min(i, len(callee)), 0, -1):
+                block = steps[i - k:i]
+                if block == callee[:k] and any(
+                    self._split(s)[0] in self.CLICK_MERGES or self._split(s)[0].startswith("smart-") for s in block
+                ):
+                    notes.append(
+                        f"`{step}` starts by repeating the {k} step(s) before it "
+                        f"({'; '.join(block)}); remove them from one of the two if the repeat is not needed"
+                    )
+                    break
+        return notes
+
+
+class OCRResult:
+    """Columnar OCR snapshot.
+
+    All item texts live in one blob (separated by NUL) addressed by start/end
+    offsets, and geometry is an (n, 4) float array of (x, y, w, h) in points
+    with a top-left origin.
+
+    Multi-word items also carry per-word boxes (grouped by owning item), which
+    are extracted once when OCR completes. Sub-string boxes are then computed
+    in pure Python by `range_bbox`, so no Vision objects are kept alive.
+    """
+
+    SEPARATOR = "\x00"
+
+    def __init__(self, texts, boxes, word_owners=(), word_spans=(), word_boxes=()):
+        texts = list(texts)
+        self.count = len(texts)
+        self.blob = self.SEPARATOR.join(texts)
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=self.count)
+        self.starts = np.zeros(self.count, dtype=np.int64)
+        if self.count > 1:
+            np.cumsum(lengths[:-1] + 1, out=self.starts[1:])
+        self.ends = self.starts + lengths
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self.word_owners = np.asarray(word_owners, dtype=np.int64).reshape(-1)
+        self.word_spans = np.asarray(word_spans, dtype=np.int64).reshape(-1, 2)
+        self.word_boxes = np.asarray(word_boxes, dtype=np.float64).reshape(-1, 4)
+        # word_first[i]:word_first[i + 1] are the words of item i.
+        self.word_first = np.searchsorted(self.word_owners, np.arange(self.count + 1))
+        self._index = None
+        self._ngrams = None
+
+    @classmethod
+    def empty(cls):
+        return cls([], np.empty((0, 4)))
+
+    def to_arrays(self):
+        """Columns for `DiskCache.put`; inverse of `from_arrays`."""
+        return {
+            "blob": np.frombuffer(self.blob.encode("utf-8"), dtype=np.uint8),
+            "boxes": self.boxes,
+            "word_owners": self.word_owners,
+            "word_spans": self.word_spans,
+            "word_boxes": self.word_boxes,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        blob = arrays["blob"].tobytes().decode("utf-8")
+        texts = blob.split(cls.SEPARATOR) if len(arrays["boxes"]) else []
+        return cls(
+            texts,
+            arrays["boxes"],
+            arrays["word_owners"],
+            arrays["word_spans"],
+            arrays["word_boxes"],
+        )
+
+    @staticmethod
+    def vision_to_points(normalized, width_px, height_px, scale):
+        """Vision normalized lower-left-origin rects -> top-left point boxes, vectorized."""
+        n = np.asarray(normalized, dtype=np.float64).reshape(-1, 4)
+        scale = float(scale or 1.0)
+        boxes = np.empty_like(n)
+        h_px = n[:, 3] * height_px
+        boxes[:, 0] = n[:, 0] * width_px / scale
+        boxes[:, 1] = (height_px - (n[:, 1] * height_px + h_px)) / scale
+        boxes[:, 2] = n[:, 2] * width_px / scale
+        boxes[:, 3] = h_px / scale
+        return boxes
+
+    @classmethod
+    def from_vision(
+        cls, texts, normalized, width_px, height_px, scale,
+        word_owners=(), word_spans=(), word_normalized=(),
+    ):
+        """Build from Vision's normalized item and word rects."""
+        return cls(
+            texts,
+            cls.vision_to_points(normalized, width_px, height_px, scale),
+            word_owners,
+            word_spans,
+            cls.vision_to_points(word_normalized, width_px, height_px, scale),
+        )
+
+    def __len__(self):
+        return self.count
+
+    def text(self, index):
+        return self.blob[self.starts[index]:self.ends[index]]
+
+    def bbox(self, index):
+        x, y, w, h = self.boxes[index]
+        return (float(x), float(y), float(w), float(h))
+
+    def range_bbox(self, index, start, end):
+        """Box of text[start:end] within item `index`.
+
+        Uses the eagerly extracted word boxes and interpolates by character
+        position inside partially covered words. Items without word geometry
+        (single words) interpolate inside the item box.
+        """
+        lo = self.word_first[index]
+        hi = self.word_first[index + 1]
+        if lo == hi:
+            spans = [(0, int(self.ends[index] - self.starts[index]))]
+            boxes = [self.bbox(index)]
+        else:
+            spans = self.word_spans[lo:hi].tolist()
+            boxes = self.word_boxes[lo:hi].tolist()
+        left = top = float("inf")
+        right = bottom = float("-inf")
+        for (word_start, word_end), (bx, by, bw, bh) in zip(spans, boxes):
+            if word_end <= start or word_start >= end:
+                continue
+            length = max(word_end - word_start, 1)
+            left = min(left, bx + bw * (max(start, word_start) - word_start) / length)
+            right = max(right, bx + bw * (min(end, word_end) - word_start) / length)
+            top = min(top, by)
+            bottom = max(bottom, by + bh)
+        if left == float("inf"):
+            return self.bbox(index)
+        return (left, top, right - left, bottom - top)
+
+    def centers(self):
+        return self.boxes[:, :2] + self.boxes[:, 2:] / 2.0
+
+    @property
+    def index(self):
+        """Spatial index over the item boxes, built on first use."""
+        if self._index is None:
+            self._index = BoxIndex(self.boxes)
+        return self._index
+
+    @property
+    def ngrams(self):
+        """N-gram index over the item texts, built on first use."""
+        if self._ngrams is None:
+            self._ngrams = NgramIndex(self.blob.split(self.SEPARATOR) if self.count else [])
+        return self._ngrams
+
+    def hit_test(self, x, y, tolerance=0.0):
+        """Indices of items whose box (grown by `tolerance`) contains (x, y), smallest first."""
+        return self.index.containing(x, y, tolerance)
+
+    def find(self, query):
+        """Case-insensitive, non-overlapping occurrences of `query`.
+
+        Returns (item_index, start, end) with offsets relative to the item text.
+        The whole blob is scanned at once; the separator keeps matches from
+        spanning items.
+        """
+        if not query or self.SEPARATOR in query or not self.count:
+            return []
+        pattern = re.compile(re.escape(query), re.IGNORECASE)
+        spans = [m.span() for m in pattern.finditer(self.blob)]
+        if not spans:
+            return []
+        positions = np.fromiter((s for s, _ in spans), dtype=np.int64, count=len(spans))
+        owners = np.searchsorted(self.starts, positions, side="right") - 1
+        results = []
+        for owner, (start, end) in zip(owners.tolist(), spans):
+            base = int(self.starts[owner])
+            results.append((owner, start - base, end - base))
+        return results
+
+
+class NgramIndex:
+    """Inverted index from lowercased 1-3 character grams to item indices.
+
+    Queries of up to three characters are a single posting-list lookup.
+    Longer queries intersect the lists of their trigrams, smallest first.
+    The result is a superset of the matching items, so callers still verify.
+    """
+
+    MAX_N = 3
+
+    def __init__(self, texts):
+        postings = collections.defaultdict(list)
+        for item, text in enumerate(texts):
+            text = text.lower()
+            grams = set()
+            for n in range(1, self.MAX_N + 1):
+                grams.update(text[i:i + n] for i in range(len(text) - n + 1))
+            for gram in grams:
+                postings[gram].append(item)
+        self.postings = postings
+
+    def candidates(self, query):
+        query = query.lower()
+        if len(query) <= self.MAX_N:
+            return list(self.postings.get(query, ()))
+        grams = {query[i:i + self.MAX_N] for i in range(len(query) - self.MAX_N + 1)}
+        lists = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+        result = set(lists[0])
+        for other in lists[1:]:
+            if not result:
+                break
+            result.intersection_update(other)
+        return sorted(result)
+
+
+class BoxIndex:
+    """Uniform-grid spatial index over (x, y, w, h) boxes in points.
+
+    Each box is registered in every cell it overlaps (for containment and
+    region queries) and in the cell holding its center (for nearest-center
+    queries). Query results are box indices.
+    """
+
+    MIN_CELL = 32.0
+
+    def __init__(self, boxes, cell=None):
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        count = len(self.boxes)
+        if cell is None:
+            # Roughly a few boxes per cell for typical UI text lines.
+            areas = self.boxes[:, 2] * self.boxes[:, 3]
+            cell = 2.0 * float(np.sqrt(np.median(areas))) if count else self.MIN_CELL
+        self.cell = max(float(cell), self.MIN_CELL)
+        self._cover = collections.defaultdict(list)
+        self._centers = collections.defaultdict(list)
+        if not count:
+            self._extent = (0, 0, 0, 0)
+            return
+        b = self.boxes
+        x0 = np.floor(b[:, 0] / self.cell).astype(np.int64)
+        y0 = np.floor(b[:, 1] / self.cell).astype(np.int64)
+        x1 = np.floor((b[:, 0] + b[:, 2]) / self.cell).astype(np.int64)
+        y1 = np.floor((b[:, 1] + b[:, 3]) / self.cell).astype(np.int64)
+        centers = b[:, :2] + b[:, 2:] / 2.0
+        cx = np.floor(centers[:, 0] / self.cell).astype(np.int64)
+        cy = np.floor(centers[:, 1] / self.cell).astype(np.int64)
+        for i, (ax, ay, bx, by, ccx, ccy) in enumerate(
+            zip(x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist(), cx.tolist(), cy.tolist())
+        ):
+            for gx in range(ax, bx + 1):
+                for gy in range(ay, by + 1):
+                    self._cover[(gx, gy)].append(i)
+            self._centers[(ccx, ccy)].append(i)
+        self._extent = (int(cx.min()), int(cy.min()), int(cx.max()), int(cy.max()))
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def _cell_of(self, value):
+        return int(np.floor(value / self.cell))
+
+    def _covering(self, left, top, right, bottom):
+        found = set()
+        for gx in range(self._cell_of(left), self._cell_of(right) + 1):
+            for gy in range(self._cell_of(top), self._cell_of(bottom) + 1):
+                found.update(self._cover.get((gx, gy), ()))
+        return np.fromiter(sorted(found), dtype=np.int64, count=len(found))
+
+    def containing(self, x, y, tolerance=0.0):
+        """Boxes (grown by `tolerance`) containing (x, y), smallest area first."""
+        candidates = self._covering(x - tolerance, y - tolerance, x + tolerance, y + tolerance)
+        if not len(candidates):
+            return candidates
+        b = self.boxes[candidates]
+        inside = (
+            (b[:, 0] - tolerance <= x)
+            & (x <= b[:, 0] + b[:, 2] + tolerance)
+            & (b[:, 1] - tolerance <= y)
+            & (y <= b[:, 1] + b[:, 3] + tolerance)
+        )
+        hits = candidates[inside]
+        areas = self.boxes[hits, 2] * self.boxes[hits, 3]
+        return hits[np.argsort(areas, kind="stable")]
+
+    def region(self, x, y, w, h):
+        """Boxes intersecting the rectangle (x, y, w, h), in index order."""
+        candidates = self._covering(x, y, x + w, y + h)
+        if not len(candidates):
+            return candidates
+        b = self.boxes[candidates]
+        overlap = (
+            (b[:, 0] <= x + w)
+            & (x <= b[:, 0] + b[:, 2])
+            & (b[:, 1] <= y + h)
+            & (y <= b[:, 1] + b[:, 3])
+        )
+        return candidates[overlap]
+
+    def _rank(self, ids, x, y):
+        # Closest center first; ties go to the top-most, then left-most box.
+        b = self.boxes[ids]
+        dx = b[:, 0] + b[:, 2] / 2.0 - x
+        dy = b[:, 1] + b[:, 3] / 2.0 - y
+        order = np.lexsort((b[:, 0], b[:, 1], dx * dx + dy * dy))
+        return ids[order], (dx * dx + dy * dy)[order]
+
+    def nearest(self, x, y, k=1):
+        """Up to `k` box indices ordered by center distance to (x, y)."""
+        count = len(self.boxes)
+        if not count or k <= 0:
+            return np.empty(0, dtype=np.int64)
+        if k >= count:
+            return self._rank(np.arange(count), x, y)[0]
+        qx, qy = self._cell_of(x), self._cell_of(y)
+        min_x, min_y, max_x, max_y = self._extent
+        max_ring = max(abs(qx - min_x), abs(qx - max_x), abs(qy - min_y), abs(qy - max_y))
+        found = []
+        ring = 0
+        while True:
+            for gx in range(qx - ring, qx + ring + 1):
+                for gy in range(qy - ring, qy + ring + 1):
+                    if max(abs(gx - qx), abs(gy - qy)) == ring:
+                        found.extend(self._centers.get((gx, gy), ()))
+            if len(found) >= k:
+                ids, d2 = self._rank(np.asarray(found, dtype=np.int64), x, y)
+                # Anything in an outer ring is at least `ring` cells away.
+                if d2[k - 1] <= (ring * self.cell) ** 2 or ring >= max_ring:
+                    return ids[:k]
+            elif ring >= max_ring:
+                return self._rank(np.asarray(found, dtype=np.int64), x, y)[0]
+            ring += 1
+
+
+class FrameSpectrum:
+    """Forward DFTs of a frame's channels, shared by every template matched on it.
+
+    The transforms are padded to a fast DFT size covering the whole frame, so a
+    template of any size correlates against them without wrapping into the
+    positions cv2.matchTemplate reports.
+    """
+
+    def __init__(self, frame):
+        height, width = frame.shape[:2]
+        self.shape = frame.shape
+        self.size = self.dft_size(frame.shape)
+        padded = np.zeros(self.size, dtype=np.float32)
+        self.spectra = []
+        for channel in range(1 if frame.ndim == 2 else frame.shape[2]):
+            padded[:height, :width] = frame if frame.ndim == 2 else frame[:, :, channel]
+            self.spectra.append(cv2.dft(padded, nonzeroRows=height))
+        self.nbytes = sum(spectrum.nbytes for spectrum in self.spectra)
+
+    @staticmethod
+    def dft_size(shape):
+        return cv2.getOptimalDFTSize(shape[0]), cv2.getOptimalDFTSize(shape[1])
+
+    def match_bytes(self, template_shape, band_rows=256):
+        """Upper bound of what `ccoeff_normed` allocates, for the capture pool."""
+        template_h, template_w = template_shape[:2]
+        height, width = self.shape[:2]
+        rows, cols = height - template_h + 1, width - template_w + 1
+        # Padded template, its transform, one channel's product, the running
+        # sum and the inverse transform, all float32 over the padded size; the
+        # result; and one band of float64 window sums.
+        spectra = 5 * self.size[0] * self.size[1] * 4
+        band = (band_rows + template_h) * width * 8 + 8 * band_rows * cols * 8
+        return spectra + rows * cols * 4 + band
+
+    def ccoeff_normed(self, frame, template, band_rows=256):
+        """cv2.TM_CCOEFF_NORMED of `template` over `frame` (the frame this was built from).
+
+        The numerator is the cross-correlation with the zero-mean template, summed
+        over channels. Window energies come from running box sums, one band of
+        rows and one channel at a time. Edge cases (flat windows, flat
+        templates) follow OpenCV's own rules.
+        """
+        if frame.shape != self.shape:
+            raise ValueError("frame does not match spectrum")
+        template_h, template_w = template.shape[:2]
+        rows = frame.shape[0] - template_h + 1
+        cols = frame.shape[1] - template_w + 1
+        area = float(template_h * template_w)
+        padded = np.zeros(self.size, dtype=np.float32)
+        product = None
+        template_energy = 0.0
+        for channel, spectrum in enumerate(self.spectra):
+            plane = (template if template.ndim == 2 else template[:, :, channel]).astype(np.float64)
+            plane -= plane.mean()
+            template_energy += float((plane * plane).sum())
+            padded[:template_h, :template_w] = plane
+            term = cv2.mulSpectrums(spectrum, cv2.dft(padded, nonzeroRows=template_h), 0, conjB=True)
+            product = term if product is None else cv2.add(product, term)
+        if template_energy < np.finfo(np.float64).eps:
+            return np.ones((rows, cols), dtype=np.float32)
+        numerator = cv2.idft(product, flags=cv2.DFT_SCALE | cv2.DFT_REAL_OUTPUT)[:rows, :cols]
+        template_norm = np.sqrt(template_energy)
+        box = dict(
+            ksize=(template_w, template_h),
+            anchor=(0, 0),
+            normalize=False,
+            borderType=cv2.BORDER_CONSTANT,
+        )
+        planes = [frame] if frame.ndim == 2 else [frame[:, :, c] for c in range(frame.shape[2])]
+        result = np.zeros((rows, cols), dtype=np.float32)
+        for top in range(0, rows, band_rows):
+            bottom = min(rows, top + band_rows)
+            # Float64 sums of 8-bit pixels are exact, so flat windows come out
+            # exactly flat, as in OpenCV's integral images.
+            energy = np.zeros((bottom - top, cols))
+            for plane in planes:
+                strip = plane[top:bottom + template_h - 1].astype(np.float64)
+                total = cv2.boxFilter(strip, cv2.CV_64F, **box)[: bottom - top, :cols]
+                energy += cv2.sqrBoxFilter(strip, cv2.CV_64F, **box)[: bottom - top, :cols]
+                energy -= total * total / area
+            norm = np.sqrt(np.maximum(energy, 0.0)) * template_norm
+            band = numerator[top:bottom]
+            out = result[top:bottom]
+            magnitude = np.abs(band)
+            inside = magnitude < norm
+            np.divide(band, norm, out=out, where=inside, casting="unsafe")
+            edge = ~inside & (magnitude < norm * 1.125)
+            out[edge] = np.sign(band[edge])
+        return result
+
+
+class TemplateFeatures:
+    """ORB keypoints and descriptors of a template, and of its inverted image.
+
+    The inverted set lets a template saved in light mode match in dark mode.
+    `locate` matches descriptors against a frame's and accepts the best
+    homography, so the cost follows the keypoint counts, not the frame area
+    or the number of scales tried.
+    """
+
+    # Descriptor patch size (px); templates are padded by this much so
+    # keypoints near their edges can still be described.
+    PATCH = 19
+
+    def __init__(self, width, height, variants):
+        self.width = width
+        self.height = height
+        # [(points Nx2 float32, descriptors Nx32 uint8)], normal then inverted.
+        self.variants = variants
+
+    @classmethod
+    def detector(cls, keypoints):
+        return cv2.ORB_create(nfeatures=keypoints, edgeThreshold=cls.PATCH, patchSize=cls.PATCH)
+
+    @classmethod
+    def compute(cls, gray):
+        detector = cls.detector(FEATURE_TEMPLATE_KEYPOINTS)
+        variants = []
+        for image in (gray, 255 - gray):
+            padded = cv2.copyMakeBorder(image, *([cls.PATCH] * 4), cv2.BORDER_REPLICATE)
+            keypoints, descriptors = detector.detectAndCompute(padded, None)
+            if descriptors is None:
+                points = np.zeros((0, 2), dtype=np.float32)
+                descriptors = np.zeros((0, 32), dtype=np.uint8)
+            else:
+                points = np.float32([kp.pt for kp in keypoints]) - cls.PATCH
+            variants.append((points, descriptors))
+        return cls(gray.shape[1], gray.shape[0], variants)
+
+    @property
+    def keypoints(self):
+        return min(len(points) for points, _ in self.variants)
+
+    def to_arrays(self):
+        arrays = {"size": np.int32([self.width, self.height])}
+        for i, (points, descriptors) in enumerate(self.variants):
+            arrays[f"points{i}"] = points
+            arrays[f"descriptors{i}"] = descriptors
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        width, height = (int(v) for v in arrays["size"])
+        variants = []
+        i = 0
+        while f"points{i}" in arrays:
+            variants.append((np.array(arrays[f"points{i}"]), np.array(arrays[f"descriptors{i}"])))
+            i += 1
+        return cls(width, height, variants)
+
+    def locate(self, frame_points, frame_descriptors):
+        """Best (inliers, corners) of the template in the frame, or None.
+
+        `corners` is the template outline (4x2, frame px) under the homography.
+        """
+        found = self.locate_all(frame_points, frame_descriptors)
+        return max(found, key=lambda item: item[0]) if found else None
+
+    def locate_all(self, frame_points, frame_descriptors):
+        """Every accepted (inliers, corners), at most one per variant.
+
+        A template shown more than once is located at most once per variant:
+        its descriptors match each copy about equally well, so the ratio test
+        drops them, and with many copies nothing is found at all.
+        """
+        if frame_descriptors is None or len(frame_descriptors) < 2:
+            return []
+        matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+        outline = np.float32(
+            [[0, 0], [self.width, 0], [self.width, self.height], [0, self.height]]
+        ).reshape(-1, 1, 2)
+        found = []
+        for points, descriptors in self.variants:
+            if len(descriptors) < FEATURE_MIN_INLIERS:
+                continue
+            good = [
+                pair[0]
+                for pair in matcher.knnMatch(descriptors, frame_descriptors, k=2)
+                if len(pair) == 2 and pair[0].distance < FEATURE_RATIO * pair[1].distance
+            ]
+            if len(good) < FEATURE_MIN_INLIERS:
+                continue
+            source = points[[m.queryIdx for m in good]]
+            target = frame_points[[m.trainIdx for m in good]]
+            homography, mask = cv2.findHomography(source, target, cv2.RANSAC, FEATURE_RANSAC_PX)
+            if homography is None:
+                continue
+            inliers = int(mask.sum())
+            corners = cv2.perspectiveTransform(outline, homography).reshape(4, 2)
+            if inliers < FEATURE_MIN_INLIERS or not self._plausible(corners):
+                continue
+            found.append((inliers, corners))
+        return found
+
+    def _plausible(self, corners):
+        # Reject folded or wildly rescaled outlines (beyond 4x either way).
+        if not cv2.isContourConvex(corners.reshape(-1, 1, 2)):
+            return False
+        ratio = cv2.contourArea(corners) / float(self.width * self.height)
+        return 1 / 16.0 <= ratio <= 16.0
+
+
 class ScreenOCR:
     def __init__(self):
         pass
@@ -644,6 +1801,156 @@ class ScreenOCR:
 
         return image, width_px, height_px, scale, bounds_px
 
+    def capture_region(self, rect_pt):
+        """Capture a rectangle given in global display points (top-left origin).
+
+        Returns:
+          (cg_image, width_px, height_px, scale)
+        """
+        image = Quartz.CGWindowListCreateImage(
+            rect_pt,
+            Quartz.kCGWindowListOptionOnScreenOnly,
+            Quartz.kCGNullWindowID,
+            Quartz.kCGWindowImageDefault,
+        )
+        if image is None:
+            raise PermissionError("Screen Recording permission required")
+        width_px = Quartz.CGImageGetWidth(image)
+        height_px = Quartz.CGImageGetHeight(image)
+        if width_px == 0 or height_px == 0:
+            raise PermissionError("Screen Recording permission required")
+        scale = width_px / float(rect_pt.size.width) if rect_pt.size.width else 1.0
+        return image, width_px, height_px, scale
+
+    @staticmethod
+    def find_window(app, title=None):
+        """Front-most normal window of `app` (owner name), optionally whose title contains `title`.
+
+        Owner names are compared case-insensitively, exact match preferred over
+        substring. Returns {"id", "app", "title", "bounds": (x, y, w, h) in global
+        points} or None. Window titles are only visible with Screen Recording
+        permission.
+        """
+        infos = Quartz.CGWindowListCopyWindowInfo(
+            Quartz.kCGWindowListOptionOnScreenOnly | Quartz.kCGWindowListExcludeDesktopElements,
+            Quartz.kCGNullWindowID,
+        ) or []
+        app_lower = app.lower()
+        title_lower = title.lower() if title else None
+        exact = None
+        partial = None
+        for info in infos:
+            if info.get(Quartz.kCGWindowLayer, 0) != 0:
+                continue
+            owner = str(info.get(Quartz.kCGWindowOwnerName) or "")
+            name = str(info.get(Quartz.kCGWindowName) or "")
+            if title_lower is not None and title_lower not in name.lower():
+                continue
+            bounds = info.get(Quartz.kCGWindowBounds) or {}
+            window = {
+                "id": int(info[Quartz.kCGWindowNumber]),
+                "app": owner,
+                "title": name,
+                "bounds": tuple(
+                    float(bounds.get(key, 0.0)) for key in ("X", "Y", "Width", "Height")
+                ),
+            }
+            if window["bounds"][2] < 1 or window["bounds"][3] < 1:
+                continue
+            # The list is ordered front to back, so the first hit wins.
+            if owner.lower() == app_lower:
+                exact = exact or window
+            elif app_lower in owner.lower():
+                partial = partial or window
+        return exact or partial
+
+    def capture_window(self, window):
+        """Capture just `window` (from `find_window`), even where other windows overlap it.
+
+        Returns:
+          (cg_image, width_px, height_px, scale)
+        """
+        image = Quartz.CGWindowListCreateImage(
+            Quartz.CGRectNull,
+            Quartz.kCGWindowListOptionIncludingWindow,
+            window["id"],
+            Quartz.kCGWindowImageBoundsIgnoreFraming,
+        )
+        if image is None:
+            raise PermissionError("Screen Recording permission required")
+        width_px = Quartz.CGImageGetWidth(image)
+        height_px = Quartz.CGImageGetHeight(image)
+        if width_px == 0 or height_px == 0:
+            raise PermissionError("Screen Recording permission required")
+        width_pts = window["bounds"][2]
+        scale = width_px / float(width_pts) if width_pts else 1.0
+        return image, width_px, height_px, scale
+
+    def fingerprint_display(self, display_id, size=(128, 80)):
+        """Tiny grayscale thumbnail of a display, for cheap change detection.
+
+        Captured at nominal (1x) resolution and area-averaged down to `size`,
+        so a poll costs a few milliseconds rather than a full Retina frame.
+        """
+        image = Quartz.CGWindowListCreateImage(
+            Quartz.CGDisplayBounds(display_id),
+            Quartz.kCGWindowListOptionOnScreenOnly,
+            Quartz.kCGNullWindowID,
+            Quartz.kCGWindowImageNominalResolution,
+        )
+        if image is None:
+            raise PermissionError("Screen Recording permission required")
+        return self._gray_thumbnail(image, size)
+
+    def fingerprint_region(self, rect_pt, size):
+        """Grayscale thumbnail of a rectangle in global display points, like `fingerprint_display`."""
+        image = Quartz.CGWindowListCreateImage(
+            rect_pt,
+            Quartz.kCGWindowListOptionOnScreenOnly,
+            Quartz.kCGNullWindowID,
+            Quartz.kCGWindowImageNominalResolution,
+        )
+        if image is None:
+            raise PermissionError("Screen Recording permission required")
+        return self._gray_thumbnail(image, size)
+
+    @staticmethod
+    def _gray_thumbnail(image, size):
+        width, height = size
+        context = Quartz.CGBitmapContextCreate(
+            None, width, height, 8, width, Quartz.CGColorSpaceCreateDeviceGray(), Quartz.kCGImageAlphaNone
+        )
+        Quartz.CGContextSetInterpolationQuality(context, Quartz.kCGInterpolationHigh)
+        Quartz.CGContextDrawImage(context, Quartz.CGRectMake(0, 0, width, height), image)
+        thumb = Quartz.CGBitmapContextCreateImage(context)
+        data = Quartz.CGDataProviderCopyData(Quartz.CGImageGetDataProvider(thumb))
+        row = Quartz.CGImageGetBytesPerRow(thumb)
+        return np.frombuffer(data, dtype=np.uint8).reshape(height, row)[:, :width].astype(np.int16)
+
+    def warm_up(self):
+        """Run a throwaway OCR request so Vision loads its models now, not on the first find."""
+        width, height = 64, 32
+        space = Quartz.CGColorSpaceCreateDeviceRGB()
+        context = Quartz.CGBitmapContextCreate(
+            None, width, height, 8, width * 4, space, Quartz.kCGImageAlphaPremultipliedLast
+        )
+        Quartz.CGContextSetRGBFillColor(context, 1.0, 1.0, 1.0, 1.0)
+        Quartz.CGContextFillRect(context, Quartz.CGRectMake(0, 0, width, height))
+        image = Quartz.CGBitmapContextCreateImage(context)
+        self.recognize_text(image, width, height, 1.0)
+
+    @staticmethod
+    def frame_bytes(display_id):
+        """Approximate size in bytes of a full BGRA capture of `display_id`."""
+        mode = Quartz.CGDisplayCopyDisplayMode(display_id)
+        if mode is not None:
+            width = Quartz.CGDisplayModeGetPixelWidth(mode)
+            height = Quartz.CGDisplayModeGetPixelHeight(mode)
+        else:
+            bounds = Quartz.CGDisplayBounds(display_id)
+            width, height = bounds.size.width, bounds.size.height
+        return int(width * height * 4)
+
     def recognize_text(self, cg_image, width_px, height_px, scale):
         request = Vision.VNRecognizeTextRequest.alloc().init()
         request.setRecognitionLevel_(Vision.VNRequestTextRecognitionLevelAccurate)
@@ -655,7 +1962,11 @@ class ScreenOCR:
         if not success:
             raise RuntimeError(str(error))
 
-        items = []
+        texts = []
+        normalized = []
+        word_owners = []
+        word_spans = []
+        word_normalized = []
         results = request.results()
         if results:
             for observation in results:
@@ -666,60 +1977,1177 @@ class ScreenOCR:
                 text = vn_text.string()
                 if not text:
                     continue
+                text = str(text)
                 bbox = observation.boundingBox()
-                x_px = bbox.origin.x * width_px
-                y_px = bbox.origin.y * height_px
-                w_px = bbox.size.width * width_px
-                h_px = bbox.size.height * height_px
-                # Vision bbox origin is lower-left; convert to top-left points.
-                x_pt = x_px / scale
-                y_top_pt = (height_px - (y_px + h_px)) / scale
-                w_pt = w_px / scale
-                h_pt = h_px / scale
-                items.append(
-                    {
-                        "text": text,
-                        "bbox": (x_pt, y_top_pt, w_pt, h_pt),
-                        "vn_text": vn_text,
-                    }
-                )
-        return items
-
+                item_rect = (bbox.origin.x, bbox.origin.y, bbox.size.width, bbox.size.height)
+                owner = len(texts)
+                texts.append(text)
+                normalized.append(item_rect)
+                # Extract word geometry now so the Vision objects can be released
+                # with the request; single-word items just use the item box.
+                words = [m.span() for m in re.finditer(r"\S+", text)]
+                if len(words) < 2:
+                    continue
+                for word_start, word_end in words:
+                    rect = self._range_rect(vn_text, text, word_start, word_end)
+                    if rect is None:
+                        # Fall back to slicing the line box by character position.
+                        ix, iy, iw, ih = item_rect
+                        rect = (
+                            ix + iw * word_start / len(text),
+                            iy,
+                            iw * (word_end - word_start) / len(text),
+                            ih,
+                        )
+                    word_owners.append(owner)
+                    word_spans.append((word_start, word_end))
+                    word_normalized.append(rect)
+        # Vision bbox origin is lower-left; OCRResult converts to top-left points.
+        return OCRResult.from_vision(
+            texts, normalized, width_px, height_px, scale,
+            word_owners, word_spans, word_normalized,
+        )
 
-class AppController(AppKit.NSObject):
-    def init(self):
-        self = objc_super(AppController, self).init()
-        if self is None:
+    @staticmethod
+    def _range_rect(vn_text, text, start, end):
+        """Normalized Vision rect for text[start:end], or None."""
+        if not text.isascii():
+            # Vision ranges are UTF-16 based; Python offsets count code points.
+            start, end = (len(text[:i].encode("utf-16-le")) // 2 for i in (start, end))
+        rect_obs, error = vn_text.boundingBoxForRange_error_(
+            Foundation.NSMakeRange(start, end - start), None
+        )
+        if error is not None or rect_obs is None:
+            return None
+        try:
+            rect = rect_obs.boundingBox()
+        except AttributeError:
+            rect = rect_obs
+        if rect is None:
             return None
+        return (rect.origin.x, rect.origin.y, rect.size.width, rect.size.height)
+
+
+class CaptureBufferPool:
+    """Memory accounting and buffer reuse for full-resolution frames.
+
+    Every frame the app holds (CGImages waiting for OCR, BGR arrays used for
+    template matching) is charged against `cap_bytes`. Released arrays are kept
+    for reuse by the next capture of the same size. When a charge would exceed
+    the cap, idle buffers are dropped first and then the caller waits until
+    another holder releases (backpressure). A single frame larger than the cap
+    is still admitted when nothing else is held.
+    """
+
+    def __init__(self, cap_bytes, metrics=None, max_idle=2):
+        self.cap_bytes = cap_bytes
+        self.metrics = metrics
+        self.max_idle = max_idle
+        self._cond = threading.Condition()
+        self._idle = []
+        self._live = 0
+        self.peak = 0
+        self.allocated = 0
+        self.reused = 0
+        self.waits = 0
+
+    def _idle_bytes(self):
+        return sum(buf.nbytes for buf in self._idle)
+
+    def _publish_locked(self):
+        resident = self._live + self._idle_bytes()
+        self.peak = max(self.peak, resident)
+        if self.metrics is not None:
+            self.metrics.gauge("memory.capture.live", self._live)
+            self.metrics.gauge("memory.capture.peak", self.peak)
+
+    def _charge_locked(self, nbytes, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._live + self._idle_bytes() + nbytes > self.cap_bytes:
+            if self._idle:
+                self._idle.pop(0)
+                continue
+            if self._live == 0:
+                break
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise MemoryError(
+                    f"Capture memory cap reached ({self.cap_bytes // (1 << 20)} MB)"
+                )
+            self.waits += 1
+            self._cond.wait(remaining)
+        self._live += nbytes
+        self._publish_locked()
+
+    def charge(self, nbytes, timeout=None):
+        """Charge an allocation whose lifetime spans threads; pair with `uncharge`."""
+        with self._cond:
+            self._charge_locked(nbytes, timeout)
+
+    def uncharge(self, nbytes):
+        self._uncharge(nbytes)
+
+    def _uncharge(self, nbytes):
+        with self._cond:
+            self._live -= nbytes
+            self._publish_locked()
+            self._cond.notify_all()
+
+    def acquire(self, shape, dtype=np.uint8, timeout=None):
+        """Return an uninitialized array of `shape`, reusing an idle one when possible."""
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        with self._cond:
+            for i, buf in enumerate(self._idle):
+                if buf.shape == shape and buf.dtype == dtype:
+                    del self._idle[i]
+                    self._live += buf.nbytes
+                    self.reused += 1
+                    self._publish_locked()
+                    return buf
+            self._charge_locked(int(np.prod(shape)) * dtype.itemsize, timeout)
+            self.allocated += 1
+        return np.empty(shape, dtype)
+
+    def release(self, buf):
+        """Return a buffer from `acquire`; the caller must not use it afterwards."""
+        if buf is None:
+            return
+        with self._cond:
+            self._live -= buf.nbytes
+            if len(self._idle) < self.max_idle:
+                self._idle.append(buf)
+            self._publish_locked()
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def hold(self, nbytes, timeout=None):
+        """Charge a transient allocation (e.g. a CGImage) for the duration of the block."""
+        self.charge(nbytes, timeout)
+        try:
+            yield
+        finally:
+            self._uncharge(nbytes)
+
+    def reset_peak(self):
+        with self._cond:
+            self.peak = 0
+            self._publish_locked()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "live": self._live,
+                "idle": self._idle_bytes(),
+                "peak": self.peak,
+                "cap": self.cap_bytes,
+                "allocated": self.allocated,
+                "reused": self.reused,
+                "waits": self.waits,
+            }
 
-        self.ocr_engine = ScreenOCR()
 
-        # Active screen selection (multi-display)
-        # Default: follow wherever the command bar window is.
-        self._follow_command_bar = True
-        self._active_screen_index = 0
-        self._active_display_id = Quartz.CGMainDisplayID()
-        self._display_bounds_px = Quartz.CGDisplayBounds(self._active_display_id)
-        self.capture_origin_pt = (0.0, 0.0)
+class DiskCache:
+    """Versioned on-disk cache for expensive derived data (OCR, templates, macros).
+
+    Entries live in `<root>/v<VERSION>/<namespace>/<key>.bin`: a magic tag, a
+    JSON header (caller metadata plus dtype/shape/offset of each array) and
+    the raw array bytes. Reads memory-map the file and return zero-copy
+    read-only arrays. Writes go to a temp file that is fsynced and then
+    renamed into place, so neither a crash nor a power loss leaves a partial
+    entry under a real key; truncated or foreign files are dropped as misses.
+    Entries hold screen text and pixels, so directories are 0o700 and files
+    0o600. When the total size passes
+    `max_bytes`, least recently used entries (by mtime, refreshed on read)
+    are evicted. Bumping VERSION orphans old entries, which are removed on
+    startup.
+    """
+
+    VERSION = 1
+    MAGIC = b"GLASSC01"
+    HEADER = struct.Struct("<8sQ")
+
+    def __init__(self, root, max_bytes):
+        self.base = root
+        self.root = os.path.join(root, f"v{self.VERSION}")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None
+        self._total = 0
+        # Directories already created (or tightened) owner-only.
+        self._private_dirs = set()
+
+    def _path(self, namespace, key):
+        return os.path.join(self.root, namespace, f"{key}.bin")
+
+    def prune_versions(self):
+        """Remove entries written by other cache versions."""
+        try:
+            names = os.listdir(self.base)
+        except OSError:
+            return
+        for name in names:
+            if re.fullmatch(r"v\d+", name) and name != f"v{self.VERSION}":
+                shutil.rmtree(os.path.join(self.base, name), ignore_errors=True)
 
-        # Initialize geometry from main screen; we'll sync to the command bar on show/drag.
-        screen = AppKit.NSScreen.mainScreen()
-        self.screen_frame = screen.frame()
-        self.screen_height = self.screen_frame.size.height
-        self.screen_center = (
-            self.screen_frame.size.width / 2.0,
-            self.screen_frame.size.height / 2.0,
-        )
+    def get(self, namespace, key):
+        """Return (meta, arrays) or None on a miss."""
+        path = self._path(namespace, key)
+        try:
+            with open(path, "rb") as handle:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            self._discard(path)
+            return None
+        try:
+            magic, header_len = self.HEADER.unpack_from(mapped, 0)
+            if magic != self.MAGIC:
+                raise ValueError("bad magic")
+            start = self.HEADER.size
+            header = json.loads(mapped[start:start + header_len])
+            base = start + header_len
+            layout = [
+                (name, np.dtype(dtype), shape, offset, nbytes)
+                for name, (dtype, shape, offset, nbytes) in header["arrays"].items()
+            ]
+            if any(base + offset + nbytes > len(mapped) for _, _, _, offset, nbytes in layout):
+                raise ValueError("truncated")
+        except (ValueError, KeyError, TypeError, struct.error):
+            mapped.close()
+            self._discard(path)
+            return None
+        arrays = {
+            name: np.frombuffer(
+                mapped, dtype=dtype, count=nbytes // dtype.itemsize, offset=base + offset
+            ).reshape(shape)
+            for name, dtype, shape, offset, nbytes in layout
+        }
+        self._touch(path)
+        return header.get("meta", {}), arrays
+
+    def put(self, namespace, key, meta, arrays=None):
+        """Atomically store `meta` (JSON-able) and a dict of numpy arrays."""
+        layout = {}
+        chunks = []
+        offset = 0
+        for name, array in (arrays or {}).items():
+            array = np.ascontiguousarray(array)
+            layout[name] = [array.dtype.str, list(array.shape), offset, array.nbytes]
+            chunks.append(array)
+            offset += array.nbytes
+        header = json.dumps({"meta": meta, "arrays": layout}).encode("utf-8")
+        path = self._path(namespace, key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            directory = os.path.dirname(path)
+            if directory not in self._private_dirs:
+                for part in (self.base, self.root, directory):
+                    make_private_dir(part)
+                self._private_dirs.add(directory)
+            with open_private(tmp_path) as handle:
+                handle.write(self.HEADER.pack(self.MAGIC, len(header)))
+                handle.write(header)
+                for array in chunks:
+                    handle.write(array.tobytes())
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError as exc:
+            print(f"Cache write failed: {exc}")
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            self._scan_locked()
+            self._total += size - self._entries.get(path, (0, 0))[1]
+            self._entries[path] = (time.time(), size)
+            if self._total > self.max_bytes:
+                self._evict_locked()
+
+    def _scan_locked(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        self._total = 0
+        for directory, _, files in os.walk(self.root):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if filename.endswith(".tmp"):
+                    # Left over from a crash mid-write.
+                    if time.time() - stat.st_mtime > 3600:
+                        with contextlib.suppress(OSError):
+                            os.remove(path)
+                    continue
+                self._entries[path] = (stat.st_mtime, stat.st_size)
+                self._total += stat.st_size
 
-        self.command_bar = CommandBarWindow.alloc().initWithController_screenFrame_(
-            self, self.screen_frame
-        )
-        self.overlay = OverlayWindow.alloc().initWithScreenFrame_(self.screen_frame)
+    def _evict_locked(self):
+        target = self.max_bytes * 0.9
+        for path, (_, size) in sorted(self._entries.items(), key=lambda kv: kv[1][0]):
+            if self._total <= target:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(path)
+            del self._entries[path]
+            self._total -= size
+
+    def _touch(self, path):
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        with self._lock:
+            if self._entries is not None and path in self._entries:
+                self._entries[path] = (time.time(), self._entries[path][1])
+
+    def _discard(self, path):
+        with contextlib.suppress(OSError):
+            os.remove(path)
+        with self._lock:
+            if self._entries is not None and path in self._entries:
+                self._total -= self._entries.pop(path)[1]
+
+    def stats(self):
+        with self._lock:
+            self._scan_locked()
+            return {"entries": len(self._entries), "bytes": self._total, "cap": self.max_bytes}
+
+
+class MacroStore(collections.abc.MutableMapping):
+    """Macro library backed by a JSON snapshot plus an append-only journal.
+
+    The snapshot keeps the `{"macros": {...}}` layout of `macros.json`, with
+    v1 lists and v2 `{"v": 2, ...}` objects stored as-is. Each assignment or
+    deletion appends one fsync'd JSON line to `<path>.journal` instead of
+    rewriting the library. The journal is folded into the snapshot (temp
+    file + rename) after `compact_every` records. Replaying the journal over
+    a snapshot is idempotent, so a crash at any point loses at most the
+    record being written. A snapshot that fails to parse is copied aside
+    before anything else is written.
+    """
+
+    def __init__(self, path, normalize=None, compact_every=200):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.normalize = normalize or (lambda name: name)
+        self.compact_every = compact_every
+        self._data = {}
+        self._journal_records = 0
+        self._journal_torn = False
+
+    def __getitem__(self, name):
+        return self._data[name]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, name):
+        return name in self._data
+
+    def __setitem__(self, name, value):
+        self._data[name] = value
+        self._append({"op": "set", "name": name, "value": value})
+
+    def __delitem__(self, name):
+        del self._data[name]
+        self._append({"op": "del", "name": name})
+
+    def load(self):
+        """Read the snapshot and replay the journal; returns False if neither exists."""
+        data = {}
+        found = False
+        damaged = False
+        if os.path.exists(self.path):
+            found = True
+            try:
+                with open(self.path, "r", encoding="utf-8") as handle:
+                    raw = json.load(handle)
+            except json.JSONDecodeError as exc:
+                backup = f"{self.path}.corrupt-{time.strftime('%Y%m%d-%H%M%S')}"
+                shutil.copy2(self.path, backup)
+                print(f"Macro library unreadable ({exc}); saved a copy to {backup}")
+                raw = {}
+                damaged = True
+            if isinstance(raw, dict) and isinstance(raw.get("macros"), dict):
+                raw = raw["macros"]
+            elif not isinstance(raw, dict):
+                raw = {}
+            for key, value in raw.items():
+                data.setdefault(self.normalize(key), value)
+        records = 0
+        if os.path.exists(self.journal_path):
+            found = True
+            with open(self.journal_path, "r", encoding="utf-8") as handle:
+                lines = handle.read().split("\n")
+            # A missing final newline means the last append was cut short.
+            self._journal_torn = lines[-1] != ""
+            for lineno, line in enumerate(lines, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    name = self.normalize(record["name"])
+                    op = record["op"]
+                except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+                    # Typically a torn final line from a crash mid-append.
+                    print(f"Skipping damaged macro journal record at line {lineno}")
+                    continue
+                if op == "set":
+                    data[name] = record.get("value")
+                elif op == "del":
+                    data.pop(name, None)
+                records += 1
+        self._data = data
+        self._journal_records = records
+        if damaged or records >= self.compact_every:
+            self.compact()
+        return found
+
+    def replace_all(self, macros):
+        """Replace the whole library with one snapshot write."""
+        self._data = dict(macros)
+        self.compact()
+
+    def compact(self):
+        """Write the current library as the snapshot and empty the journal."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump({"macros": self._data}, handle, indent=2)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, self.path)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.journal_path)
+        self._journal_records = 0
+        self._journal_torn = False
+
+    def _append(self, record):
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        if self._journal_torn:
+            # Start on a fresh line so the damaged record doesn't swallow this one.
+            line = "\n" + line
+            self._journal_torn = False
+        with open(self.journal_path, "a", encoding="utf-8") as handle:
+            handle.write(line)
+            handle.flush()
+            os.fsync(handle.fileno())
+        self._journal_records += 1
+        if self._journal_records >= self.compact_every:
+            self.compact()
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of non-negative integers.
+
+    Values below 2**SUB_BITS are exact; above that each power-of-two range is
+    split into 2**(SUB_BITS - 1) buckets, so relative error stays under ~3%.
+    Recording is a couple of integer ops and a dict increment.
+    """
+
+    SUB_BITS = 6
 
-        self.ocr_items = []
-        self.matches = []
-        self.last_click_point = None
-        self.capture_width_px = None
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    @classmethod
+    def bucket_of(cls, value):
+        if value < (1 << cls.SUB_BITS):
+            return value
+        shift = value.bit_length() - cls.SUB_BITS
+        return (shift << (cls.SUB_BITS - 1)) + (value >> shift)
+
+    @classmethod
+    def bucket_floor(cls, bucket):
+        if bucket < (1 << cls.SUB_BITS):
+            return bucket
+        shift = (bucket >> (cls.SUB_BITS - 1)) - 1
+        return (bucket - (shift << (cls.SUB_BITS - 1))) << shift
+
+    def record(self, value):
+        value = max(0, int(value))
+        bucket = self.bucket_of(value)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, pct):
+        if not self.count:
+            return None
+        target = max(1, int(round(self.count * pct / 100.0)))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                return min(self.bucket_floor(bucket), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": (self.total / self.count) if self.count else None,
+            "min": self.min,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    """Rolling aggregate metrics: histograms plus monotonically increasing counters.
+
+    Latency histograms are in microseconds and fed from finished tracer spans.
+    Each histogram keeps a lifetime total and a recent window (the current plus
+    the previous `window` seconds).
+    """
+
+    # Tracer span name -> latency histogram name.
+    SPAN_HISTOGRAMS = {
+        "capture": "capture",
+        "ocr": "ocr",
+        "find": "find",
+        "match": "find-image",
+        "step": "macro-step",
+    }
+
+    def __init__(self, window=60.0):
+        self.window = window
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._reset_locked()
+
+    def _reset_locked(self):
+        self.histograms = collections.defaultdict(LatencyHistogram)
+        self._current = collections.defaultdict(LatencyHistogram)
+        self._previous = {}
+        self._window_start = time.monotonic()
+        self.counters = collections.defaultdict(int)
+        self.gauges = {}
+        self.version = 0
+
+    def reset(self):
+        with self._lock:
+            self._reset_locked()
+
+    def observe(self, name, value):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window:
+                self._previous = self._current
+                self._current = collections.defaultdict(LatencyHistogram)
+                self._window_start = now
+            self.histograms[name].record(value)
+            self._current[name].record(value)
+            self.version += 1
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+            self.version += 1
+
+    def percentile(self, name, pct):
+        """Lifetime percentile of a histogram (its units), or None if unmeasured."""
+        with self._lock:
+            hist = self.histograms.get(name)
+            return None if hist is None else hist.percentile(pct)
+
+    def gauge(self, name, value):
+        """Set a point-in-time value (e.g. bytes currently held)."""
+        with self._lock:
+            self.gauges[name] = value
+            self.version += 1
+
+    def cache(self, name, hit):
+        """Count a cache lookup; `stats` reports hit rates per cache."""
+        self.incr(f"cache.{name}.{'hit' if hit else 'miss'}")
+
+    def observe_span(self, span):
+        hist = self.SPAN_HISTOGRAMS.get(span.name)
+        if hist is not None:
+            self.observe(f"latency.{hist}", (span.end - span.start) * 1e6)
+        if span.name == "ocr" and "items" in span.args:
+            self.observe("ocr.items_per_frame", span.args["items"])
+        elif span.name in ("find", "match") and "matches" in span.args:
+            self.observe("find.matches_per_query", span.args["matches"])
+        elif span.name == "macro":
+            status = span.args.get("status", "complete")
+            self.incr(f"macro.{status}")
+            if status == "aborted":
+                self.incr(f"macro.aborted.{self.abort_reason_key(span.args.get('reason', ''))}")
+
+    @staticmethod
+    def abort_reason_key(message):
+        # Collapse per-query details ("Text 'Send' not found") into one bucket.
+        key = re.sub(r"'[^']*'", "'*'", message or "unknown")
+        key = re.sub(r":\s.*$", "", key)
+        return key.strip() or "unknown"
+
+    def snapshot(self):
+        with self._lock:
+            recent = {}
+            for name, hist in self._current.items():
+                merged = LatencyHistogram()
+                merged.merge(hist)
+                if name in self._previous:
+                    merged.merge(self._previous[name])
+                recent[name] = merged.summary()
+            return {
+                "time": time.time(),
+                "uptime_s": round(time.time() - self.started, 1),
+                "histograms": {name: h.summary() for name, h in self.histograms.items()},
+                "recent": recent,
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+            }
+
+    def cache_rates(self, counters):
+        rates = {}
+        for key, value in counters.items():
+            if not key.startswith("cache."):
+                continue
+            name, _, kind = key[len("cache."):].rpartition(".")
+            entry = rates.setdefault(name, {"hit": 0, "miss": 0})
+            entry[kind] = value
+        for entry in rates.values():
+            total = entry["hit"] + entry["miss"]
+            entry["rate"] = (entry["hit"] / total) if total else None
+        return rates
+
+    def write(self, path):
+        """Atomically write a JSON snapshot for external scrapers."""
+        snapshot = self.snapshot()
+        snapshot["caches"] = self.cache_rates(snapshot["counters"])
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(snapshot, handle, indent=1)
+        os.replace(tmp_path, path)
+
+
+class ProfileStore:
+    """Per-step timing history of macro runs, for `profile`.
+
+    A tracer listener: stage spans are summed per step, and when a macro's
+    root span ends the run is appended to a JSON-lines file as
+    {"macro", "version", "time", "status", "reason", "steps"}, where each step
+    is [index, step, total_us, [stage_us in STAGES order]]. `version` hashes
+    the macro's flattened steps, so history from before an edit can be told
+    apart. The file is rewritten with the last `keep` runs per macro once it
+    holds twice that many lines.
+    """
+
+    STAGES = ("capture", "ocr", "queue-wait", "find", "match", "click", "delay", "wait")
+
+    def __init__(self, path, version, keep=PROFILE_KEEP_RUNS):
+        self.path = path
+        self.keep = keep
+        # Macro name -> version string (see AppController._macro_version).
+        self._version = version
+        self._lock = threading.Lock()
+        # Parent span id -> {stage: seconds}, and root span id -> step rows.
+        self._stages = collections.defaultdict(lambda: collections.defaultdict(float))
+        self._steps = collections.defaultdict(list)
+        self._runs = None
+        self._lines = 0
+
+    def observe_span(self, span):
+        if span.parent_id is not None:
+            with self._lock:
+                if span.name == "step":
+                    stages = self._stages.pop(span.span_id, {})
+                    self._steps[span.parent_id].append(
+                        [
+                            span.args.get("index"),
+                            span.args.get("step", ""),
+                            round(span.duration * 1e6),
+                            [round(stages.get(stage, 0.0) * 1e6) for stage in self.STAGES],
+                        ]
+                    )
+                else:
+                    self._stages[span.parent_id][span.name] += span.duration
+            return
+        with self._lock:
+            self._stages.pop(span.span_id, None)
+            steps = self._steps.pop(span.span_id, [])
+            if span.name == "macro":
+                # Stages that ended after their step closed (e.g. a wait timer
+                # firing after a cancel) have nowhere to go; drop them.
+                for span_id in [key for key in self._stages if key < span.span_id]:
+                    del self._stages[span_id]
+        if span.name != "macro" or not steps:
+            return
+        name = span.args.get("macro", "")
+        self.append(
+            {
+                "macro": name,
+                "version": self._version(name),
+                "time": round(time.time()),
+                "status": span.args.get("status", "complete"),
+                "reason": span.args.get("reason", ""),
+                "steps": steps,
+            }
+        )
+
+    def _load_locked(self):
+        if self._runs is not None:
+            return
+        self._runs = collections.defaultdict(lambda: collections.deque(maxlen=self.keep))
+        self._lines = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                for line in handle:
+                    self._lines += 1
+                    try:
+                        run = json.loads(line)
+                    except ValueError:
+                        # Torn final line from a crash mid-append.
+                        continue
+                    self._runs[run["macro"]].append(run)
+        except FileNotFoundError:
+            pass
+
+    def append(self, run):
+        with self._lock:
+            self._load_locked()
+            self._runs[run["macro"]].append(run)
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open_private(self.path, "a", encoding="utf-8") as handle:
+                    handle.write(json.dumps(run, separators=(",", ":")) + "\n")
+                self._lines += 1
+                if self._lines > 2 * self.keep * len(self._runs):
+                    self._compact_locked()
+            except OSError as exc:
+                print(f"Failed to save macro profile: {exc}")
+
+    def _compact_locked(self):
+        tmp_path = f"{self.path}.tmp"
+        with open_private(tmp_path, "w", encoding="utf-8") as handle:
+            for runs in self._runs.values():
+                for run in runs:
+                    handle.write(json.dumps(run, separators=(",", ":")) + "\n")
+        os.replace(tmp_path, self.path)
+        self._lines = sum(len(runs) for runs in self._runs.values())
+
+    def runs(self, name):
+        with self._lock:
+            self._load_locked()
+            return list(self._runs.get(name, ()))
+
+    def summarize(self, name):
+        """Per-step statistics over the runs of the macro's current version.
+
+        Returns {"runs", "older", "total_p50_s", "total_p95_s", "steps"}; each
+        step has p50/p95 (s), its mean share of run time, per-stage p50 (s),
+        and abort counts with the most common reason.
+        """
+        version = self._version(name)
+        runs = self.runs(name)
+        current = [run for run in runs if run.get("version") == version]
+        by_index = {}
+        totals = []
+        for run in current:
+            run_total = sum(step[2] for step in run["steps"]) or 1
+            totals.append(run_total)
+            last = run["steps"][-1][0]
+            for index, step, total_us, stage_us in run["steps"]:
+                entry = by_index.setdefault(
+                    index, {"step": step, "totals": [], "shares": [], "stages": [], "aborts": collections.Counter()}
+                )
+                entry["step"] = step
+                entry["totals"].append(total_us)
+                entry["shares"].append(total_us / run_total)
+                entry["stages"].append(stage_us)
+                if run["status"] == "aborted" and index == last:
+                    entry["aborts"][Metrics.abort_reason_key(run.get("reason", ""))] += 1
+        steps = []
+        for index in sorted(by_index, key=lambda value: (value is None, value)):
+            entry = by_index[index]
+            samples = np.asarray(entry["totals"], dtype=np.float64) / 1e6
+            stages = np.median(np.asarray(entry["stages"], dtype=np.float64), axis=0) / 1e6
+            steps.append(
+                {
+                    "index": index,
+                    "step": entry["step"],
+                    "runs": len(samples),
+                    "p50_s": float(np.percentile(samples, 50)),
+                    "p95_s": float(np.percentile(samples, 95)),
+                    "share": float(np.mean(entry["shares"])),
+                    "stages": {stage: float(value) for stage, value in zip(self.STAGES, stages) if value > 0},
+                    "aborts": sum(entry["aborts"].values()),
+                    "abort_reason": entry["aborts"].most_common(1)[0][0] if entry["aborts"] else "",
+                }
+            )
+        totals = np.asarray(totals, dtype=np.float64) / 1e6
+        return {
+            "runs": len(current),
+            "older": len(runs) - len(current),
+            "total_p50_s": float(np.percentile(totals, 50)) if len(totals) else None,
+            "total_p95_s": float(np.percentile(totals, 95)) if len(totals) else None,
+            "steps": steps,
+        }
+
+
+class ApiClient:
+    """One connected socket client with its own request queue."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.requests = collections.deque()
+        self.closed = False
+        self._send_lock = threading.Lock()
+
+    def send(self, message):
+        if self.closed:
+            return
+        data = (json.dumps(message) + "\n").encode("utf-8")
+        with self._send_lock:
+            try:
+                self.conn.sendall(data)
+            except OSError:
+                self.closed = True
+
+    def close(self):
+        self.closed = True
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+
+class CommandServer:
+    """Local Unix-socket JSON API accepting the same commands as the command bar.
+
+    Protocol is newline-delimited JSON. A request is {"id": ..., "cmd": "find Chart"};
+    a bare text line is accepted too. Clients may pipeline any number of requests.
+    Each client has its own queue and queues are served round-robin. Commands run
+    one at a time on the main thread, because they share the controller's capture
+    and macro state. Every event emitted while a request runs (status, capture,
+    matches, step, macro, error) is streamed back tagged with the request id, and
+    a final "done" event carries ok/status/elapsed_ms.
+    """
+
+    def __init__(self, controller, path, timeout=120.0, poll_interval=0.02):
+        self.controller = controller
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._clients = []
+        self._next_client = 0
+        self._work = threading.Condition()
+        self._active = None
+        self._sock = None
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if os.path.exists(self.path):
+            # Only a socket nobody answers on (left by a crash) is replaced.
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+            except OSError:
+                os.unlink(self.path)
+            else:
+                raise OSError(f"another instance is listening on {self.path}")
+            finally:
+                probe.close()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        os.chmod(self.path, 0o600)
+        sock.listen(16)
+        self._sock = sock
+        self.controller._event_listeners.append(self._on_event)
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        threading.Thread(target=self._dispatch_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            client = ApiClient(conn)
+            with self._work:
+                self._clients.append(client)
+            threading.Thread(target=self._read_loop, args=(client,), daemon=True).start()
+
+    def _read_loop(self, client):
+        try:
+            with client.conn.makefile("r", encoding="utf-8") as reader:
+                for line in reader:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    request = self._parse_request(client, line)
+                    if request is None:
+                        continue
+                    with self._work:
+                        client.requests.append(request)
+                        self._work.notify()
+        except (OSError, UnicodeDecodeError):
+            pass
+        finally:
+            with self._work:
+                if client in self._clients:
+                    self._clients.remove(client)
+            client.close()
+
+    def _parse_request(self, client, line):
+        if not line.startswith("{"):
+            return {"id": None, "cmd": line}
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as exc:
+            client.send({"id": None, "event": "error", "message": f"Invalid JSON: {exc}"})
+            return None
+        if not isinstance(request, dict) or not isinstance(request.get("cmd"), str):
+            client.send({"id": None, "event": "error", "message": "Missing 'cmd'"})
+            return None
+        return request
+
+    def _next_request(self):
+        """Pick the next request round-robin across clients (caller holds the lock)."""
+        count = len(self._clients)
+        for offset in range(count):
+            index = (self._next_client + offset) % count
+            client = self._clients[index]
+            if client.requests:
+                self._next_client = (index + 1) % count
+                return client, client.requests.popleft()
+        return None
+
+    def _dispatch_loop(self):
+        while True:
+            with self._work:
+                item = self._next_request()
+                while item is None:
+                    self._work.wait()
+                    item = self._next_request()
+            client, request = item
+            if not client.closed:
+                self._run_request(client, request)
+
+    def _run_request(self, client, request):
+        request_id = request.get("id")
+        command = request["cmd"].strip()
+        started = time.perf_counter()
+        state = {"ok": True, "status": "", "matches": None}
+        if command == "ping":
+            client.send({"id": request_id, "event": "done", "ok": True, "status": "pong", "elapsed_ms": 0.0})
+            return
+        with self._work:
+            self._active = (client, request_id, state)
+        finished = threading.Event()
+
+        def dispatch():
+            try:
+                self.controller.handle_command(command)
+            except Exception as exc:
+                state["ok"] = False
+                state["status"] = f"Command failed: {exc}"
+            probe()
+
+        def probe():
+            # Runs on the main thread, so it never observes a half-finished handoff
+            # (e.g. between OCR completing and the pending find running).
+            if not self.controller._is_busy():
+                finished.set()
+
+        run_on_main(dispatch)
+        deadline = started + self.timeout
+        timed_out = False
+        # The request stays active until the controller is idle, so the next
+        # one never starts alongside it or gets its events.
+        while not finished.wait(self.poll_interval):
+            if not timed_out and time.perf_counter() > deadline:
+                timed_out = True
+                run_on_main(self._cancel)
+            run_on_main(probe)
+        if timed_out:
+            state["ok"] = False
+            state["status"] = "Timed out"
+        with self._work:
+            self._active = None
+        client.send(
+            {
+                "id": request_id,
+                "event": "done",
+                "ok": state["ok"],
+                "status": state["status"],
+                "matches": state["matches"],
+                "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+            }
+        )
+
+    def _cancel(self):
+        """Stop the macro or batch a timed-out request started (main thread)."""
+        if self.controller._batch is not None:
+            self.controller._batch["canceled"] = True
+        self.controller._abort_macro("Timed out")
+
+    def _on_event(self, kind, payload):
+        active = self._active
+        if active is None:
+            return
+        client, request_id, state = active
+        if kind == "status":
+            state["status"] = payload.get("text", "")
+        elif kind == "matches":
+            state["matches"] = len(payload.get("matches", []))
+        elif kind == "error" or (kind == "macro" and payload.get("status") == "aborted"):
+            state["ok"] = False
+        message = {"id": request_id, "event": kind}
+        message.update(payload)
+        client.send(message)
+
+
+class AppController(AppKit.NSObject):
+    def init(self):
+        self = objc_super(AppController, self).init()
+        if self is None:
+            return None
+
+        # Active screen selection (multi-display)
+        # Default: follow wherever the command bar window is.
+        self._follow_command_bar = True
+        self._active_screen_index = 0
+        self._active_display_id = Quartz.CGMainDisplayID()
+        self._display_bounds_px = Quartz.CGDisplayBounds(self._active_display_id)
+        self.capture_origin_pt = (0.0, 0.0)
+
+        # Initialize geometry from main screen; we'll sync to the command bar on show/drag.
+        screen = AppKit.NSScreen.mainScreen()
+        self.screen_frame = screen.frame()
+        self.screen_height = self.screen_frame.size.height
+        self.screen_center = (
+            self.screen_frame.size.width / 2.0,
+            self.screen_frame.size.height / 2.0,
+        )
+
+        with STARTUP.phase("windows"):
+            self.command_bar = CommandBarWindow.alloc().initWithController_screenFrame_(
+                self, self.screen_frame
+            )
+            self.overlay = OverlayWindow.alloc().initWithScreenFrame_(self.screen_frame)
+
+        with STARTUP.phase("state"):
+            self._init_state()
+        # Hotkey first so the command bar is reachable as early as possible.
+        with STARTUP.phase("hotkey"):
+            self._setup_hotkey()
+        with STARTUP.phase("load macros"):
+            self._load_macros()
+        with STARTUP.phase("services"):
+            self._start_metrics_writer()
+            self.command_server = CommandServer(self, os.path.join(GLASS_DIR, "glass.sock"))
+            try:
+                self.command_server.start()
+            except OSError as exc:
+                print(f"Command socket disabled: {exc}")
+        STARTUP.record("ready", STARTUP.origin, time.perf_counter())
+        # Warm-up starts once launch has finished and the run loop is idle.
+        run_on_main(self._start_warmup)
+        return self
+
+    def _start_warmup(self):
+        """Load Vision (with a dummy request) and OpenCV in the background."""
+
+        def warm():
+            with objc.autorelease_pool():
+                try:
+                    with STARTUP.phase("vision warm-up"):
+                        self.ocr_engine.warm_up()
+                except Exception as exc:
+                    print(f"Vision warm-up failed: {exc}")
+            cv2.__version__  # first attribute access imports OpenCV
+            self.disk_cache.prune_versions()
+            self._index_template_features()
+
+        threading.Thread(target=warm, name="warm-up", daemon=True).start()
+
+    def _init_state(self):
+        """Initialize non-UI controller state (shared with headless harnesses)."""
+        self.ocr_engine = ScreenOCR()
+        self.ocr_items = OCRResult.empty()
+        # [(screen_index, OCRResult, (dx, dy))] from the last all-screens capture,
+        # offsets in points relative to the active screen; None after a normal capture.
+        self._screen_snapshots = None
+        self.disk_cache = DiskCache(os.path.join(GLASS_DIR, "cache"), CACHE_MB << 20)
+        self._ocr_memo = collections.OrderedDict()
+        self._ocr_memo_lock = threading.Lock()
+        self._spectrum_memo = None
+        # Key of the last frame matched without a spectrum (see `_frame_spectrum`).
+        self._spectrum_seen = None
+        self._spectrum_lock = threading.Lock()
+        self._frame_features_memo = None
+        self._feature_cache = {}
+        self._watches = {}
+        self._watch_ids = itertools.count(1)
+        self._watch_lock = threading.Lock()
+        self._watch_wake = threading.Event()
+        self._watch_thread = None
+        self._snapshot_time = None
+        self._live_query = None
+        self._live_generation = 0
+        self._live_job = None
+        # Search-as-you-type results while they are on the overlay. They stay
+        # out of `self.matches`, which is what the last `find` committed to and
+        # what `click <n>` and the 1-9 / a-i shortcuts use.
+        self._live_matches = None
+        # True while the in-flight capture was started by a keystroke; a
+        # command or macro step arriving meanwhile sets `_capture_after_live`
+        # (its all_screens flag) and gets a fresh capture when that one lands.
+        self._live_capture = False
+        self._capture_after_live = None
+        self._macro_all_screens = False
+        self._macro_match_mode = None
+        # (app, title or None) that captures are scoped to; a v2 macro's
+        # "target" overrides it while the macro runs.
+        self._target = None
+        self._macro_target = None
+        # MacroSimulation while `simulate` runs; engine I/O checks it.
+        self._simulation = None
+        # Step key -> {"bbox", "patch"}: where a smart-click step last clicked
+        # and what was there (see `_try_fast_target`).
+        self._fast_targets = collections.OrderedDict()
+        self.matches = []
+        self.last_click_point = None
+        self.capture_width_px = None
         self.capture_height_px = None
         self.capture_scale = None
         self._pending_find_query = None
@@ -733,10 +3161,13 @@ class AppController(AppKit.NSObject):
         self.macros_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "macros.json")
         self.images_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
         os.makedirs(self.images_path, exist_ok=True)
-        self.macros = {}
+        self.macros = MacroStore(self.macros_path, self._normalize_macro_name)
         self._recording_name = None
         self._recording_steps = []
         self._recording_mouse_monitor = None
+        # Root span of the current recording; click-region capture and OCR
+        # spans hang off it instead of becoming roots that `perf` would show.
+        self._recording_span = None
         self._macro_running = False
         self._macro_queue = []
         self._macro_name = None
@@ -748,10 +3179,79 @@ class AppController(AppKit.NSObject):
         self._pending_image_name = None
         self._command_history = []
         self._history_index = -1
-        self._load_macros()
-        self._setup_hotkey()
         self._status_flash_token = 0
-        return self
+        self.tracer = Tracer()
+        self.metrics = Metrics()
+        self.tracer.listeners.append(self.metrics.observe_span)
+        self.profiles = ProfileStore(os.path.join(GLASS_DIR, "profiles.jsonl"), self._macro_version)
+        self.tracer.listeners.append(self.profiles.observe_span)
+        self.capture_pool = CaptureBufferPool(CAPTURE_MEM_MB << 20, self.metrics)
+        self._recording_lock = threading.Lock()
+        self._recording_clicks = collections.deque()
+        self._recording_worker_active = False
+        self.metrics_path = os.path.join(GLASS_DIR, "metrics.json")
+        self._event_listeners = []
+        self._template_cache = {}
+        self._compiled_macros = {}
+        self._macros_digest = None
+        self._macro_params = None
+        self._batch = None
+        self._trace_root = None
+        self._trace_step = None
+        self._trace_delay_span = None
+        self._trace_wait_span = None
+        self._macro_step_index = 0
+        self._macro_dispatching = False
+        self._macro_step_done_inline = False
+
+    def _emit_event(self, kind, **payload):
+        """Notify listeners (e.g. the command socket) of progress and results."""
+        if self._simulation is not None:
+            return
+        for listener in getattr(self, "_event_listeners", ()):
+            try:
+                listener(kind, payload)
+            except Exception as exc:
+                print(f"Event listener failed: {exc}")
+
+    def _matches_payload(self, matches):
+        return [
+            {
+                "index": index,
+                "text": match.get("text", ""),
+                "query": match.get("query", ""),
+                "type": match.get("type", "text"),
+                "bbox": [round(float(v), 2) for v in match["bbox"]],
+                "screen": match.get("screen"),
+            }
+            for index, match in enumerate(matches, start=1)
+        ]
+
+    def _is_busy(self):
+        """True while a capture, pending find, macro or batch is still in flight."""
+        return bool(
+            self._ocr_in_progress
+            or self._macro_running
+            or self._pending_find_query
+            or self._batch is not None
+        )
+
+    def _start_metrics_writer(self, interval=10.0):
+        """Periodically dump metrics to `metrics_path` for local scraping."""
+
+        def loop():
+            written = None
+            while True:
+                time.sleep(interval)
+                if self.metrics.version == written:
+                    continue
+                written = self.metrics.version
+                try:
+                    self.metrics.write(self.metrics_path)
+                except OSError as exc:
+                    print(f"Metrics write failed: {exc}")
+
+        threading.Thread(target=loop, daemon=True).start()
 
     def _flash_status(self, message, duration=1.25):
         """Show a temporary status message, then clear it."""
@@ -875,7 +3375,11 @@ class AppController(AppKit.NSObject):
         )
 
         # Reset capture state for new screen
-        self.ocr_items = []
+        self.ocr_items = OCRResult.empty()
+        self._screen_snapshots = None
+        self._snapshot_time = None
+        self._live_job = None
+        self._live_matches = None
         self.matches = []
         if hasattr(self, "overlay"):
             self.overlay.clear()
@@ -885,12 +3389,8 @@ class AppController(AppKit.NSObject):
         if hasattr(self, "command_bar") and hasattr(self, "overlay"):
             was_visible = getattr(self.command_bar, "visible", False)
 
-            # Always rebuild overlay for the new screen frame.
-            try:
-                self.overlay.window.orderOut_(None)
-            except Exception:
-                pass
-            self.overlay = OverlayWindow.alloc().initWithScreenFrame_(self.screen_frame)
+            # Reuse the overlay window; it only needs to move to the new screen.
+            self.overlay.set_screen_frame(self.screen_frame)
 
             # Optionally rebuild command bar (this recenters it). When we are following
             # the user's dragged command bar, we do NOT want to reset its position.
@@ -992,10 +3492,14 @@ class AppController(AppKit.NSObject):
             self._install_key_monitor()
 
     def clear_and_close(self):
+        if self._batch is not None and not self._macro_dispatching:
+            # User cancel (not a `clear` step inside the macro) ends the whole batch.
+            self._batch["canceled"] = True
         if self._macro_running:
             self._abort_macro("Macro canceled")
         self.overlay.clear()
         self.matches = []
+        self._live_matches = None
         self._pending_find_query = None
         self.command_bar.hide_help()
         self.command_bar.clear_input()
@@ -1004,30 +3508,21 @@ class AppController(AppKit.NSObject):
         self.command_bar.hide()
 
     def _load_macros(self):
-        path = self.macros_path
-        if not os.path.exists(path):
-            return
+        store = MacroStore(self.macros_path, self._normalize_macro_name)
         try:
-            with open(path, "r", encoding="utf-8") as handle:
-                data = json.load(handle)
-        except (OSError, json.JSONDecodeError):
-            return
-        if isinstance(data, dict) and isinstance(data.get("macros"), dict):
-            self.macros = data["macros"]
-        elif isinstance(data, dict):
-            self.macros = data
-        normalized = {}
-        for key, value in self.macros.items():
-            name = self._normalize_macro_name(key)
-            if name not in normalized:
-                normalized[name] = value
-        self.macros = normalized
+            store.load()
+        except OSError as exc:
+            print(f"Failed to load macros: {exc}")
+            return
+        self.macros = store
+        self._compiled_macros.clear()
+        self._macros_digest = None
 
     def _save_macros(self):
-        path = self.macros_path
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as handle:
-            json.dump({"macros": self.macros}, handle, indent=2)
+        """Called after the library changes. MacroStore journals each edit as it
+        happens, so this only drops derived caches."""
+        self._compiled_macros.clear()
+        self._macros_digest = None
 
     def _get_macro_steps(self, name):
         """Get steps from a macro, handling both v1 (array) and v2 (object) formats."""
@@ -1051,6 +3546,27 @@ class AppController(AppKit.NSObject):
                 return tuple(res)
         return None
 
+    def _get_macro_all_screens(self, name):
+        """Whether a v2 macro asks for find/smart-click across all displays."""
+        macro = self.macros.get(name)
+        return isinstance(macro, dict) and bool(macro.get("all_screens"))
+
+    def _get_macro_match_mode(self, name):
+        """find-image mode a v2 macro asks for: "features", "fast" or None."""
+        macro = self.macros.get(name)
+        if not isinstance(macro, dict):
+            return None
+        if macro.get("feature_match"):
+            return "features"
+        return "fast" if macro.get("fast_match") else None
+
+    def _get_macro_target(self, name):
+        """(app, title) a v2 macro binds its captures to, or None."""
+        macro = self.macros.get(name)
+        if not isinstance(macro, dict) or not macro.get("target"):
+            return None
+        return self._parse_target(str(macro["target"]))
+
     def _get_macro_version(self, name):
         """Get macro version (1 for array format, 2+ for object format)."""
         macro = self.macros.get(name)
@@ -1091,6 +3607,7 @@ class AppController(AppKit.NSObject):
         )
         # Track time for wait insertion
         self._recording_last_action_time = time.time()
+        self._recording_span = self.tracer.start("recording", None, macro=name)
         # Start global mouse click monitoring
         self._start_recording_mouse_monitor()
         res_str = f"{self._recording_resolution[0]}x{self._recording_resolution[1]}"
@@ -1104,24 +3621,34 @@ class AppController(AppKit.NSObject):
             self.command_bar.set_status("Not recording")
             return
         name = self._recording_name
+        steps, changes, _ = self._optimize_steps(list(self._recording_steps))
         # Save in v2 format with resolution metadata
         resolution = getattr(self, "_recording_resolution", None)
         if resolution:
-            self.macros[name] = {
+            macro = {
                 "v": 2,
                 "resolution": list(resolution),
-                "steps": list(self._recording_steps),
+                "steps": steps,
             }
+            if self._target is not None:
+                # Replays capture the same window the macro was recorded against.
+                macro["target"] = self._describe_target(self._target)
+            self.macros[name] = macro
         else:
             # Fallback to v1 if no resolution captured
-            self.macros[name] = list(self._recording_steps)
+            self.macros[name] = steps
         self._save_macros()
-        count = len(self._recording_steps)
+        self.tracer.end(self._recording_span, steps=len(steps))
+        self._recording_span = None
         self._recording_name = None
         self._recording_steps = []
         self._recording_resolution = None
         self._recording_last_action_time = None
-        self.command_bar.set_status(f"Saved macro {name} ({count} steps)")
+        status = f"Saved macro {name} ({len(steps)} steps)"
+        if changes:
+            saved = sum(seconds for _, seconds in changes)
+            status += f", optimized: {len(changes)} change(s), ~{saved:.1f}s faster"
+        self.command_bar.set_status(status)
 
     def _start_recording_mouse_monitor(self):
         """Start global mouse click monitoring for recording."""
@@ -1184,43 +3711,131 @@ class AppController(AppKit.NSObject):
         click_count = event.clickCount()
         print(f"DEBUG _handle_recording_mouse_click: click at ({click_x}, {click_y}), button={button}, clickCount={click_count}")
 
-        # Run OCR and record the click in the background
-        def do_record():
-            self._record_click_with_ocr(click_x, click_y, button, click_count)
+        # Grab the pre-click neighborhood now; OCR and recording happen in the background
+        roi = self._capture_click_roi(click_screen, click_x, click_y)
+        self._queue_recording_click((click_x, click_y, button, click_count, now, roi))
 
-        # Use a thread to avoid blocking
-        threading.Thread(target=do_record, daemon=True).start()
+    def _capture_click_roi(self, screen, click_x, click_y):
+        """Synchronously capture a small region around a recorded click.
 
-    def _record_click_with_ocr(self, click_x, click_y, button="left", click_count=1):
-        """Capture screen, run OCR, and record a click at the given position."""
+        Runs in the click handler so the image shows the screen as it was
+        before the click took effect. Returns None if the capture is refused
+        (permission, memory cap); the click is then recorded by coordinates.
+        """
+        frame = screen.frame()
+        roi_w = min(RECORD_ROI_SIZE[0], frame.size.width)
+        roi_h = min(RECORD_ROI_SIZE[1], frame.size.height)
+        left = min(max(click_x - roi_w / 2.0, 0.0), frame.size.width - roi_w)
+        top = min(max(click_y - roi_h / 2.0, 0.0), frame.size.height - roi_h)
+        # Cocoa frames are bottom-left based; Quartz global space is top-left of the primary display.
+        primary_h = AppKit.NSScreen.screens()[0].frame().size.height
+        rect = Quartz.CGRectMake(
+            frame.origin.x + left,
+            primary_h - (frame.origin.y + frame.size.height) + top,
+            roi_w,
+            roi_h,
+        )
+        parent = self._recording_span
         try:
-            # Capture screen
-            display_id = self._active_display_id
-            screen_size = (self.screen_frame.size.width, self.screen_frame.size.height)
-            cg_image, width_px, height_px, scale, bounds_px = self.ocr_engine.capture_display(
-                display_id, screen_size
+            with self.tracer.span("capture-roi", parent, width=roi_w, height=roi_h):
+                image, width_px, height_px, scale = self.ocr_engine.capture_region(rect)
+            nbytes = Quartz.CGImageGetBytesPerRow(image) * height_px
+            self.capture_pool.charge(nbytes, timeout=0)
+        except (PermissionError, MemoryError) as exc:
+            print(f"Click region capture skipped: {exc}")
+            return None
+        except Exception as exc:
+            # Never let a capture error escape into the event monitor.
+            print(f"Click region capture failed: {exc}")
+            return None
+        return {
+            "trace_parent": parent,
+            "image": image,
+            "width_px": width_px,
+            "height_px": height_px,
+            "scale": scale,
+            "bytes": nbytes,
+            "x": click_x - left,
+            "y": click_y - top,
+            "width": roi_w,
+        }
+
+    def _text_under_roi_click(self, roi):
+        """OCR a click region and return the text under the click (or None)."""
+        try:
+            with objc.autorelease_pool():
+                with self.tracer.span("ocr-roi", roi["trace_parent"]) as ocr_span:
+                    ocr_items = self.ocr_engine.recognize_text(
+                        roi.pop("image"), roi["width_px"], roi["height_px"], roi["scale"]
+                    )
+                    ocr_span.args["items"] = len(ocr_items)
+        finally:
+            self.capture_pool.uncharge(roi["bytes"])
+        # Innermost (smallest) box under the cursor wins over enclosing ones.
+        hits = ocr_items.hit_test(roi["x"], roi["y"], 10)
+        if not len(hits):
+            return None
+        index = int(hits[0])
+        text = ocr_items.text(index)
+        # A line running past the region edge has its outer words cut off;
+        # keep only the words fully inside so the anchor is still findable.
+        margin = 2.0
+        lo, hi = ocr_items.word_first[index], ocr_items.word_first[index + 1]
+        inside = [
+            (start, end)
+            for (start, end), (x, _, w, _) in zip(
+                ocr_items.word_spans[lo:hi].tolist(), ocr_items.word_boxes[lo:hi].tolist()
             )
+            if x > margin and x + w < roi["width"] - margin
+        ]
+        if inside and len(inside) < hi - lo:
+            text = text[inside[0][0]:inside[-1][1]]
+        return text
+
+    def _queue_recording_click(self, click):
+        """Hand a click to the recording worker, starting it if idle."""
+        with self._recording_lock:
+            self._recording_clicks.append(click)
+            if self._recording_worker_active:
+                return
+            self._recording_worker_active = True
+        threading.Thread(target=self._recording_worker, daemon=True).start()
 
-            # Run OCR
-            ocr_items = self.ocr_engine.recognize_text(cg_image, width_px, height_px, scale)
-
-            # Find text under the click (with some tolerance)
-            tolerance = 10  # pixels tolerance for "under" detection
-            text_under_click = None
+    def _recording_worker(self):
+        """Single background worker for recorded clicks.
 
-            for item in ocr_items:
-                bbox = item["bbox"]  # (x, y, w, h) in points
-                bx, by, bw, bh = bbox
-                # Check if click is within or near this text's bounding box
-                if (bx - tolerance <= click_x <= bx + bw + tolerance and
-                    by - tolerance <= click_y <= by + bh + tolerance):
-                    text_under_click = item
-                    break
+        Clicks are OCR'd one at a time in click order, so steps are appended
+        in order no matter how quickly they arrive.
+        """
+        while True:
+            with self._recording_lock:
+                if not self._recording_clicks:
+                    self._recording_worker_active = False
+                    return
+                click = self._recording_clicks.popleft()
+            self._record_click_with_ocr(*click)
 
-            # Insert wait step if needed
+    def _record_click_with_ocr(self, click_x, click_y, button="left", click_count=1, clicked_at=None, roi=None):
+        """Record a click, anchored on the text OCR'd from its click-time region."""
+        try:
+            # Find text under the click in the pre-click region
+            text_under_click = None
+            if roi is not None:
+                try:
+                    text = self._text_under_roi_click(roi)
+                except Exception as exc:
+                    # Still record the click, just without a text anchor.
+                    print(f"Click region OCR failed: {exc}")
+                    text = None
+                if text:
+                    text_under_click = {"text": text}
+
+            # Insert wait step if needed (timed between clicks, not OCR runs)
+            if clicked_at is None:
+                clicked_at = time.time()
             last_time = getattr(self, "_recording_last_action_time", None)
             if last_time is not None:
-                elapsed = time.time() - last_time
+                elapsed = clicked_at - last_time
                 if elapsed > 0.5:
                     wait_time = min(10.0, round(elapsed * 2) / 2)
                     self._recording_steps.append(f"wait {wait_time:.1f}")
@@ -1258,7 +3873,7 @@ class AppController(AppKit.NSObject):
                 print(f"DEBUG: Recorded absolute {click_type} at ({x_pct:.4f}, {y_pct:.4f})")
 
             self._recording_steps.append(step)
-            self._recording_last_action_time = time.time()
+            self._recording_last_action_time = clicked_at
 
             # Update status on main thread
             click_desc = "double-click" if is_double else f"{button} click"
@@ -1380,8 +3995,14 @@ class AppController(AppKit.NSObject):
         # Now run find-image to show matches
         self._find_image(name)
 
-    def _find_image(self, name):
-        """Find a saved image template on screen using template matching."""
+    def _find_image(self, name, mode=None):
+        """Find a saved image template on screen using template matching.
+
+        Mode "fast" matches grayscale frames, skipping flat windows (which
+        cannot correlate) when most of the frame is flat (see `_correlate_pruned`). Mode "features"
+        locates the template by keypoint descriptors (see `_match_features`),
+        falling back to pixel matching for templates with too little texture.
+        """
         name = self._normalize_macro_name(name)
         if not name:
             self.command_bar.set_status("Missing image name")
@@ -1394,15 +4015,208 @@ class AppController(AppKit.NSObject):
             return
         self._macro_wait_reason = "find-image"
         self.command_bar.set_status(f"Finding '{name}'...")
-        # Load template
-        template = cv2.imread(image_path, cv2.IMREAD_COLOR)
-        if template is None:
+        pyramid = self._load_template_pyramid(name)
+        if pyramid is None:
             self.command_bar.set_status(f"Failed to load image: {name}")
             if self._macro_wait_reason == "find-image":
                 self._abort_macro(f"Failed to load image: {name}")
             return
-        template_h, template_w = template.shape[:2]
-        # Capture screen
+        trace_parent = self._trace_parent()
+        try:
+            with self.tracer.span("capture", trace_parent, display=self._active_display_id):
+                screen_bgr, (dx, dy), scale = self._capture_target_bgr()
+        except (LookupError, MemoryError) as exc:
+            message = f"Capture busy: {exc}" if isinstance(exc, MemoryError) else str(exc)
+            self.command_bar.set_status(message)
+            if self._macro_wait_reason == "find-image":
+                self._abort_macro(message)
+            return
+        if screen_bgr is None:
+            self.command_bar.set_status("Screen capture failed")
+            if self._macro_wait_reason == "find-image":
+                self._abort_macro("Screen capture failed")
+            return
+        try:
+            with self.tracer.span("match", trace_parent, image=name, mode=mode or "pixel") as match_span:
+                filtered = None
+                if mode == "features":
+                    filtered = self._match_features(name, screen_bgr, info=match_span.args, scale=scale)
+                if filtered is None:
+                    filtered = self._match_template(
+                        name,
+                        screen_bgr,
+                        pyramid["bgr"],
+                        template_gray=pyramid["gray"] if mode == "fast" else None,
+                        info=match_span.args,
+                        scale=scale,
+                    )
+                for match in filtered:
+                    x, y, w, h = match["bbox"]
+                    match["bbox"] = (x + dx, y + dy, w, h)
+                matches = self._order_matches_by_anchor(filtered[:9])
+                match_span.args["matches"] = len(matches)
+        finally:
+            self.capture_pool.release(screen_bgr)
+        self.matches = matches
+        self.overlay.show_matches(matches, self.screen_height)
+        self._emit_event("matches", query=name, matches=self._matches_payload(matches))
+        self.command_bar.set_status(f"Found {len(matches)} matches")
+        if self._macro_running and self._macro_wait_reason == "find-image":
+            self._macro_step_complete()
+
+    def _load_template(self, name):
+        """Load a saved template (BGR), reusing the decoded image until the file changes."""
+        pyramid = self._load_template_pyramid(name)
+        return None if pyramid is None else pyramid["bgr"]
+
+    def _template_disk_key(self, image_path, stat):
+        return hashlib.blake2b(
+            f"{os.path.abspath(image_path)}:{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8"),
+            digest_size=16,
+        ).hexdigest()
+
+    def _load_template_features(self, name):
+        """TemplateFeatures for a saved image, cached like `_load_template_pyramid`."""
+        image_path = os.path.join(self.images_path, f"{name}.png")
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        cached = self._feature_cache.get(name)
+        self.metrics.cache("features", cached is not None and cached[0] == stat.st_mtime)
+        if cached is not None and cached[0] == stat.st_mtime:
+            return cached[1]
+        disk_key = self._template_disk_key(image_path, stat)
+        entry = self.disk_cache.get("features", disk_key)
+        if entry is not None:
+            features = TemplateFeatures.from_arrays(entry[1])
+        else:
+            pyramid = self._load_template_pyramid(name)
+            if pyramid is None:
+                return None
+            features = TemplateFeatures.compute(pyramid["gray"])
+            self.disk_cache.put("features", disk_key, {"name": name}, features.to_arrays())
+        self._feature_cache[name] = (stat.st_mtime, features)
+        return features
+
+    def _index_template_features(self):
+        """Describe every saved image up front so the first `--features` lookup is cheap."""
+        if not os.path.isdir(self.images_path):
+            return
+        for filename in sorted(os.listdir(self.images_path)):
+            if filename.endswith(".png"):
+                self._load_template_features(filename[:-4])
+
+    def _frame_features(self, screen_bgr):
+        """ORB (points, descriptors) of a frame, reused while the screen is unchanged."""
+        key = self._frame_key(screen_bgr)
+        with self._spectrum_lock:
+            memo = self._frame_features_memo
+            if memo is not None and memo[0] == key:
+                self.metrics.cache("frame-features", True)
+                return memo[1]
+        self.metrics.cache("frame-features", False)
+        gray = cv2.cvtColor(screen_bgr, cv2.COLOR_BGR2GRAY)
+        keypoints, descriptors = TemplateFeatures.detector(FEATURE_FRAME_KEYPOINTS).detectAndCompute(gray, None)
+        points = np.float32([kp.pt for kp in keypoints]).reshape(-1, 2)
+        with self._spectrum_lock:
+            self._frame_features_memo = (key, (points, descriptors))
+        return points, descriptors
+
+    def _match_features(self, name, screen_bgr, info=None, scale=None):
+        """Locate a template by keypoints; returns matches (at most one) or None.
+
+        Only one copy is ever returned, even when the template is on screen
+        several times (see `TemplateFeatures.locate_all`): of the copies
+        located, the one closest to the anchor. None means the template has
+        too few keypoints to be located this way.
+        """
+        features = self._load_template_features(name)
+        if features is None or features.keypoints < FEATURE_MIN_INLIERS:
+            if info is not None:
+                info["features"] = "too-few-keypoints"
+            return None
+        points, descriptors = self._frame_features(screen_bgr)
+        found = features.locate_all(points, descriptors)
+        self.metrics.incr("match.features")
+        if info is not None:
+            info["keypoints"] = len(points)
+        if not found:
+            if info is not None:
+                info["inliers"] = 0
+            return []
+        scale = scale or screen_bgr.shape[1] / self.screen_frame.size.width
+        matches = []
+        for inliers, corners in found:
+            x0, y0 = corners.min(axis=0)
+            x1, y1 = corners.max(axis=0)
+            bbox = (
+                float(x0) / scale,
+                float(y0) / scale,
+                float(x1 - x0) / scale,
+                float(y1 - y0) / scale,
+            )
+            matches.append({"text": name, "bbox": bbox, "query": name, "type": "image", "inliers": inliers})
+        match = self._order_matches_by_anchor(matches)[0]
+        inliers = match.pop("inliers")
+        if info is not None:
+            info["inliers"] = inliers
+        return [match]
+
+    def _load_template_pyramid(self, name):
+        """Decoded template plus preprocessed levels: bgr, gray and gray_half.
+
+        Cached in memory by file mtime and on disk by file identity, so the PNG
+        is decoded once per edit rather than once per process.
+        """
+        image_path = os.path.join(self.images_path, f"{name}.png")
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        mtime = stat.st_mtime
+        cached = self._template_cache.get(name)
+        self.metrics.cache("template", cached is not None and cached[0] == mtime)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        disk_key = self._template_disk_key(image_path, stat)
+        entry = self.disk_cache.get("templates", disk_key)
+        self.metrics.cache("template-disk", entry is not None)
+        if entry is not None:
+            pyramid = entry[1]
+        else:
+            template = cv2.imread(image_path, cv2.IMREAD_COLOR)
+            if template is None:
+                return None
+            gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+            pyramid = {"bgr": template, "gray": gray, "gray_half": cv2.pyrDown(gray)}
+            self.disk_cache.put("templates", disk_key, {"name": name}, pyramid)
+        self._template_cache[name] = (mtime, pyramid)
+        return pyramid
+
+    def _capture_target_bgr(self):
+        """Capture the target window, else the active display, as BGR.
+
+        Returns (bgr or None, (dx, dy), scale): the frame's offset in active-screen
+        points and its pixels per point. Raises LookupError if the target has no
+        window on screen, and MemoryError (without waiting: this runs on the
+        main thread) if the capture pool is full.
+        """
+        if self._simulation is not None:
+            return self._simulation_frame()
+        window, offset = self._target_window()
+        if window is None:
+            bgr = self._capture_screen_bgr()
+            scale = None if bgr is None else bgr.shape[1] / self.screen_frame.size.width
+            return bgr, (0.0, 0.0), scale
+        try:
+            image, _, _, scale = self.ocr_engine.capture_window(window)
+        except PermissionError:
+            return None, offset, None
+        return self._cgimage_to_bgr(image), offset, scale
+
+    def _capture_screen_bgr(self, timeout=0):
+        """Capture the active display as a BGR numpy array (None on failure)."""
         display_id = self._active_display_id
         screen_bounds = Quartz.CGDisplayBounds(display_id)
         screen_image = Quartz.CGWindowListCreateImage(
@@ -1412,28 +4226,57 @@ class AppController(AppKit.NSObject):
             Quartz.kCGWindowImageDefault,
         )
         if screen_image is None:
-            self.command_bar.set_status("Screen capture failed")
-            if self._macro_wait_reason == "find-image":
-                self._abort_macro("Screen capture failed")
-            return
+            return None
+        return self._cgimage_to_bgr(screen_image, timeout)
+
+    def _cgimage_to_bgr(self, screen_image, timeout=0):
+        """Copy a BGRA CGImage into a pooled BGR array.
+
+        Raises MemoryError if the pool cannot make room within `timeout`
+        seconds; the default never blocks, so main-thread callers fail fast.
+        """
         # Convert CGImage to numpy array
         width = Quartz.CGImageGetWidth(screen_image)
         height = Quartz.CGImageGetHeight(screen_image)
         bytes_per_row = Quartz.CGImageGetBytesPerRow(screen_image)
-        data_provider = Quartz.CGImageGetDataProvider(screen_image)
-        data = Quartz.CGDataProviderCopyData(data_provider)
-        arr = np.frombuffer(data, dtype=np.uint8)
-        arr = arr.reshape((height, bytes_per_row // 4, 4))
-        # CGWindowListCreateImage returns BGRA format on macOS (little-endian with alpha first)
-        # Extract first 3 channels to get BGR, which matches cv2.imread format
-        screen_bgr = arr[:, :width, :3].copy()
+        # The CGImage and its copied bytes are charged while we convert;
+        # the BGR result comes from (and goes back to) the pool.
+        with self.capture_pool.hold(height * bytes_per_row, timeout=timeout):
+            data_provider = Quartz.CGImageGetDataProvider(screen_image)
+            data = Quartz.CGDataProviderCopyData(data_provider)
+            screen_image = None
+            arr = np.frombuffer(data, dtype=np.uint8)
+            arr = arr.reshape((height, bytes_per_row // 4, 4))
+            bgr = self.capture_pool.acquire((height, width, 3), timeout=timeout)
+            # CGWindowListCreateImage returns BGRA format on macOS (little-endian with alpha first)
+            # Extract first 3 channels to get BGR, which matches cv2.imread format
+            np.copyto(bgr, arr[:, :width, :3])
+            del arr, data
+        return bgr
+
+    def _match_template(self, name, screen_bgr, template, template_gray=None, info=None, scale=None):
+        """Match `template` against a BGR screen frame; returns deduplicated matches.
+
+        Passing `template_gray` selects the fast grayscale path. `info`, if
+        given, receives the fraction of windows pruned. `scale` is the frame's
+        pixels per point (default: a full capture of the active screen).
+        """
+        template_h, template_w = template.shape[:2]
+        width = screen_bgr.shape[1]
         # Template matching
-        result = cv2.matchTemplate(screen_bgr, template, cv2.TM_CCOEFF_NORMED)
-        threshold = 0.8
+        if template_gray is None:
+            result = self._correlate(screen_bgr, template, info)
+        else:
+            screen_gray = cv2.cvtColor(screen_bgr, cv2.COLOR_BGR2GRAY)
+            result, pruned = self._correlate_pruned(screen_gray, template_gray)
+            self.metrics.incr("match.fast")
+            if info is not None:
+                info["pruned"] = round(pruned, 4)
+        threshold = MATCH_THRESHOLD
         locations = np.where(result >= threshold)
         matches = []
         # Convert to screen coordinates (accounting for Retina scale)
-        scale = width / self.screen_frame.size.width
+        scale = scale or width / self.screen_frame.size.width
         for pt in zip(*locations[::-1]):  # Switch to (x, y)
             x_pt = pt[0] / scale
             y_pt = pt[1] / scale
@@ -1452,12 +4295,165 @@ class AppController(AppKit.NSObject):
                     break
             if not duplicate:
                 filtered.append(m)
-        matches = self._order_matches_by_anchor(filtered[:9])
-        self.matches = matches
-        self.overlay.show_matches(matches, self.screen_height)
-        self.command_bar.set_status(f"Found {len(matches)} matches")
-        if self._macro_running and self._macro_wait_reason == "find-image":
-            self._macro_step_complete()
+        return filtered
+
+    def _correlate(self, frame, template, info=None):
+        """TM_CCOEFF_NORMED via cv2.matchTemplate or the frame's spectrum, whichever is cheaper.
+
+        Both are priced in DFT butterflies: cv2.matchTemplate transforms the
+        frame block by block (see `_match_template_cost`), the FFT path does
+        one transform per template channel and one inverse over the padded
+        frame. The FFT path is only taken with a spectrum that is already
+        built (see `_frame_spectrum`), and its working memory is charged to
+        the capture pool; when that is full, cv2.matchTemplate runs instead.
+        """
+        template_h, template_w = template.shape[:2]
+        rows = frame.shape[0] - template_h + 1
+        cols = frame.shape[1] - template_w + 1
+        spectrum = None
+        if rows > 0 and cols > 0:
+            channels = 1 if frame.ndim == 2 else frame.shape[2]
+            dft_h, dft_w = FrameSpectrum.dft_size(frame.shape)
+            transform = dft_h * dft_w * float(np.log2(dft_h * dft_w))
+            direct = self._match_template_cost(frame.shape, template.shape)
+            if MATCH_FFT_COST * (channels + 1) * transform < direct:
+                spectrum = self._frame_spectrum(frame)
+        result = None
+        if spectrum is not None:
+            try:
+                with self.capture_pool.hold(spectrum.match_bytes(template.shape), timeout=0):
+                    result = spectrum.ccoeff_normed(frame, template)
+            except MemoryError:
+                pass
+        engine = "spatial" if result is None else "fft"
+        self.metrics.incr(f"match.{engine}")
+        if info is not None:
+            info["engine"] = engine
+        if result is None:
+            result = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+        return result
+
+    @staticmethod
+    def _match_template_cost(frame_shape, template_shape):
+        """DFT butterflies cv2.matchTemplate spends, following its block-wise crossCorr.
+
+        OpenCV correlates blocks of about 4.5x the template (at least 256 px
+        with the template) and transforms each block forward and back per
+        channel.
+        """
+        template_h, template_w = template_shape[:2]
+        rows = frame_shape[0] - template_h + 1
+        cols = frame_shape[1] - template_w + 1
+        channels = 1 if len(frame_shape) == 2 else frame_shape[2]
+        block_h = min(max(round(template_h * 4.5), 256 - template_h + 1), rows)
+        block_w = min(max(round(template_w * 4.5), 256 - template_w + 1), cols)
+        dft_h = cv2.getOptimalDFTSize(block_h + template_h - 1)
+        dft_w = cv2.getOptimalDFTSize(block_w + template_w - 1)
+        blocks = -(-rows // block_h) * -(-cols // block_w)
+        return blocks * 2 * channels * dft_h * dft_w * float(np.log2(dft_h * dft_w))
+
+    def _frame_key(self, frame):
+        digest = hashlib.blake2b(np.ascontiguousarray(frame), digest_size=16)
+        digest.update(repr(frame.shape).encode("ascii"))
+        return digest.digest()
+
+    def _frame_spectrum(self, frame):
+        """The cached FrameSpectrum for `frame`, or None.
+
+        Keyed by a hash of the pixels; only the latest frame is kept, and its
+        spectra are charged to the capture pool. A frame seen for the first
+        time only gets noted, so a one-off match never pays for a transform it
+        cannot reuse. The spectrum is built when the same frame is matched
+        again (a second image, or a repeated `find-image` on an unchanged
+        screen), and returned from the next match on.
+        """
+        key = self._frame_key(frame)
+        with self._spectrum_lock:
+            memo = self._spectrum_memo
+            if memo is not None and memo[0] == key:
+                self.metrics.cache("spectrum", True)
+                return memo[1]
+            seen, self._spectrum_seen = self._spectrum_seen, key
+        self.metrics.cache("spectrum", False)
+        if seen != key:
+            return None
+        height, width = FrameSpectrum.dft_size(frame.shape)
+        channels = 1 if frame.ndim == 2 else frame.shape[2]
+        # The spectra, plus the padded plane they are transformed from.
+        nbytes = (channels + 1) * height * width * 4
+        try:
+            self.capture_pool.charge(nbytes, timeout=0)
+        except MemoryError:
+            return None
+        spectrum = FrameSpectrum(frame)
+        self.capture_pool.uncharge(nbytes - spectrum.nbytes)
+        with self._spectrum_lock:
+            previous, self._spectrum_memo = self._spectrum_memo, (key, spectrum)
+        if previous is not None:
+            self.capture_pool.uncharge(previous[1].nbytes)
+        return None
+
+    def _correlate_pruned(self, screen_gray, template_gray):
+        """TM_CCOEFF_NORMED over the windows that are not flat.
+
+        A window is flat if none of its pixels differs from its right
+        neighbour (within the window) or its lower neighbour, so one integral
+        of that edge mask tests every window in O(1). The lower neighbour of
+        the last row lies just outside the window, which can only keep a flat
+        window, never skip one that is not. Flat windows have no defined
+        correlation and are skipped (they read -1); the score is
+        contrast-invariant, so every other window is kept. Matching the
+        survivors block by block only beats one full cv2.matchTemplate when
+        few are left, so below FAST_MATCH_MIN_PRUNED the whole frame is
+        matched instead. Returns (result, pruned_fraction).
+        """
+        template_h, template_w = template_gray.shape
+        rows = screen_gray.shape[0] - template_h + 1
+        cols = screen_gray.shape[1] - template_w + 1
+        if rows <= 0 or cols <= 0 or template_h < 2 or template_w < 2 or not np.ptp(template_gray):
+            # Flat and single-line templates: nothing to gain, keep OpenCV's answer.
+            return cv2.matchTemplate(screen_gray, template_gray, cv2.TM_CCOEFF_NORMED), 0.0
+        edges = np.zeros(screen_gray.shape, dtype=np.uint8)
+        np.not_equal(screen_gray[:, 1:], screen_gray[:, :-1], out=edges[:, :-1], casting="unsafe")
+        edges[:-1] |= screen_gray[1:] != screen_gray[:-1]
+        table = cv2.integral(edges)
+        h, w = template_h, template_w - 1
+
+        def live(step):
+            return (
+                table[h:h + rows:step, w:w + cols:step]
+                - table[:rows:step, w:w + cols:step]
+                - table[h:h + rows:step, :cols:step]
+                + table[:rows:step, :cols:step]
+            ) > 0
+
+        # Decide on every 4th window in each direction before the full mask.
+        if 1.0 - float(np.mean(live(4))) < FAST_MATCH_MIN_PRUNED:
+            return cv2.matchTemplate(screen_gray, template_gray, cv2.TM_CCOEFF_NORMED), 0.0
+        mask = live(1)
+        pruned = 1.0 - np.count_nonzero(mask) / float(rows * cols)
+        result = np.full((rows, cols), -1.0, dtype=np.float32)
+        live_rows = np.flatnonzero(mask.any(axis=1))
+        if live_rows.size == 0:
+            return result, pruned
+        # Split into runs of live rows, then live columns within each run.
+        # Gaps shorter than the template would re-read the same pixels, so
+        # they stay inside one block.
+        for r0, r1 in self._live_runs(live_rows, template_h):
+            run_mask = mask[r0:r1]
+            for c0, c1 in self._live_runs(np.flatnonzero(run_mask.any(axis=0)), template_w):
+                patch = screen_gray[r0:r1 + template_h - 1, c0:c1 + template_w - 1]
+                scores = cv2.matchTemplate(patch, template_gray, cv2.TM_CCOEFF_NORMED)
+                result[r0:r1, c0:c1] = np.where(run_mask[:, c0:c1], scores, -1.0)
+        return result, pruned
+
+    @staticmethod
+    def _live_runs(indices, gap):
+        """Sorted indices -> [(start, stop)] blocks, merging gaps up to `gap`."""
+        breaks = np.flatnonzero(np.diff(indices) > gap)
+        starts = np.concatenate(([indices[0]], indices[breaks + 1]))
+        stops = np.concatenate((indices[breaks], [indices[-1]])) + 1
+        return [(int(a), int(b)) for a, b in zip(starts, stops)]
 
     def _list_images(self):
         """List all saved image templates."""
@@ -1484,6 +4480,8 @@ class AppController(AppKit.NSObject):
             self.command_bar.set_status(f"Image not found: {name}")
             return
         os.remove(image_path)
+        self._template_cache.pop(name, None)
+        self._feature_cache.pop(name, None)
         self.command_bar.set_status(f"Deleted image: {name}")
 
     def _run_macro(self, name):
@@ -1504,6 +4502,13 @@ class AppController(AppKit.NSObject):
         if not steps:
             self.command_bar.set_status(f"Macro empty: {name}")
             return
+        self._check_macro_resolution(name)
+        expanded = self._expand_macro(name)
+        if expanded is None:
+            return
+        self._start_macro(name, expanded)
+
+    def _check_macro_resolution(self, name):
         # Check resolution for v2 macros
         recorded_res = self._get_macro_resolution(name)
         if recorded_res:
@@ -1515,78 +4520,371 @@ class AppController(AppKit.NSObject):
                 self.command_bar.set_status(
                     f"Resolution: {recorded_res[0]}x{recorded_res[1]} → {current_res[0]}x{current_res[1]}"
                 )
-        expanded = self._expand_macro(name)
-        if expanded is None:
-            return
+
+    def _start_macro(self, name, queue, status=None):
         self._macro_name = name
         self._macro_root = name
-        self._macro_queue = expanded
+        self._macro_queue = queue
         self._macro_running = True
         self._macro_wait_reason = None
-        self.command_bar.set_status(f"Running {name}")
+        self._macro_step_index = 0
+        self._macro_all_screens = self._get_macro_all_screens(name)
+        self._macro_match_mode = self._get_macro_match_mode(name)
+        self._macro_target = self._get_macro_target(name)
+        self._trace_finish_command()
+        self._trace_root = self.tracer.start("macro", macro=name)
+        self.command_bar.set_status(status or f"Running {name}")
         self._run_next_macro_step()
 
-    def _expand_macro(self, name):
-        name = self._normalize_macro_name(name)
+    def _compile_macro(self, name, stack=()):
+        """Flatten a macro with nested `run` steps inlined.
+
+        Results for top-level macros are cached until the macro set changes.
+        `run` steps whose target contains a {placeholder} are left for runtime.
+        Raises ValueError for missing macros, recursion or nesting > 5.
+        """
+        if not stack:
+            cached = self._compiled_macros.get(name)
+            self.metrics.cache("compiled-macro", cached is not None)
+            if cached is not None:
+                return cached
+            disk_key = self._compiled_macro_key(name)
+            entry = self.disk_cache.get("macros", disk_key)
+            self.metrics.cache("compiled-macro-disk", entry is not None)
+            if entry is not None:
+                self._compiled_macros[name] = entry[0]["steps"]
+                return entry[0]["steps"]
         if name not in self.macros:
-            self.command_bar.set_status("Macro not found")
-            return None
-        steps = self._get_macro_steps(name)
-        if name in self._macro_stack:
-            self._abort_macro("Macro recursion detected")
-            return None
-        if len(self._macro_stack) >= 5:
-            self._abort_macro("Macro nesting too deep")
-            return None
-        self._macro_stack.append(name)
-        return list(steps) + [f"__macro_end__ {name}"]
+            raise ValueError(f"Macro not found: {name}")
+        if name in stack:
+            raise ValueError("Macro recursion detected")
+        if len(stack) >= 5:
+            raise ValueError("Macro nesting too deep")
+        steps = []
+        for step in self._get_macro_steps(name):
+            parts = step.strip().split(" ", 1)
+            if parts[0].lower() == "run" and len(parts) > 1 and "{" not in parts[1]:
+                nested = self._normalize_macro_name(parts[1])
+                steps.extend(self._compile_macro(nested, stack + (name,)))
+            else:
+                steps.append(step)
+        if not stack:
+            self._compiled_macros[name] = steps
+            self.disk_cache.put("macros", disk_key, {"name": name, "steps": steps})
+        return steps
 
-    def _normalize_macro_name(self, name):
-        if not name:
-            return ""
-        cleaned = name.strip()
-        if len(cleaned) >= 2:
-            pairs = [
-                ('"', '"'),
-                ("'", "'"),
-                ("“", "”"),
-                ("‘", "’"),
-            ]
-            for left, right in pairs:
-                if cleaned.startswith(left) and cleaned.endswith(right):
-                    cleaned = cleaned[1:-1].strip()
-                    break
-        return cleaned
+    def _compiled_macro_key(self, name):
+        """Disk key for a compiled macro: its name plus a hash of the macro library.
 
-    def _run_next_macro_step(self):
-        if not self._macro_running:
-            return
-        if not self._macro_queue:
-            name = self._macro_root or "macro"
-            self._macro_running = False
-            self._macro_name = None
-            self._macro_root = None
-            self._macro_wait_reason = None
-            self._macro_stack = []
-            self.command_bar.set_status(f"Macro complete: {name}")
+        Any saved change to the library yields new keys; stale entries age out
+        through the cache's LRU eviction.
+        """
+        if self._macros_digest is None:
+            library = json.dumps(dict(self.macros), sort_keys=True).encode("utf-8")
+            self._macros_digest = hashlib.blake2b(library, digest_size=16).hexdigest()
+        return hashlib.blake2b(
+            f"{self._macros_digest}:{name}".encode("utf-8"), digest_size=16
+        ).hexdigest()
+
+    def _macro_version(self, name):
+        """Short hash of a macro's flattened steps; `profile` keeps history per version."""
+        try:
+            steps = self._compile_macro(name)
+        except ValueError:
+            steps = self._get_macro_steps(name)
+        return hashlib.blake2b(json.dumps(steps).encode("utf-8"), digest_size=6).hexdigest()
+
+    def _apply_macro_params(self, step):
+        """Substitute {key} placeholders from the current batch item."""
+        params = self._macro_params
+
+        def replace(match):
+            key = match.group(1)
+            return str(params[key]) if key in params else match.group(0)
+
+        return re.sub(r"\{(\w+)\}", replace, step)
+
+    def _load_worklist(self, path):
+        """Read batch items: .json (list), .csv/.tsv (header row) or one item per line."""
+        ext = os.path.splitext(path)[1].lower()
+        with open(path, "r", encoding="utf-8", newline="") as handle:
+            if ext == ".json":
+                data = json.load(handle)
+                if not isinstance(data, list):
+                    raise ValueError("JSON worklist must be a list")
+                return [row if isinstance(row, dict) else {"item": str(row)} for row in data]
+            if ext in (".csv", ".tsv"):
+                reader = csv.DictReader(handle, delimiter="\t" if ext == ".tsv" else ",")
+                return [
+                    {key.strip(): (value or "").strip() for key, value in row.items() if key}
+                    for row in reader
+                ]
+            return [
+                {"item": line.strip()}
+                for line in handle
+                if line.strip() and not line.lstrip().startswith("#")
+            ]
+
+    def _run_batch(self, arg):
+        """Run one macro per worklist item: run-batch <macro> <worklist>."""
+        try:
+            parts = shlex.split(arg or "")
+        except ValueError:
+            parts = (arg or "").split()
+        if len(parts) < 2:
+            self.command_bar.set_status("Usage: run-batch <macro> <worklist>")
+            return
+        name = self._normalize_macro_name(parts[0])
+        path = os.path.expanduser(" ".join(parts[1:]))
+        if not os.path.isabs(path) and not os.path.exists(path):
+            path = os.path.join(os.path.dirname(self.macros_path), path)
+        if self._recording_name is not None:
+            self.command_bar.set_status("Stop recording first")
+            return
+        if self._macro_running or self._batch is not None:
+            self.command_bar.set_status("Macro already running")
+            return
+        try:
+            items = self._load_worklist(path)
+        except (OSError, ValueError, csv.Error) as exc:
+            self.command_bar.set_status(f"Worklist error: {exc}")
             return
-        step = self._macro_queue.pop(0)
-        self._execute_macro_step(step)
-        if self._macro_running and self._macro_wait_reason is None:
+        if not items:
+            self.command_bar.set_status("Worklist empty")
+            return
+        try:
+            steps = self._compile_macro(name)
+        except ValueError as exc:
+            self.command_bar.set_status(str(exc))
+            return
+        if not steps:
+            self.command_bar.set_status(f"Macro empty: {name}")
+            return
+        self._check_macro_resolution(name)
+        self._batch = {
+            "macro": name,
+            "items": items,
+            "steps": steps,
+            "index": -1,
+            "results": [],
+            "started": time.perf_counter(),
+            "prefetched": None,
+            "canceled": False,
+        }
+        self._batch_start_item()
+
+    def _batch_item_params(self, index):
+        params = dict(self._batch["items"][index])
+        params.setdefault("index", index + 1)
+        return params
+
+    def _batch_start_item(self):
+        batch = self._batch
+        if batch is None:
+            return
+        batch["index"] += 1
+        index = batch["index"]
+        if batch["canceled"] or index >= len(batch["items"]):
+            self._finish_batch()
+            return
+        name = batch["macro"]
+        self._macro_params = self._batch_item_params(index)
+        batch["item_started"] = time.perf_counter()
+        self._macro_stack = [name]
+        self._start_macro(
+            name,
+            list(batch["steps"]) + [f"__macro_end__ {name}"],
+            status=f"Batch {name} {index + 1}/{len(batch['items'])}",
+        )
+
+    def _batch_prefetch(self):
+        """Warm the next item's templates while the current item's last step settles."""
+        batch = self._batch
+        next_index = batch["index"] + 1
+        if batch["prefetched"] == next_index or next_index >= len(batch["items"]):
+            return
+        batch["prefetched"] = next_index
+        params = self._batch_item_params(next_index)
+        names = []
+        for step in batch["steps"]:
+            parts = step.strip().split(" ", 1)
+            if parts[0].lower() == "find-image" and len(parts) > 1:
+                saved, self._macro_params = self._macro_params, params
+                image_name = self._split_match_mode(self._apply_macro_params(parts[1]))[1]
+                names.append(self._normalize_macro_name(image_name))
+                self._macro_params = saved
+
+        def task():
+            for image_name in names:
+                self._load_template(image_name)
+
+        if names:
+            threading.Thread(target=task, daemon=True).start()
+
+    def _on_macro_finished(self, status, reason=""):
+        batch = self._batch
+        if batch is None:
+            return
+        index = batch["index"]
+        item = batch["items"][index]
+        label = str(next(iter(item.values()), "")) if item else ""
+        result = {
+            "index": index + 1,
+            "item": label,
+            "ok": status == "complete",
+            "reason": reason,
+            "elapsed_s": round(time.perf_counter() - batch["item_started"], 3),
+        }
+        batch["results"].append(result)
+        self._macro_params = None
+        self._emit_event("batch-item", **result)
+        # Continue from the main queue so the finished macro fully unwinds first.
+        run_on_main(self._batch_start_item)
+
+    def _finish_batch(self):
+        batch = self._batch
+        self._batch = None
+        self._macro_params = None
+        results = batch["results"]
+        total = time.perf_counter() - batch["started"]
+        ok_count = sum(1 for r in results if r["ok"])
+        per_item = (total / len(results)) if results else 0.0
+        summary = {
+            "macro": batch["macro"],
+            "items": len(batch["items"]),
+            "completed": len(results),
+            "ok": ok_count,
+            "failed": len(results) - ok_count,
+            "canceled": batch["canceled"],
+            "elapsed_s": round(total, 3),
+            "per_item_s": round(per_item, 3),
+            "items_per_min": round(60.0 / per_item, 2) if per_item else None,
+            "results": results,
+        }
+        # The macro name is not a format string: a '%' in it must stay literal.
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        report_path = os.path.join(GLASS_DIR, "batches", f"{batch['macro']}-{stamp}.json")
+        try:
+            os.makedirs(os.path.dirname(report_path), exist_ok=True)
+            with open(report_path, "w", encoding="utf-8") as handle:
+                json.dump(summary, handle, indent=2)
+        except OSError as exc:
+            print(f"Batch report not saved: {exc}")
+        self._emit_event("batch", **summary)
+        lines = [
+            f"{r['index']:>3}. {'ok  ' if r['ok'] else 'FAIL'} {r['item'][:28]:<28} {r['elapsed_s']:>6.2f}s  {r['reason']}"
+            for r in results
+        ]
+        status = f"Batch {batch['macro']}: {ok_count}/{len(results)} ok in {total:.1f}s"
+        if per_item:
+            status += f" ({per_item:.1f}s/item)"
+        if batch["canceled"]:
+            status += " - canceled"
+        self.command_bar.set_status(status)
+        self.command_bar.show_help("\n".join(lines) or "(no items run)")
+
+    def _expand_macro(self, name):
+        name = self._normalize_macro_name(name)
+        if name not in self.macros:
+            self.command_bar.set_status("Macro not found")
+            return None
+        steps = self._get_macro_steps(name)
+        if name in self._macro_stack:
+            self._abort_macro("Macro recursion detected")
+            return None
+        if len(self._macro_stack) >= 5:
+            self._abort_macro("Macro nesting too deep")
+            return None
+        self._macro_stack.append(name)
+        return list(steps) + [f"__macro_end__ {name}"]
+
+    def _normalize_macro_name(self, name):
+        if not name:
+            return ""
+        cleaned = name.strip()
+        if len(cleaned) >= 2:
+            pairs = [
+                ('"', '"'),
+                ("'", "'"),
+                ("“", "”"),
+                ("‘", "’"),
+            ]
+            for left, right in pairs:
+                if cleaned.startswith(left) and cleaned.endswith(right):
+                    cleaned = cleaned[1:-1].strip()
+                    break
+        return cleaned
+
+    def _run_next_macro_step(self):
+        # Loop instead of recursing: steps that finish synchronously (click-at,
+        # find-image) flag completion and the next step is dispatched here,
+        # rather than re-entering this method from inside the step.
+        while self._macro_running:
+            self._trace_end_step()
+            if not self._macro_queue:
+                name = self._macro_root or "macro"
+                self._macro_running = False
+                self._macro_name = None
+                self._macro_root = None
+                self._macro_wait_reason = None
+                self._macro_stack = []
+                self._trace_end_root(status="complete")
+                self._emit_event("macro", name=name, status="complete")
+                self.command_bar.set_status(f"Macro complete: {name}")
+                self._on_macro_finished("complete")
+                return
+            step = self._macro_queue.pop(0)
+            if self._batch is not None and all(
+                s.startswith("__macro_end__ ") for s in self._macro_queue
+            ):
+                self._batch_prefetch()
+            if not step.startswith("__macro_end__ "):
+                self._macro_step_index += 1
+                if self._simulation is not None:
+                    self._simulation.begin_step(self._macro_step_index, step)
+                self._trace_step = self.tracer.start(
+                    "step",
+                    self._trace_root,
+                    index=self._macro_step_index,
+                    step=step,
+                    macro=self._macro_stack[-1] if self._macro_stack else self._macro_root,
+                )
+            self._macro_step_done_inline = False
+            self._macro_dispatching = True
+            try:
+                self._execute_macro_step(step)
+            finally:
+                self._macro_dispatching = False
+            if not self._macro_running:
+                return
+            if self._macro_step_done_inline:
+                continue
+            if self._macro_wait_reason is not None:
+                return
             if self._macro_delay and self._macro_delay > 0:
+                if self._simulation is not None:
+                    self._simulation.advance(self._macro_delay)
+                    continue
+                self._trace_delay_span = self.tracer.start(
+                    "delay", self._trace_parent(), seconds=self._macro_delay
+                )
+
                 def schedule_timer():
                     AppKit.NSTimer.scheduledTimerWithTimeInterval_target_selector_userInfo_repeats_(
                         self._macro_delay, self, "macroDelayFired:", None, False
                     )
 
                 run_on_main(schedule_timer)
-            else:
-                self._run_next_macro_step()
+                return
 
     def macroDelayFired_(self, timer):
+        self.tracer.end(self._trace_delay_span)
+        self._trace_delay_span = None
         self._run_next_macro_step()
 
     def _execute_macro_step(self, step):
+        if self._macro_params:
+            step = self._apply_macro_params(step)
         command = step.strip()
         if not command:
             return
@@ -1604,7 +4902,8 @@ class AppController(AppKit.NSObject):
             self._handle_capture()
         elif name == "find":
             self._macro_wait_reason = "find"
-            self._handle_find(arg)
+            all_screens, query = self._split_all_screens_flag(arg)
+            self._handle_find(query, all_screens=all_screens or self._macro_all_screens)
         elif name == "click":
             self._handle_click(arg, record=False, button="left")
         elif name == "rclick":
@@ -1620,7 +4919,8 @@ class AppController(AppKit.NSObject):
             self._macro_queue = expanded + self._macro_queue
         elif name == "find-image":
             self._macro_wait_reason = "find-image"
-            self._find_image(arg)
+            mode, image_name = self._split_match_mode(arg)
+            self._find_image(image_name, mode=mode or self._macro_match_mode)
         elif name == "wait":
             self._execute_wait(arg)
         elif name == "smart-click":
@@ -1645,19 +4945,68 @@ class AppController(AppKit.NSObject):
         if not self._macro_running:
             return
         self._macro_wait_reason = None
+        if self._macro_dispatching:
+            # Completed synchronously; _run_next_macro_step continues the loop.
+            self._macro_step_done_inline = True
+            return
         self._run_next_macro_step()
 
     def _abort_macro(self, message):
+        if self._simulation is not None and self._macro_running:
+            # A dry run reports the step and carries on to find the rest.
+            self._simulation.flag("unresolved", message or "aborted")
+            self._macro_step_complete()
+            return
         if self._macro_running:
+            self._emit_event(
+                "macro", name=self._macro_root, status="aborted", reason=message or ""
+            )
             self._macro_running = False
             self._macro_queue = []
             self._macro_name = None
             self._macro_wait_reason = None
             self._macro_root = None
             self._macro_stack = []
+            self._trace_end_step()
+            self._trace_end_root(status="aborted", reason=message or "")
+            self._on_macro_finished("aborted", message or "")
         if message:
             self.command_bar.set_status(message)
 
+    def _trace_parent(self):
+        return self._trace_step or self._trace_root
+
+    def _trace_end_step(self):
+        step = self._trace_step
+        if step is not None:
+            self.tracer.end(step)
+            self._trace_step = None
+            self._emit_event(
+                "step",
+                index=step.args.get("index"),
+                step=step.args.get("step"),
+                elapsed_ms=round(step.duration * 1000.0, 2),
+            )
+
+    def _trace_end_root(self, **args):
+        if self._trace_root is not None:
+            self.tracer.end(self._trace_root, **args)
+            self._trace_root = None
+
+    def _trace_begin_command(self, text):
+        """Open a root span for an interactive command (macros trace themselves)."""
+        if self._macro_running:
+            return
+        self._trace_finish_command()
+        self._trace_root = self.tracer.start("command", command=text)
+
+    def _trace_finish_command(self):
+        root = self._trace_root
+        if root is None or root.name != "command":
+            return
+        self._trace_root = None
+        self.tracer.end(root)
+
     def _execute_wait(self, arg):
         """Execute a wait command during macro playback (non-blocking)."""
         try:
@@ -1665,9 +5014,15 @@ class AppController(AppKit.NSObject):
         except (ValueError, TypeError):
             seconds = 1.0
         seconds = max(0.0, min(30.0, seconds))  # Clamp to 0-30s
-        if seconds > 0:
+        if seconds > 0 and self._simulation is not None:
+            self._simulation.advance(seconds)
+            self._macro_step_complete()
+        elif seconds > 0:
             self.command_bar.set_status(f"Waiting {seconds:.1f}s...")
             self._macro_wait_reason = "wait"
+            self._trace_wait_span = self.tracer.start(
+                "wait", self._trace_parent(), seconds=seconds
+            )
 
             def schedule_wait_timer():
                 AppKit.NSTimer.scheduledTimerWithTimeInterval_target_selector_userInfo_repeats_(
@@ -1681,17 +5036,26 @@ class AppController(AppKit.NSObject):
 
     def waitTimerFired_(self, timer):
         """Called when wait timer completes."""
+        self.tracer.end(self._trace_wait_span)
+        self._trace_wait_span = None
         if self._macro_wait_reason == "wait":
             self._macro_step_complete()
 
     def _execute_smart_click(self, arg, button="left", click_count=1):
         """Execute a smart-click command during macro playback.
 
-        Format: smart-click "query" xPct yPct [--allow-fallback]
+        Format: smart-click "query" xPct yPct [--allow-fallback] [--all-screens] [--optional]
+
+        `--optional` makes the step behave exactly like `find` + `click 1`: a
+        missing text skips the click instead of stopping the macro, a click
+        hides the command bar, and the closest-first match is always searched
+        for (no learned fast path).
         """
         # Parse the command
         allow_fallback = "--allow-fallback" in arg
-        arg_clean = arg.replace("--allow-fallback", "").strip()
+        optional = "--optional" in arg
+        arg_clean = arg.replace("--allow-fallback", "").replace("--optional", "").strip()
+        all_screens, arg_clean = self._split_all_screens_flag(arg_clean)
 
         # Extract quoted query and coordinates
         query, x_pct, y_pct = self._parse_smart_click_args(arg_clean)
@@ -1699,6 +5063,13 @@ class AppController(AppKit.NSObject):
             self._abort_macro(f"Invalid smart-click: {arg}")
             return
 
+        key = None
+        if not (all_screens or self._macro_all_screens or optional) and self._simulation is None:
+            key = self._fast_target_key(f"{button}:{click_count}:{arg}")
+            if self._try_fast_target(key, query, button, click_count):
+                return
+        self._smart_click_key = key
+
         self.command_bar.set_status(f"Finding '{query}'...")
 
         # Run capture + OCR + find (async)
@@ -1707,11 +5078,110 @@ class AppController(AppKit.NSObject):
         self._smart_click_y_pct = y_pct
         self._smart_click_button = button
         self._smart_click_allow_fallback = allow_fallback
+        self._smart_click_optional = optional
         self._smart_click_count = click_count
 
         # Trigger find, which will call _smart_click_after_find when done
         self._pending_find_query = query
-        self._handle_capture()
+        self._handle_capture(all_screens=all_screens or self._macro_all_screens)
+
+    def _fast_target_key(self, step):
+        """Disk key for a smart-click step: macro, step, active screen and capture target."""
+        target = self._active_target()
+        parts = [
+            self._macro_stack[-1] if self._macro_stack else self._macro_root,
+            step,
+            self._active_screen_index,
+            self._describe_target(target) if target is not None else None,
+        ]
+        return hashlib.blake2b(json.dumps(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+    def _fast_target_rect(self, bbox):
+        """Global-point rectangle (and thumbnail size) checked around a learned bbox."""
+        x, y, w, h = bbox
+        ox, oy = self.capture_origin_pt
+        margin = SMART_CLICK_PATCH_MARGIN
+        rect = Quartz.CGRectMake(ox + x - margin, oy + y - margin, w + 2 * margin, h + 2 * margin)
+        # About one pixel per point, capped so a long label stays a few KB.
+        size = (int(min(160, max(8, round(w + 2 * margin)))), int(min(48, max(8, round(h + 2 * margin)))))
+        return rect, size
+
+    def _learn_fast_target(self, key, bbox):
+        """Remember where a smart-click step resolved and a thumbnail of what was there."""
+        rect, size = self._fast_target_rect(bbox)
+        try:
+            patch = self.ocr_engine.fingerprint_region(rect, size)
+        except PermissionError:
+            return
+        bbox = [float(v) for v in bbox]
+        self._fast_targets[key] = {"bbox": bbox, "patch": patch}
+        self._fast_targets.move_to_end(key)
+        while len(self._fast_targets) > SMART_CLICK_TARGETS_MAX:
+            self._fast_targets.popitem(last=False)
+        self.disk_cache.put("smart-click", key, {"bbox": bbox}, {"patch": patch})
+
+    def _try_fast_target(self, key, query, button, click_count):
+        """Click a smart-click step's learned target if the screen there still looks the same.
+
+        Costs one small nominal-resolution capture instead of a full capture +
+        OCR. Returns False (the caller then runs the normal path) when nothing
+        is learned yet or more than SMART_CLICK_PATCH_MAX_CHANGED of the
+        thumbnail's pixels differ.
+        """
+        entry = self._fast_targets.get(key)
+        if entry is None:
+            cached = self.disk_cache.get("smart-click", key)
+            if cached is not None:
+                entry = {"bbox": cached[0]["bbox"], "patch": cached[1]["patch"]}
+                self._fast_targets[key] = entry
+        self.metrics.cache("smart-click-target", entry is not None)
+        if entry is None:
+            return False
+        # Same screen bookkeeping a capture step does, so the check and the
+        # click land on the active display.
+        self._sync_active_screen_to_command_bar(announce=False)
+        origin = Quartz.CGDisplayBounds(self._active_display_id).origin
+        self.capture_origin_pt = (origin.x, origin.y)
+        rect, size = self._fast_target_rect(entry["bbox"])
+        # Highlights left by an earlier find would be in the patch; a full
+        # capture clears them the same way.
+        self.overlay.clear()
+        try:
+            with self.tracer.span("verify", self._trace_parent(), query=query) as span:
+                patch = self.ocr_engine.fingerprint_region(rect, size)
+                changed = np.count_nonzero(
+                    np.abs(patch - entry["patch"]) > SMART_CLICK_PATCH_TOLERANCE
+                ) if patch.shape == entry["patch"].shape else patch.size
+                matched = changed <= SMART_CLICK_PATCH_MAX_CHANGED * patch.size
+                span.args["matched"] = matched
+        except PermissionError:
+            return False
+        self.metrics.incr("smart-click.fast" if matched else "smart-click.verify-failed")
+        if not matched:
+            return False
+        x, y, w, h = entry["bbox"]
+        cx = x + (w / 2.0)
+        cy = y + (h / 2.0)
+        self.command_bar.set_status(f"Clicked '{query}' (position verified)")
+        self._click_at(cx, cy, button=button, click_count=click_count)
+        self.last_click_point = (cx, cy)
+        self.matches = []
+        self._macro_step_complete()
+        return True
+
+    def _split_all_screens_flag(self, arg):
+        """Strip `--all-screens` from a find/smart-click argument."""
+        if "--all-screens" not in (arg or ""):
+            return False, arg
+        return True, " ".join(arg.replace("--all-screens", " ").split())
+
+    def _split_match_mode(self, arg):
+        """Strip `--fast` / `--features` from a find-image argument; returns (mode, rest)."""
+        for mode in ("features", "fast"):
+            flag = f"--{mode}"
+            if flag in (arg or ""):
+                return mode, " ".join(arg.replace(flag, " ").split())
+        return None, arg
 
     def _parse_smart_click_args(self, arg):
         """Parse smart-click arguments: "query" xPct yPct"""
@@ -1791,7 +5261,9 @@ class AppController(AppKit.NSObject):
         y_pct = getattr(self, "_smart_click_y_pct", None)
         button = getattr(self, "_smart_click_button", "left")
         allow_fallback = getattr(self, "_smart_click_allow_fallback", False)
+        optional = getattr(self, "_smart_click_optional", False)
         click_count = getattr(self, "_smart_click_count", 1)
+        key = getattr(self, "_smart_click_key", None)
 
         # Clear state
         self._smart_click_query = None
@@ -1799,7 +5271,9 @@ class AppController(AppKit.NSObject):
         self._smart_click_y_pct = None
         self._smart_click_button = None
         self._smart_click_allow_fallback = None
+        self._smart_click_optional = None
         self._smart_click_count = None
+        self._smart_click_key = None
 
         if not self.matches:
             # No matches found
@@ -1811,6 +5285,9 @@ class AppController(AppKit.NSObject):
                 self._click_at(target_x, target_y, button=button, click_count=click_count)
                 self.last_click_point = (target_x, target_y)
                 self._macro_step_complete()
+            elif optional:
+                self.command_bar.set_status(f"'{query}' not found, click skipped")
+                self._macro_step_complete()
             else:
                 # Safe fallback: stop macro
                 self._abort_macro(f"Text '{query}' not found - macro stopped")
@@ -1823,14 +5300,21 @@ class AppController(AppKit.NSObject):
             # Multiple matches - find closest to stored coordinates
             target_x = x_pct * self.screen_frame.size.width
             target_y = y_pct * self.screen_frame.size.height
+            boxes = np.array([m["bbox"] for m in self.matches], dtype=np.float64).reshape(-1, 4)
+            dx = boxes[:, 0] + boxes[:, 2] / 2.0 - target_x
+            dy = boxes[:, 1] + boxes[:, 3] / 2.0 - target_y
+            match = self.matches[int(np.argmin(dx * dx + dy * dy))]
 
-            def distance_to_target(m):
-                x, y, w, h = m["bbox"]
-                cx = x + (w / 2.0)
-                cy = y + (h / 2.0)
-                return (cx - target_x) ** 2 + (cy - target_y) ** 2
+        # Drop the highlights before anything else reads the screen: they are
+        # not in the OCR'd frame, and a patch learned with them would never verify.
+        self.overlay.clear()
 
-            match = min(self.matches, key=distance_to_target)
+        # Learn the target unless the choice depended on the last click point
+        # (several matches, no recorded coordinates).
+        if key is not None and match.get("screen") is None and (
+            len(self.matches) == 1 or (x_pct is not None and y_pct is not None)
+        ):
+            self._learn_fast_target(key, match["bbox"])
 
         # Click the match
         bbox = match["bbox"]
@@ -1840,8 +5324,9 @@ class AppController(AppKit.NSObject):
 
         self._click_at(cx, cy, button=button, click_count=click_count)
         self.last_click_point = (cx, cy)
-        self.overlay.clear()
         self.matches = []
+        if optional:
+            self.command_bar.hide()
 
         self._macro_step_complete()
 
@@ -1851,19 +5336,16 @@ class AppController(AppKit.NSObject):
         return self.screen_center
 
     def _order_matches_by_anchor(self, matches):
+        """Sort closest-first to the anchor (ties: top, then left), vectorized."""
         if not matches:
             return []
         anchor_x, anchor_y = self._anchor_point()
-
-        def sort_key(item):
-            x, y, w, h = item["bbox"]
-            cx = x + (w / 2.0)
-            cy = y + (h / 2.0)
-            dx = cx - anchor_x
-            dy = cy - anchor_y
-            return (dx * dx + dy * dy, y, x)
-
-        return sorted(matches, key=sort_key)
+        # A full ranking: an index would only add its build cost.
+        boxes = np.array([m["bbox"] for m in matches], dtype=np.float64).reshape(-1, 4)
+        dx = boxes[:, 0] + boxes[:, 2] / 2.0 - anchor_x
+        dy = boxes[:, 1] + boxes[:, 3] / 2.0 - anchor_y
+        order = np.lexsort((boxes[:, 0], boxes[:, 1], dx * dx + dy * dy))
+        return [matches[i] for i in order.tolist()]
 
     def _install_key_monitor(self):
         if self._key_monitor is not None:
@@ -1916,10 +5398,18 @@ class AppController(AppKit.NSObject):
         name = parts[0].lower()
         arg = parts[1].strip() if len(parts) > 1 else ""
         self.command_bar.clear_input()
+        self._end_live_preview()
 
         if name != "help":
             self.command_bar.hide_help()
 
+        if name != "perf":
+            self._trace_begin_command(command)
+        self._dispatch_command(command, name, arg)
+        if not self._ocr_in_progress:
+            self._trace_finish_command()
+
+    def _dispatch_command(self, command, name, arg):
         if name == "capture":
             self._record_step("capture")
             self._sync_active_screen_to_command_bar(announce=False)
@@ -1929,7 +5419,8 @@ class AppController(AppKit.NSObject):
             if arg and self._recording_name is None:
                 self._record_step(f"find {arg}")
             self._sync_active_screen_to_command_bar(announce=False)
-            self._handle_find(arg)
+            all_screens, query = self._split_all_screens_flag(arg)
+            self._handle_find(query, all_screens=all_screens)
         elif name == "click":
             self._handle_click(arg, record=True, button="left")
         elif name == "rclick":
@@ -1945,6 +5436,8 @@ class AppController(AppKit.NSObject):
             self._stop_recording()
         elif name == "run":
             self._run_macro(arg)
+        elif name == "run-batch":
+            self._run_batch(arg)
         elif name == "macros":
             self._list_macros()
         elif name == "show":
@@ -1956,7 +5449,8 @@ class AppController(AppKit.NSObject):
             self._capture_image(arg)
         elif name == "find-image":
             self._sync_active_screen_to_command_bar(announce=False)
-            self._find_image(arg)
+            mode, image_name = self._split_match_mode(arg)
+            self._find_image(image_name, mode=mode)
         elif name == "images":
             self._list_images()
         elif name == "delete-image":
@@ -1965,11 +5459,35 @@ class AppController(AppKit.NSObject):
             self._list_screens()
         elif name == "screen":
             self._handle_screen_command(arg)
+        elif name == "perf":
+            self._handle_perf_command(arg)
+        elif name == "stats":
+            self._handle_stats_command(arg)
+        elif name == "target":
+            self._handle_target_command(arg)
+        elif name == "simulate":
+            self._simulate_macro(arg)
+        elif name == "profile":
+            self._show_profile(arg)
+        elif name == "optimize":
+            self._handle_optimize_command(arg)
+        elif name == "session":
+            self._handle_session_command(arg)
+        elif name == "watch":
+            self._handle_watch_command("text", arg)
+        elif name == "watch-image":
+            self._handle_watch_command("image", arg)
+        elif name == "unwatch":
+            self._unwatch(arg)
+        elif name == "startup":
+            self.command_bar.set_status("Startup timeline")
+            self.command_bar.show_help("\n".join(STARTUP.lines()))
         elif name == "help":
             self.command_bar.set_status("Commands")
             self.command_bar.show_help(
                 "capture  - capture active screen (follows command bar by default)\n"
                 "find <text>  - capture + find text\n"
+                "find --all-screens <text>  - capture every display + find\n"
                 "click <number>  - left click match\n"
                 "rclick <number>  - right click match\n"
                 "screens  - list displays\n"
@@ -1978,13 +5496,27 @@ class AppController(AppKit.NSObject):
                 "record <name>  - start recording\n"
                 "stop  - save recording\n"
                 "run <name>  - run macro\n"
+                "run-batch <name> <worklist>  - run macro once per worklist item\n"
                 "macros  - list macros\n"
                 "show <name>  - show macro steps\n"
                 "delete <name>  - remove macro\n"
                 "capture-image <name>  - save region (recording)\n"
-                "find-image <name>  - find image (macro)\n"
+                "find-image [--fast|--features] <name>  - find image (macro); --fast matches grayscale,\n"
+                "    skipping flat areas; --features matches keypoints (survives scaling and dark mode)\n"
                 "images  - list saved images\n"
                 "delete-image <name>  - remove image\n"
+                "perf  - latency breakdown of the last run\n"
+                "perf export [path]  - write Chrome trace JSON\n"
+                "profile <name>  - per-step p50/p95 over past runs, slowest steps marked *\n"
+                "optimize <name> [--apply]  - show (or save) a faster equivalent of a macro\n"
+                "stats [reset]  - latency histograms and counters\n"
+                "target <app>[:<title>]  - capture/OCR only that window; target off  - whole screen\n"
+                "simulate <name> [--session <s>]  - dry run: unresolved/ambiguous steps, predicted time\n"
+                "session save|delete <s> / session list  - screen snapshots for simulate\n"
+                "watch <text> [--run <macro>]  - notify (or run a macro) when text appears\n"
+                "watch-image <name> [--run <macro>]  - same for a saved image\n"
+                "watch  - list watches; unwatch [<id>|all]  - stop watching\n"
+                "startup  - startup and warm-up timeline\n"
                 "tip: 1-9 = left click, a-i = right click"
             )
         else:
@@ -1998,6 +5530,667 @@ class AppController(AppKit.NSObject):
                     self._record_step(f"find {command}")
                 self._handle_find(command)
 
+    def _sessions_dir(self):
+        return os.path.join(GLASS_DIR, "sessions")
+
+    def _handle_session_command(self, arg):
+        action, _, name = (arg or "").strip().partition(" ")
+        name = self._normalize_macro_name(name)
+        if action == "list":
+            directory = self._sessions_dir()
+            names = sorted(f[:-4] for f in os.listdir(directory) if f.endswith(".npz")) if os.path.isdir(directory) else []
+            self.command_bar.set_status(f"Sessions ({len(names)})")
+            self.command_bar.show_help("\n".join(names) or "No sessions saved")
+        elif action in ("save", "delete") and name:
+            if action == "save":
+                self._save_session(name)
+            else:
+                path = os.path.join(self._sessions_dir(), f"{name}.npz")
+                if not os.path.exists(path):
+                    self.command_bar.set_status(f"Session not found: {name}")
+                    return
+                os.remove(path)
+                self.command_bar.set_status(f"Deleted session: {name}")
+        else:
+            self.command_bar.set_status("Usage: session save <name> | session delete <name> | session list")
+
+    def _save_session(self, name):
+        """Save the current OCR snapshot plus a fresh frame (for find-image) for `simulate`."""
+        if self._snapshot_time is None:
+            self.command_bar.set_status("Nothing to save: run capture first")
+            return
+        arrays = {}
+        sources = self._find_sources()
+        for i, (_, ocr, _) in enumerate(sources):
+            for key, value in ocr.to_arrays().items():
+                arrays[f"s{i}_{key}"] = value
+        arrays["sources"] = np.float64(
+            [[-1 if index is None else index, dx, dy] for index, _, (dx, dy) in sources]
+        )
+        try:
+            bgr, offset, scale = self._capture_target_bgr()
+        except (LookupError, MemoryError):
+            bgr = None
+        try:
+            if bgr is not None:
+                arrays["frame"] = bgr
+                arrays["frame_geometry"] = np.float64([offset[0], offset[1], scale])
+            make_private_dir(self._sessions_dir())
+            path = os.path.join(self._sessions_dir(), f"{name}.npz")
+            tmp_path = f"{path}.tmp"
+            with open_private(tmp_path) as handle:
+                np.savez(handle, **arrays)
+            os.replace(tmp_path, path)
+        finally:
+            self.capture_pool.release(bgr)
+        items = sum(len(ocr) for _, ocr, _ in sources)
+        image = "" if bgr is not None else ", no screen image"
+        self.command_bar.set_status(f"Saved session {name} ({items} OCR items{image})")
+
+    def _load_session(self, name):
+        """(sources, frame) saved by `_save_session`, or None if missing."""
+        path = os.path.join(self._sessions_dir(), f"{name}.npz")
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            sources = []
+            for i, (index, dx, dy) in enumerate(data["sources"]):
+                prefix = f"s{i}_"
+                ocr = OCRResult.from_arrays(
+                    {key[len(prefix):]: data[key] for key in data.files if key.startswith(prefix)}
+                )
+                sources.append((None if index < 0 else int(index), ocr, (float(dx), float(dy))))
+            frame = None
+            if "frame" in data.files:
+                dx, dy, scale = (float(v) for v in data["frame_geometry"])
+                frame = (data["frame"], (dx, dy), scale)
+        return sources, frame
+
+    def _simulation_costs(self):
+        costs = dict(SIMULATE_DEFAULT_COSTS)
+        for stage, histogram in (
+            ("capture", "latency.capture"),
+            ("ocr", "latency.ocr"),
+            ("find", "latency.find"),
+            ("match", "latency.find-image"),
+        ):
+            value = self.metrics.percentile(histogram, 50)
+            if value is not None:
+                costs[stage] = value / 1e6
+        return costs
+
+    def _simulate_macro(self, arg):
+        """Dry-run a macro through the real engine, without clicking or waiting.
+
+        Captures replay a saved session (or the current snapshot), clicks are
+        recorded instead of posted, and delays/waits/capture/OCR advance a
+        virtual clock by their measured (or default) cost. The screen is assumed
+        not to change between steps.
+        """
+        name, _, session_name = (arg or "").partition("--session")
+        name = self._normalize_macro_name(name)
+        session_name = self._normalize_macro_name(session_name)
+        if not name:
+            self.command_bar.set_status("Missing macro name")
+            return
+        if self._macro_running or self._recording_name is not None or self._ocr_in_progress:
+            self.command_bar.set_status("Busy: wait for the current macro, recording or capture")
+            return
+        if name not in self.macros:
+            self.command_bar.set_status("Macro not found")
+            return
+        if not self._get_macro_steps(name):
+            self.command_bar.set_status(f"Macro empty: {name}")
+            return
+        if session_name:
+            session = self._load_session(session_name)
+            if session is None:
+                self.command_bar.set_status(f"Session not found: {session_name}")
+                return
+            sources, frame = session
+        elif self._snapshot_time is not None:
+            sources, frame = self._find_sources(), None
+        else:
+            self.command_bar.set_status("No snapshot: run capture first or pass --session <name>")
+            return
+        simulation = MacroSimulation(sources, frame, self._simulation_costs())
+        saved = {
+            attr: getattr(self, attr)
+            for attr in (
+                "command_bar", "overlay", "tracer", "ocr_items", "matches", "last_click_point",
+                "_screen_snapshots", "_snapshot_time", "_pending_find_query",
+                "_trace_root", "_trace_step", "_macro_stack", "_macro_params", "_macro_step_index",
+                "_macro_all_screens", "_macro_match_mode", "_macro_target",
+            )
+        }
+        started = time.perf_counter()
+        self.command_bar = NullCommandBar()
+        self.overlay = NullOverlay()
+        # Keep simulated steps out of `perf` and the latency histograms.
+        self.tracer = Tracer()
+        self._trace_root = None
+        self._trace_step = None
+        self._macro_stack = []
+        self._macro_params = None
+        self.matches = []
+        self._pending_find_query = None
+        self._simulation = simulation
+        try:
+            expanded = self._expand_macro(name)
+            if expanded is not None:
+                self._macro_name = name
+                self._macro_root = name
+                self._macro_queue = expanded
+                self._macro_running = True
+                self._macro_wait_reason = None
+                self._macro_step_index = 0
+                self._macro_all_screens = self._get_macro_all_screens(name)
+                self._macro_match_mode = self._get_macro_match_mode(name)
+                self._macro_target = self._get_macro_target(name)
+                self._trace_root = self.tracer.start("macro", macro=name)
+                self._run_next_macro_step()
+        finally:
+            simulation.finish()
+            self._simulation = None
+            self._macro_running = False
+            self._macro_queue = []
+            self._macro_name = None
+            self._macro_root = None
+            self._macro_wait_reason = None
+            for attr, value in saved.items():
+                setattr(self, attr, value)
+        elapsed = time.perf_counter() - started
+        report = simulation.report()
+        report["macro"] = name
+        report["session"] = session_name or None
+        report["elapsed_ms"] = round(elapsed * 1000.0, 2)
+        self._emit_event("simulation", **report)
+        lines = []
+        for step in report["steps"]:
+            line = f"{step['index']:>3}  {step['seconds']:6.2f}s  {step['status']:<10}  {step['step']}"
+            if step["detail"]:
+                line += f"  ({step['detail']})"
+            lines.append(line)
+        lines.append(f"predicted {report['predicted_seconds']:.2f}s; a real run stops at the first unresolved step")
+        self.command_bar.show_help("\n".join(lines))
+        self.command_bar.set_status(
+            f"Simulated {name}: {len(report['steps'])} steps, ~{report['predicted_seconds']:.1f}s, "
+            f"{report['unresolved']} unresolved, {report['ambiguous']} ambiguous "
+            f"({report['elapsed_ms']:.0f} ms)"
+        )
+
+    def _simulate_capture(self):
+        """`_handle_capture` during a dry run: install the session's OCR as if just captured."""
+        simulation = self._simulation
+        simulation.advance(simulation.costs["capture"] + simulation.costs["ocr"])
+        self.ocr_items = simulation.sources[0][1] if simulation.sources else OCRResult.empty()
+        self._screen_snapshots = list(simulation.sources)
+        self._snapshot_time = time.monotonic()
+        self.matches = []
+        if self._macro_wait_reason == "capture":
+            self._macro_step_complete()
+        if self._pending_find_query:
+            pending = self._pending_find_query
+            self._pending_find_query = None
+            simulation.advance(simulation.costs["find"])
+            self._run_find(pending)
+
+    def _simulation_frame(self):
+        """`_capture_target_bgr` during a dry run: a pooled copy of the session frame.
+
+        Without a saved frame, one real capture is taken and reused for the run.
+        """
+        simulation = self._simulation
+        if simulation.frame is None:
+            self._simulation = None
+            try:
+                bgr, offset, scale = self._capture_target_bgr()
+            finally:
+                self._simulation = simulation
+            if bgr is None:
+                return None, offset, None
+            simulation.frame = (bgr.copy(), offset, scale)
+            self.capture_pool.release(bgr)
+        simulation.advance(simulation.costs["capture"] + simulation.costs["match"])
+        frame, offset, scale = simulation.frame
+        buf = self.capture_pool.acquire(frame.shape, timeout=0)
+        np.copyto(buf, frame)
+        return buf, offset, scale
+
+    def _parse_target(self, text):
+        app, _, title = text.partition(":")
+        app = app.strip().strip('"')
+        title = title.strip().strip('"') or None
+        return (app, title) if app else None
+
+    def _active_target(self):
+        if self._macro_running and self._macro_target is not None:
+            return self._macro_target
+        return self._target
+
+    def _describe_target(self, target):
+        app, title = target
+        return f"{app}:{title}" if title else app
+
+    def _handle_target_command(self, arg):
+        arg = (arg or "").strip()
+        if not arg:
+            if self._target is None:
+                self.command_bar.set_status("No target: capturing the whole screen")
+                return
+            window = self.ocr_engine.find_window(*self._target)
+            state = "not found" if window is None else f"'{window['title'] or window['app']}'"
+            self.command_bar.set_status(f"Target {self._describe_target(self._target)} ({state})")
+            return
+        if arg.lower() in ("off", "none", "clear"):
+            self._target = None
+            self.command_bar.set_status("Target cleared: capturing the whole screen")
+            return
+        target = self._parse_target(arg)
+        window = self.ocr_engine.find_window(*target)
+        if window is None:
+            self.command_bar.set_status(f"No window for {self._describe_target(target)}")
+            return
+        self._target = target
+        self.ocr_items = OCRResult.empty()
+        self._screen_snapshots = None
+        self._snapshot_time = None
+        _, _, width, height = window["bounds"]
+        self.command_bar.set_status(
+            f"Target {window['app']} '{window['title']}' ({int(width)}x{int(height)} pt)"
+        )
+
+    def _target_window(self):
+        """(window, (dx, dy)) for the active target, or (None, None) when unscoped.
+
+        `dx, dy` place the window's top-left in active-screen points, the space
+        match boxes and `_click_at` use. Raises LookupError if the target has
+        no window on screen.
+        """
+        target = self._active_target()
+        if target is None:
+            return None, None
+        window = self.ocr_engine.find_window(*target)
+        if window is None:
+            raise LookupError(f"Target window not found: {self._describe_target(target)}")
+        origin = Quartz.CGDisplayBounds(self._active_display_id).origin
+        self.capture_origin_pt = (origin.x, origin.y)
+        x, y, _, _ = window["bounds"]
+        return window, (x - origin.x, y - origin.y)
+
+    def _handle_watch_command(self, kind, arg):
+        target, _, macro = (arg or "").partition("--run")
+        target = target.strip()
+        macro = self._normalize_macro_name(macro.strip()) if macro.strip() else None
+        if not target:
+            if kind == "text":
+                self._list_watches()
+            else:
+                self.command_bar.set_status("Missing image name")
+            return
+        if kind == "image":
+            target = self._normalize_macro_name(target)
+            if not os.path.exists(os.path.join(self.images_path, f"{target}.png")):
+                self.command_bar.set_status(f"Image not found: {target}")
+                return
+        if macro is not None and macro not in self.macros:
+            self.command_bar.set_status(f"Macro not found: {macro}")
+            return
+        watch_id = next(self._watch_ids)
+        with self._watch_lock:
+            self._watches[watch_id] = {
+                "id": watch_id,
+                "kind": kind,
+                "target": target,
+                "macro": macro,
+                "present": None,
+                "hits": 0,
+            }
+            start = self._watch_thread is None
+            if start:
+                self._watch_thread = threading.Thread(target=self._watch_loop, name="watch", daemon=True)
+        if start:
+            self._watch_thread.start()
+        else:
+            self._watch_wake.set()
+        action = f"run {macro}" if macro else "notify"
+        self.command_bar.set_status(f"Watch {watch_id}: '{target}' ({action})")
+
+    def _list_watches(self):
+        with self._watch_lock:
+            watches = list(self._watches.values())
+        if not watches:
+            self.command_bar.set_status("No watches")
+            return
+        lines = []
+        for watch in watches:
+            action = f"run {watch['macro']}" if watch["macro"] else "notify"
+            state = {None: "waiting", True: "present", False: "absent"}[watch["present"]]
+            lines.append(
+                f"{watch['id']}  {watch['kind']:<5} '{watch['target']}'  {action}  "
+                f"{state}, {watch['hits']} hits"
+            )
+        self.command_bar.set_status(f"{len(watches)} watches")
+        self.command_bar.show_help("\n".join(lines))
+
+    def _unwatch(self, arg):
+        arg = (arg or "").strip()
+        with self._watch_lock:
+            if not arg or arg == "all":
+                count = len(self._watches)
+                self._watches.clear()
+            else:
+                try:
+                    removed = self._watches.pop(int(arg), None)
+                except ValueError:
+                    removed = None
+                if removed is None:
+                    self.command_bar.set_status(f"No watch {arg}")
+                    return
+                count = 1
+        self._watch_wake.set()
+        self.command_bar.set_status(f"Stopped {count} watch{'es' if count != 1 else ''}")
+
+    def _watch_loop(self):
+        """Poll the active display while any watch exists.
+
+        Each tick compares a tiny thumbnail with the previous one. Full capture
+        plus OCR or template matching runs only when the screen changed. The
+        interval backs off from WATCH_MIN_INTERVAL to WATCH_MAX_INTERVAL while
+        nothing changes, and snaps back on the next change.
+        """
+        interval = WATCH_MIN_INTERVAL
+        previous = None
+        while True:
+            with self._watch_lock:
+                watches = list(self._watches.values())
+                if not watches:
+                    self._watch_thread = None
+                    return
+            changed = False
+            try:
+                with objc.autorelease_pool():
+                    thumb = self.ocr_engine.fingerprint_display(self._active_display_id)
+                changed = (
+                    previous is None
+                    or thumb.shape != previous.shape
+                    or int(np.abs(thumb - previous).max()) > WATCH_CHANGE_THRESHOLD
+                    # A new watch has no state yet; evaluate it right away.
+                    or any(watch["present"] is None for watch in watches)
+                )
+                previous = thumb
+                self.metrics.incr("watch.polls")
+                if changed:
+                    self.metrics.incr("watch.evaluations")
+                    self._watch_evaluate(watches)
+            except Exception as exc:
+                print(f"Watch poll failed: {exc}")
+                changed = False
+            interval = WATCH_MIN_INTERVAL if changed else min(interval * 1.5, WATCH_MAX_INTERVAL)
+            self._watch_wake.wait(interval)
+            self._watch_wake.clear()
+
+    def _watch_evaluate(self, watches):
+        text_watches = [watch for watch in watches if watch["kind"] == "text"]
+        image_watches = [watch for watch in watches if watch["kind"] == "image"]
+        if text_watches:
+            display_id = self._active_display_id
+            screen_size = (self.screen_frame.size.width, self.screen_frame.size.height)
+            with self.capture_pool.hold(self.ocr_engine.frame_bytes(display_id)), objc.autorelease_pool():
+                image, width_px, height_px, scale, _ = self.ocr_engine.capture_display(
+                    display_id, screen_size
+                )
+                items = self._recognize_frame(image, width_px, height_px, scale)
+                image = None
+            for watch in text_watches:
+                self._watch_update(watch, bool(items.find(watch["target"])))
+        if image_watches:
+            try:
+                # Off the main thread, so waiting for the pool is fine here.
+                screen_bgr = self._capture_screen_bgr(timeout=5.0)
+            except MemoryError as exc:
+                print(f"Watch capture skipped: {exc}")
+                return
+            if screen_bgr is None:
+                return
+            try:
+                for watch in image_watches:
+                    template = self._load_template(watch["target"])
+                    present = template is not None and bool(
+                        self._match_template(watch["target"], screen_bgr, template)
+                    )
+                    self._watch_update(watch, present)
+            finally:
+                self.capture_pool.release(screen_bgr)
+
+    def _watch_update(self, watch, present):
+        # Edge-triggered: fire when the target appears, re-arm once it is gone.
+        fire = present and watch["present"] is False
+        watch["present"] = present
+        if fire:
+            run_on_main(lambda: self._watch_fire(watch))
+
+    def _watch_fire(self, watch):
+        with self._watch_lock:
+            if watch["id"] not in self._watches:
+                return
+        watch["hits"] += 1
+        message = f"'{watch['target']}' appeared"
+        self._emit_event(
+            "watch", id=watch["id"], kind=watch["kind"], target=watch["target"], macro=watch["macro"]
+        )
+        self._notify("Glass watch", message)
+        if watch["macro"] is None:
+            self.command_bar.set_status(f"Watch {watch['id']}: {message}")
+        elif self._macro_running or self._recording_name is not None:
+            self.command_bar.set_status(f"Watch {watch['id']}: {message} (busy, {watch['macro']} skipped)")
+        else:
+            self._run_macro(watch["macro"])
+
+    def _notify(self, title, message):
+        """Post a macOS notification through osascript (no app bundle needed)."""
+
+        def quote(text):
+            return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+        script = f"display notification {quote(message)} with title {quote(title)}"
+        try:
+            subprocess.Popen(
+                ["osascript", "-e", script],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as exc:
+            print(f"Notification failed: {exc}")
+
+    def _handle_perf_command(self, arg):
+        sub = (arg or "").strip()
+        if sub == "export" or sub.startswith("export "):
+            path = sub[len("export"):].strip()
+            if not path:
+                path = os.path.join(
+                    GLASS_DIR, "traces", time.strftime("trace-%Y%m%d-%H%M%S.json")
+                )
+            path = os.path.expanduser(path)
+            try:
+                count = self.tracer.export_chrome(path)
+            except OSError as exc:
+                self.command_bar.set_status(f"Trace export failed: {exc}")
+                return
+            self.command_bar.set_status(f"Exported {count} spans to {path}")
+            return
+        if sub == "clear":
+            self.tracer.clear()
+            self.command_bar.set_status("Trace cleared")
+            return
+        self._show_perf()
+
+    def _show_perf(self):
+        """Show a per-step latency breakdown of the last macro run or command."""
+        root = self.tracer.last_root()
+        if root is None:
+            self.command_bar.set_status("No trace yet")
+            return
+        children = collections.defaultdict(list)
+        for span in self.tracer.spans():
+            if span.parent_id is not None:
+                children[span.parent_id].append(span)
+
+        stage_order = ("verify", "capture", "ocr", "queue-wait", "find", "match", "click", "wait", "delay")
+        steps = [s for s in children[root.span_id] if s.name == "step"]
+        if not steps:
+            steps = [root]
+        lines = []
+        for step in steps:
+            totals = collections.defaultdict(float)
+            for child in children[step.span_id]:
+                totals[child.name] += child.duration
+            parts = "  ".join(
+                f"{stage} {totals[stage] * 1000:.0f}" for stage in stage_order if stage in totals
+            )
+            label = step.args.get("step") or step.args.get("command", "")
+            index = step.args.get("index", 1)
+            lines.append(f"{index:>2}. {label[:32]:<32} {step.duration * 1000:>7.0f}ms  {parts}")
+
+        title = root.args.get("macro") or root.args.get("command", "")
+        status = f"{root.name} {title}: {root.duration * 1000:.0f}ms"
+        if root.name == "macro":
+            status += f", {len(steps)} steps"
+        if root.args.get("status") == "aborted":
+            status += f" (aborted: {root.args.get('reason', '')})"
+        self.command_bar.set_status(status)
+        self.command_bar.show_help("\n".join(lines) or "(no spans)")
+
+    def _optimize_steps(self, steps):
+        """(new_steps, changes, notes) from MacroOptimizer with this session's costs."""
+        optimizer = MacroOptimizer(self._macro_delay, self._simulation_costs())
+        return optimizer.optimize(
+            steps, lambda target: self._get_macro_steps(self._normalize_macro_name(target))
+        )
+
+    def _handle_optimize_command(self, arg):
+        apply = "--apply" in (arg or "")
+        name = self._normalize_macro_name((arg or "").replace("--apply", ""))
+        if not name:
+            self.command_bar.set_status("Missing macro name")
+            return
+        if name not in self.macros:
+            self.command_bar.set_status("Macro not found")
+            return
+        steps = list(self._get_macro_steps(name))
+        new_steps, changes, notes = self._optimize_steps(steps)
+        if not changes and not notes:
+            self.command_bar.set_status(f"Nothing to optimize in {name}")
+            return
+        saved = sum(seconds for _, seconds in changes)
+        lines = list(difflib.unified_diff(steps, new_steps, lineterm="", n=1))[2:]
+        lines += [f"~{seconds:.2f}s  {description}" for description, seconds in changes]
+        lines += [f"note: {note}" for note in notes]
+        self.command_bar.show_help("\n".join(lines))
+        if not changes:
+            self.command_bar.set_status(f"{name}: no safe rewrites, {len(notes)} note(s)")
+        elif apply:
+            macro = self.macros[name]
+            if isinstance(macro, dict):
+                macro = dict(macro, steps=new_steps)
+            else:
+                macro = new_steps
+            self.macros[name] = macro
+            self._save_macros()
+            self.command_bar.set_status(
+                f"Optimized {name}: {len(steps)} -> {len(new_steps)} steps, ~{saved:.1f}s faster"
+            )
+        else:
+            self.command_bar.set_status(
+                f"{name}: {len(changes)} change(s), ~{saved:.1f}s faster (optimize {name} --apply to save)"
+            )
+
+    def _show_profile(self, arg):
+        """Show per-step timing over the recorded runs of a macro."""
+        name = self._normalize_macro_name(arg)
+        if not name:
+            self.command_bar.set_status("Missing macro name")
+            return
+        if name not in self.macros:
+            self.command_bar.set_status("Macro not found")
+            return
+        summary = self.profiles.summarize(name)
+        if not summary["runs"]:
+            older = f" ({summary['older']} from before the last edit)" if summary["older"] else ""
+            self.command_bar.set_status(f"No runs recorded for {name}{older}")
+            return
+        lines = []
+        for step in summary["steps"]:
+            mark = "*" if step["share"] >= PROFILE_DOMINANT_SHARE else " "
+            stages = "  ".join(
+                f"{stage} {seconds * 1000:.0f}"
+                for stage, seconds in sorted(step["stages"].items(), key=lambda item: -item[1])[:3]
+            )
+            line = (
+                f"{mark}{step['index']:>2}. {step['step'][:32]:<32} p50 {step['p50_s'] * 1000:>6.0f}ms  "
+                f"p95 {step['p95_s'] * 1000:>6.0f}ms  {step['share']:>4.0%}  {stages}"
+            )
+            if step["aborts"]:
+                line += f"  aborted {step['aborts']}x: {step['abort_reason']}"
+            lines.append(line)
+        status = (
+            f"Profile {name}: {summary['runs']} runs, p50 {summary['total_p50_s']:.2f}s, "
+            f"p95 {summary['total_p95_s']:.2f}s"
+        )
+        if summary["older"]:
+            status += f" ({summary['older']} older runs ignored)"
+        self.command_bar.set_status(status)
+        self.command_bar.show_help("\n".join(lines))
+
+    def _handle_stats_command(self, arg):
+        sub = (arg or "").strip()
+        if sub == "reset":
+            self.metrics.reset()
+            self.capture_pool.reset_peak()
+            self.command_bar.set_status("Stats reset")
+            return
+        snapshot = self.metrics.snapshot()
+        lines = []
+        for name in sorted(snapshot["histograms"]):
+            summary = snapshot["histograms"][name]
+            is_latency = name.startswith("latency.")
+            label = name[len("latency."):] if is_latency else name
+
+            def fmt(value):
+                if value is None:
+                    return "-"
+                if is_latency:
+                    # Microseconds -> milliseconds for display.
+                    return f"{value / 1000.0:.1f}ms"
+                return f"{value:.0f}"
+
+            lines.append(
+                f"{label:<22} n={summary['count']:<5} p50 {fmt(summary['p50'])}  "
+                f"p95 {fmt(summary['p95'])}  p99 {fmt(summary['p99'])}  max {fmt(summary['max'])}"
+            )
+        counters = snapshot["counters"]
+        for name in sorted(counters):
+            if name.startswith("macro."):
+                lines.append(f"{name:<22} {counters[name]}")
+        for name, entry in sorted(self.metrics.cache_rates(counters).items()):
+            total = entry["hit"] + entry["miss"]
+            rate = f"{entry['rate']:.0%}" if entry["rate"] is not None else "-"
+            lines.append(f"cache {name:<16} {rate} hit ({entry['hit']}/{total})")
+        disk = self.disk_cache.stats()
+        lines.append(
+            f"disk cache             {disk['entries']} entries  "
+            f"{disk['bytes'] / float(1 << 20):.1f}MB of {disk['cap'] / float(1 << 20):.0f}MB"
+        )
+        memory = self.capture_pool.stats()
+        mb = float(1 << 20)
+        lines.append(
+            f"memory capture         live {memory['live'] / mb:.0f}MB  idle {memory['idle'] / mb:.0f}MB  "
+            f"peak {memory['peak'] / mb:.0f}MB  cap {memory['cap'] / mb:.0f}MB  "
+            f"(reused {memory['reused']}/{memory['allocated'] + memory['reused']}, waits {memory['waits']})"
+        )
+        self.command_bar.set_status(f"Stats (uptime {snapshot['uptime_s']:.0f}s)")
+        self.command_bar.show_help("\n".join(lines) or "(no data yet)")
+
     def _list_screens(self):
         screens = self._screens()
         if not screens:
@@ -2032,32 +6225,65 @@ class AppController(AppKit.NSObject):
         self._follow_command_bar = False
         self._set_active_screen(idx, announce=True, rebuild_command_bar=True)
 
-    def _handle_capture(self):
+    def _handle_capture(self, all_screens=False):
+        if self._simulation is not None:
+            self._simulate_capture()
+            return
         if self._ocr_in_progress:
+            if self._live_capture:
+                self._capture_after_live = all_screens
             self.command_bar.set_status("Capturing...")
             return
+        if all_screens and len(self._screens()) > 1:
+            self._handle_capture_all_screens()
+            return
+        try:
+            window, window_offset = self._target_window()
+        except LookupError as exc:
+            self.command_bar.set_status(str(exc))
+            self._emit_event("error", message=str(exc))
+            if self._macro_wait_reason is not None:
+                self._abort_macro(str(exc))
+            self._pending_find_query = None
+            return
         self._ocr_in_progress = True
         self.capture_width_px = None
         self.capture_height_px = None
         self.capture_scale = None
         self.overlay.clear()
         self.command_bar.set_status("Capturing...")
+        trace_parent = self._trace_parent()
+
+        frame_bytes = self.ocr_engine.frame_bytes(self._active_display_id)
+        if window is not None:
+            # The window is at most a display's worth of pixels; scale by its area.
+            display = Quartz.CGDisplayBounds(self._active_display_id).size
+            _, _, width, height = window["bounds"]
+            share = (width * height) / max(1.0, display.width * display.height)
+            frame_bytes = int(frame_bytes * min(1.0, share))
 
         def task():
-            with objc.autorelease_pool():
+            # The frame's memory charge is held until OCR is done with it; if the
+            # cap is reached this waits for other captures to finish.
+            with self.capture_pool.hold(frame_bytes), objc.autorelease_pool():
                 try:
-                    image, width_px, height_px, scale, bounds_px = (
-                        self.ocr_engine.capture_display(
-                            self._active_display_id,
-                            (self.screen_frame.size.width, self.screen_frame.size.height),
+                    if window is not None:
+                        with self.tracer.span("capture", trace_parent, window=window["id"]):
+                            image, width_px, height_px, scale = self.ocr_engine.capture_window(window)
+                    else:
+                        with self.tracer.span("capture", trace_parent, display=self._active_display_id):
+                            image, width_px, height_px, scale, bounds_px = (
+                                self.ocr_engine.capture_display(
+                                    self._active_display_id,
+                                    (self.screen_frame.size.width, self.screen_frame.size.height),
+                                )
+                            )
+                        # Store origin (points) in global Quartz space for clicks.
+                        self.capture_origin_pt = (
+                            bounds_px.origin.x / float(scale or 1.0),
+                            bounds_px.origin.y / float(scale or 1.0),
                         )
-                    )
-                    # Store origin (points) in global Quartz space for clicks.
-                    self.capture_origin_pt = (
-                        bounds_px.origin.x / float(scale or 1.0),
-                        bounds_px.origin.y / float(scale or 1.0),
-                    )
-                    self._display_bounds_px = bounds_px
+                        self._display_bounds_px = bounds_px
                 except PermissionError:
                     run_on_main(
                         lambda: self.command_bar.set_status(
@@ -2067,10 +6293,14 @@ class AppController(AppKit.NSObject):
                     self.capture_width_px = None
                     self.capture_height_px = None
                     self.capture_scale = None
+                    self._emit_event("error", message="Screen Recording permission required")
                     if self._macro_wait_reason is not None:
                         self._abort_macro("Capture blocked by permission")
                     self._pending_find_query = None
                     self._ocr_in_progress = False
+                    self._live_capture = False
+                    self._capture_after_live = None
+                    self._trace_finish_command()
                     return
                 except Exception as exc:
                     print(f"Capture failed: {exc}")
@@ -2078,121 +6308,376 @@ class AppController(AppKit.NSObject):
                     self.capture_width_px = None
                     self.capture_height_px = None
                     self.capture_scale = None
+                    self._emit_event("error", message=f"Capture failed: {exc}")
                     if self._macro_wait_reason is not None:
                         self._abort_macro("Capture failed")
                     self._pending_find_query = None
                     self._ocr_in_progress = False
+                    self._live_capture = False
+                    self._capture_after_live = None
+                    self._trace_finish_command()
                     return
 
                 run_on_main(lambda: self.command_bar.set_status("Running OCR..."))
                 try:
-                    items = self.ocr_engine.recognize_text(
-                        image, width_px, height_px, scale
-                    )
+                    items = self._recognize_frame(image, width_px, height_px, scale, trace_parent)
                 except Exception as exc:
                     print(f"OCR failed: {exc}")
                     run_on_main(lambda: self.command_bar.set_status("OCR failed"))
+                    self._emit_event("error", message=f"OCR failed: {exc}")
                     if self._macro_wait_reason is not None:
                         self._abort_macro("OCR failed")
                     self._ocr_in_progress = False
+                    self._live_capture = False
+                    self._capture_after_live = None
+                    self._trace_finish_command()
                     return
+                image = None
+
+            enqueued = time.perf_counter()
 
             def finish():
+                self.tracer.record("queue-wait", enqueued, time.perf_counter(), trace_parent)
                 self.ocr_items = items
+                # A window capture is searched through its offset, like a
+                # display in an all-screens capture.
+                self._screen_snapshots = None if window is None else [(None, items, window_offset)]
+                self._snapshot_time = time.monotonic()
                 self.matches = []
                 self.capture_width_px = width_px
                 self.capture_height_px = height_px
                 self.capture_scale = scale
                 self._ocr_in_progress = False
+                self._live_capture = False
+                self._emit_event("capture", items=len(items), width_px=width_px, height_px=height_px)
                 self.command_bar.set_status(f"OCR complete: {len(items)} items")
+                if self._capture_after_live is not None:
+                    # This frame was taken for a keystroke, before the waiting
+                    # command or macro step was issued.
+                    all_screens, self._capture_after_live = self._capture_after_live, None
+                    self._handle_capture(all_screens=all_screens)
+                    return
                 if self._macro_wait_reason == "capture":
                     self._macro_step_complete()
                 if self._pending_find_query:
                     pending = self._pending_find_query
                     self._pending_find_query = None
                     self._run_find(pending)
+                elif self._live_query is not None:
+                    self._live_search(self._live_query)
+                self._trace_finish_command()
 
             run_on_main(finish)
 
         threading.Thread(target=task, daemon=True).start()
 
-    def _handle_find(self, query):
+    def _handle_capture_all_screens(self):
+        """Capture and OCR every display concurrently.
+
+        Each display is captured and OCR'd on its own worker, so the total is
+        close to the slowest display. Results are kept per display with offsets relative to the active screen, so match boxes
+        and `_click_at` work unchanged for targets on any display.
+        """
+        self._ocr_in_progress = True
+        self.overlay.clear()
+        trace_parent = self._trace_parent()
+        displays = []
+        for index, screen in enumerate(self._screens()):
+            display_id = self._screen_display_id(screen)
+            if display_id is None:
+                continue
+            frame = screen.frame()
+            displays.append((index, display_id, (frame.size.width, frame.size.height)))
+        self.command_bar.set_status(f"Capturing {len(displays)} screens...")
+        active_id = self._active_display_id
+
+        def capture_one(display):
+            index, display_id, size = display
+            with self.capture_pool.hold(self.ocr_engine.frame_bytes(display_id)), objc.autorelease_pool():
+                with self.tracer.span("capture", trace_parent, display=display_id):
+                    image, width_px, height_px, scale, bounds_px = self.ocr_engine.capture_display(
+                        display_id, size
+                    )
+                items = self._recognize_frame(
+                    image, width_px, height_px, scale, trace_parent, display=display_id
+                )
+                image = None
+            origin = (bounds_px.origin.x / float(scale or 1.0), bounds_px.origin.y / float(scale or 1.0))
+            return {
+                "index": index,
+                "display_id": display_id,
+                "items": items,
+                "origin": origin,
+                "width_px": width_px,
+                "height_px": height_px,
+                "scale": scale,
+                "bounds_px": bounds_px,
+            }
+
+        def task():
+            results = []
+            errors = []
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(displays) or 1) as pool:
+                futures = [pool.submit(capture_one, display) for display in displays]
+                for display, future in zip(displays, futures):
+                    try:
+                        results.append(future.result())
+                    except Exception as exc:
+                        print(f"Capture failed on display {display[1]}: {exc}")
+                        errors.append(exc)
+            enqueued = time.perf_counter()
+
+            def finish():
+                self.tracer.record("queue-wait", enqueued, time.perf_counter(), trace_parent)
+                self._ocr_in_progress = False
+                if not results:
+                    denied = any(isinstance(exc, PermissionError) for exc in errors)
+                    message = "Screen Recording permission required" if denied else "Capture failed"
+                    self.command_bar.set_status(message)
+                    self._emit_event("error", message=message)
+                    if self._macro_wait_reason is not None:
+                        self._abort_macro("Capture blocked by permission" if denied else "Capture failed")
+                    self._pending_find_query = None
+                    self._trace_finish_command()
+                    return
+                active = next((res for res in results if res["display_id"] == active_id), None)
+                if active is not None:
+                    self.ocr_items = active["items"]
+                    self.capture_width_px = active["width_px"]
+                    self.capture_height_px = active["height_px"]
+                    self.capture_scale = active["scale"]
+                    self.capture_origin_pt = active["origin"]
+                    self._display_bounds_px = active["bounds_px"]
+                else:
+                    self.ocr_items = OCRResult.empty()
+                ax, ay = self.capture_origin_pt
+                self._screen_snapshots = [
+                    (res["index"], res["items"], (res["origin"][0] - ax, res["origin"][1] - ay))
+                    for res in results
+                ]
+                self._snapshot_time = time.monotonic()
+                self.matches = []
+                total = sum(len(res["items"]) for res in results)
+                self._emit_event("capture", items=total, screens=len(results))
+                self.command_bar.set_status(f"OCR complete: {total} items on {len(results)} screens")
+                if self._macro_wait_reason == "capture":
+                    self._macro_step_complete()
+                if self._pending_find_query:
+                    pending = self._pending_find_query
+                    self._pending_find_query = None
+                    self._run_find(pending)
+                elif self._live_query is not None:
+                    self._live_search(self._live_query)
+                self._trace_finish_command()
+
+            run_on_main(finish)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def _recognize_frame(self, image, width_px, height_px, scale, trace_parent=None, **span_args):
+        """OCR a captured frame, reusing results for byte-identical frames.
+
+        The key is a hash of the frame pixels and geometry. Lookups go through a
+        small in-memory memo, then the disk cache, so an unchanged screen is not
+        re-OCR'd, even after a restart.
+        """
+        data = Quartz.CGDataProviderCopyData(Quartz.CGImageGetDataProvider(image))
+        digest = hashlib.blake2b(memoryview(data), digest_size=16)
+        data = None
+        digest.update(f"{width_px}x{height_px}@{scale:.4f}".encode("ascii"))
+        key = digest.hexdigest()
+        with self._ocr_memo_lock:
+            items = self._ocr_memo.get(key)
+            if items is not None:
+                self._ocr_memo.move_to_end(key)
+        self.metrics.cache("ocr", items is not None)
+        if items is None:
+            entry = self.disk_cache.get("ocr", key)
+            self.metrics.cache("ocr-disk", entry is not None)
+            if entry is not None:
+                items = OCRResult.from_arrays(entry[1])
+        if items is None:
+            with self.tracer.span("ocr", trace_parent, **span_args) as ocr_span:
+                items = self.ocr_engine.recognize_text(image, width_px, height_px, scale)
+                ocr_span.args["items"] = len(items)
+            self.disk_cache.put("ocr", key, {"items": len(items)}, items.to_arrays())
+        # Build the search-as-you-type index here, off the main thread.
+        items.ngrams
+        with self._ocr_memo_lock:
+            self._ocr_memo[key] = items
+            while len(self._ocr_memo) > 8:
+                self._ocr_memo.popitem(last=False)
+        return items
+
+    def _handle_find(self, query, all_screens=False):
         self._sync_active_screen_to_command_bar(announce=False)
         if not query:
             self.command_bar.set_status("Missing search text")
             return
         if self._ocr_in_progress:
             self._pending_find_query = query
+            if self._live_capture:
+                self._capture_after_live = all_screens
             self.command_bar.set_status("Running OCR...")
             return
         self._pending_find_query = query
-        self._handle_capture()
+        self._handle_capture(all_screens=all_screens)
+
+    def _live_query_for(self, text):
+        """The search text for input `text`, or None when it is a command."""
+        text = text.strip()
+        name, _, rest = text.partition(" ")
+        if name.lower() == "find":
+            return self._split_all_screens_flag(rest.strip())[1] or None
+        if name.lower() in COMMAND_NAMES or self._normalize_macro_name(text) in self.macros:
+            return None
+        return text or None
+
+    def _is_name_prefix(self, text):
+        """Whether `text` may still be a command or macro name being typed."""
+        lowered = text.strip().lower()
+        if " " not in lowered and any(name.startswith(lowered) for name in COMMAND_NAMES):
+            return True
+        return any(name.lower().startswith(lowered) for name in self.macros)
+
+    def _on_input_changed(self, text):
+        """Search-as-you-type: match the latest OCR snapshot while the user types.
+
+        Nothing is searched while the text could still be a command or macro
+        name. Only a stale (or missing) snapshot triggers a background capture;
+        the results are refreshed when it lands. Enter still runs a fresh `find`.
+        """
+        if self._macro_running or self._recording_name is not None or self._batch is not None:
+            return
+        query = self._live_query_for(text)
+        if query is None or len(query) < 2 or self._is_name_prefix(text):
+            self._end_live_preview()
+            return
+        self._live_query = query
+        stale = (
+            self._snapshot_time is None
+            or time.monotonic() - self._snapshot_time > LIVE_SNAPSHOT_TTL
+        )
+        if stale and not self._ocr_in_progress:
+            self._sync_active_screen_to_command_bar(announce=False)
+            self._handle_capture()
+            self._live_capture = self._ocr_in_progress
+        if self._snapshot_time is not None:
+            self._live_search(query)
+
+    def _end_live_preview(self):
+        """Stop search-as-you-type and put the committed `find` matches back."""
+        self._live_query = None
+        self._live_generation += 1
+        if self._live_matches is not None:
+            self._live_matches = None
+            self.overlay.show_matches(self.matches, self.screen_height)
+
+    def _live_search(self, query):
+        """Start (or restart) an incremental match of `query` over the snapshot."""
+        self._live_generation += 1
+        sources = self._find_sources()
+        previous = self._live_job
+        if (
+            previous is not None
+            and previous["done"]
+            and query.lower().startswith(previous["query"].lower())
+            and len(previous["sources"]) == len(sources)
+            and all(a[1] is b[1] for a, b in zip(previous["sources"], sources))
+        ):
+            # The query was extended: only items that matched before can match now.
+            candidates = previous["hits"]
+        else:
+            candidates = [ocr.ngrams.candidates(query) for _, ocr, _ in sources]
+        self._live_job = {
+            "query": query,
+            "sources": sources,
+            "scan": self._live_scan(query, sources, candidates),
+            "hits": [[] for _ in sources],
+            "matches": [],
+            "done": False,
+        }
+        self._live_step(self._live_generation)
+
+    def _live_scan(self, query, sources, candidates):
+        pattern = re.compile(re.escape(query), re.IGNORECASE)
+        for position, ((screen_index, ocr, (dx, dy)), items) in enumerate(zip(sources, candidates)):
+            for index in items:
+                found = []
+                for occurrence in pattern.finditer(ocr.text(index)):
+                    x, y, w, h = ocr.range_bbox(index, *occurrence.span())
+                    match = {"text": ocr.text(index), "bbox": (x + dx, y + dy, w, h), "query": query}
+                    if screen_index is not None:
+                        match["screen"] = screen_index + 1
+                    found.append(match)
+                yield position, index, found
+
+    def _live_step(self, generation):
+        """Advance the live job for one frame budget, then show what we have."""
+        job = self._live_job
+        if generation != self._live_generation or job is None:
+            return
+        deadline = time.perf_counter() + LIVE_FRAME_BUDGET
+        for position, index, found in job["scan"]:
+            if found:
+                job["hits"][position].append(index)
+                job["matches"].extend(found)
+            if time.perf_counter() > deadline:
+                break
+        else:
+            job["done"] = True
+        matches = self._order_matches_by_anchor(job["matches"])
+        self._live_matches = matches
+        self.overlay.show_matches(matches, self.screen_height)
+        suffix = "" if job["done"] else "..."
+        if self._ocr_in_progress:
+            suffix += " (refreshing)"
+        self.command_bar.set_status(f"{len(matches)} matches for '{job['query']}'{suffix}")
+        if not job["done"]:
+            run_on_main(lambda: self._live_step(generation))
+
+    def _find_sources(self):
+        """OCR snapshots to search: every display after an all-screens capture."""
+        if self._screen_snapshots is not None:
+            return self._screen_snapshots
+        return [(None, self.ocr_items, (0.0, 0.0))]
 
     def _run_find(self, query):
         if not query:
             self.command_bar.set_status("Missing search text")
             return
 
-        norm_query = query.lower()
+        find_span = self.tracer.start("find", self._trace_parent(), query=query)
+        sources = self._find_sources()
         matches = []
-        ns_query = Foundation.NSString.stringWithString_(query)
-        for item in self.ocr_items:
-            text = item["text"]
-            ns_full = Foundation.NSString.stringWithString_(text)
-            search_range = Foundation.NSMakeRange(0, ns_full.length())
-            while True:
-                found = ns_full.rangeOfString_options_range_(
-                    ns_query, Foundation.NSCaseInsensitiveSearch, search_range
-                )
-                if found.location == Foundation.NSNotFound:
-                    break
-                bbox = self._bbox_for_text_range(item, found)
-                if bbox is None:
-                    bbox = item["bbox"]
-                matches.append({"text": text, "bbox": bbox, "query": query})
-                next_location = found.location + max(found.length, 1)
-                if next_location >= ns_full.length():
-                    break
-                search_range = Foundation.NSMakeRange(
-                    next_location, ns_full.length() - next_location
-                )
+        for screen_index, ocr, (dx, dy) in sources:
+            for index, start, end in ocr.find(query):
+                x, y, w, h = ocr.range_bbox(index, start, end)
+                match = {"text": ocr.text(index), "bbox": (x + dx, y + dy, w, h), "query": query}
+                if screen_index is not None:
+                    match["screen"] = screen_index + 1
+                matches.append(match)
         matches = self._order_matches_by_anchor(matches)
+        items = sum(len(ocr) for _, ocr, _ in sources)
+        self.tracer.end(find_span, items=items, matches=len(matches))
         self.matches = matches
+        self._live_matches = None
         self.overlay.show_matches(matches, self.screen_height)
-        self.command_bar.set_status(f"Found {len(matches)} matches")
+        self._emit_event("matches", query=query, matches=self._matches_payload(matches))
+        elsewhere = sum(
+            1
+            for m in matches
+            if m.get("screen") is not None and m["screen"] != self._active_screen_index + 1
+        )
+        if elsewhere:
+            self.command_bar.set_status(f"Found {len(matches)} matches ({elsewhere} on other screens)")
+        else:
+            self.command_bar.set_status(f"Found {len(matches)} matches")
         if self._macro_wait_reason == "find":
             self._macro_step_complete()
         elif self._macro_wait_reason == "smart-click":
             self._smart_click_after_find()
 
-    def _bbox_for_text_range(self, item, text_range):
-        vn_text = item.get("vn_text")
-        if vn_text is None:
-            return None
-        if self.capture_width_px is None or self.capture_height_px is None:
-            return None
-        rect_obs, error = vn_text.boundingBoxForRange_error_(text_range, None)
-        if error is not None or rect_obs is None:
-            return None
-        try:
-            rect = rect_obs.boundingBox()
-        except AttributeError:
-            rect = rect_obs
-        if rect is None:
-            return None
-        width_px = self.capture_width_px
-        height_px = self.capture_height_px
-        scale = self.capture_scale or 1.0
-        x_px = rect.origin.x * width_px
-        y_px = rect.origin.y * height_px
-        w_px = rect.size.width * width_px
-        h_px = rect.size.height * height_px
-        x_pt = x_px / scale
-        y_top_pt = (height_px - (y_px + h_px)) / scale
-        w_pt = w_px / scale
-        h_pt = h_px / scale
-        return (x_pt, y_top_pt, w_pt, h_pt)
-
     def _handle_click(self, value, record=True, button="left"):
         if value is None or value == "":
             self.command_bar.set_status("Invalid selection")
@@ -2263,6 +6748,12 @@ class AppController(AppKit.NSObject):
     def _click_at(self, x, y, button="left", click_count=1):
         # `x,y` are in points relative to the *active screen*.
         # Quartz mouse events expect global display coordinates.
+        if self._simulation is not None:
+            self._simulation.click(len(self.matches))
+            return
+        click_span = self.tracer.start(
+            "click", self._trace_parent(), button=button, count=click_count
+        )
         ox, oy = getattr(self, "capture_origin_pt", (0.0, 0.0))
         point = Quartz.CGPointMake(ox + x, oy + y)
 
@@ -2284,6 +6775,7 @@ class AppController(AppKit.NSObject):
             Quartz.CGEventSetIntegerValueField(event_up, Quartz.kCGMouseEventClickState, i)
             Quartz.CGEventPost(Quartz.kCGHIDEventTap, event_down)
             Quartz.CGEventPost(Quartz.kCGHIDEventTap, event_up)
+        self.tracer.end(click_span)
 
 
 class AppDelegate(AppKit.NSObject):